@@ -59,14 +59,14 @@ Delete { Point{2}; }
 
 def gmsh_geo_comment(output, comment):
   '''Function witing a single-line comment to Gmsh geo script file.'''
-  output.write( '// ' + comment + '\n')
+  output.comment(comment)
 
 
 def gmsh_geo_draw_point(output, index, loc, z):
   '''Function writing (drawing) a point to the Gmsh geo script file.'''
   accuracy = '.8'
-  format = 'Point ( IP + %%i ) = { %%%(dp)sf, %%%(dp)sf, %%%(dp)sf };\n' % { 'dp': accuracy }
-  output.write(format % (index, loc[0], loc[1], z))
+  format = 'Point ( IP + %%i ) = { %%%(dp)sf, %%%(dp)sf, %(z)s };\n' % { 'dp': accuracy, 'z': ('%' + accuracy + 'f') % z }
+  output.points([index], [loc], format)
 
 
 def gmsh_geo_draw_loop(output, boundary, index, loopstartpoint, last, open):
@@ -37,6 +37,7 @@ from pylab import contour
 #matplotlib.use('Agg')
 from numpy import zeros, array, append, exp
 import gmsh
+from geo_writer import GeoWriter
 
 #contour = matplotlib.pyplot.contour
 
@@ -196,7 +197,7 @@ arguments.region = expand_boxes(arguments.region, arguments.box)
  
 
 source = file(arguments.input,'r')
-output = file(arguments.output,'w')
+output = GeoWriter(file(arguments.output,'w'))
 
 gmsh.gmsh_geo_comment(output, 'Arguments: ' + arguments.call)
 printv('Source netCDF located at ' + arguments.input)
@@ -38,6 +38,7 @@
 
 import shapefile
 from shapely.geometry import *
+from polygon_index import PolygonIndex
 
 #must redefine to accept multiple domains
 
@@ -55,6 +56,7 @@ class assignIDs(): #for some reason seems to be yeilding an earlier result
 		self.IDPolygons = []
 		for j in range(len(self.IDPolygonCoordsList)):
 			self.IDPolygons.append(Polygon([self.IDPolygonCoordsList[j][i] for i in range(len(self.IDPolygonCoordsList[j]))]))
+		self.IDPolygonIndex = PolygonIndex(self.IDPolygons)
 		self.physicalIslandList = []
 		self.lineIDList = []
 
@@ -76,19 +78,10 @@ class assignIDs(): #for some reason seems to be yeilding an earlier result
 	#			for n in range(len(self.IDPolygons)):
 	#				localIdList.append(self.defaultID)
 	#			return
-			done = False
-			for n in range(len(self.IDPolygons)):
-
-				if line.intersects(self.IDPolygons[-(n+1)]):
-					#print "Now", self.IDPolygonID[-(n+1)][0]
-					if self.idShapeFile:
-						localIdList.append(self.IDPolygonID[-(n+1)][0])
-					else:
-						localIdList.append(self.defaultID)
-					done = True
-					break
-
-			if not done:
+			n = self.IDPolygonIndex.last_intersecting(line)
+			if n >= 0 and self.idShapeFile:
+				localIdList.append(self.IDPolygonID[n - len(self.IDPolygons)][0])
+			else:
 				localIdList.append(self.defaultID)
 
 		
@@ -34,6 +34,7 @@ from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 from qgis.core import *
 import math
+from geo_writer import GeoWriter
 
 def same_point(x1,y1,x2,y2):
   dist = math.sqrt((x1-x2)*(x1-x2)+(y1-y2)*(y1-y2))
@@ -45,7 +46,7 @@ def export(shpFile ,filePath):
 
 	# The function exports the shp file to a .geo. If there isn't any .shp file created, the user will be promped an error.
 
-	geoFile =  open(filePath + ".geo","w")
+	geoFile =  GeoWriter(open(filePath + ".geo","w"))
 	shapes =  shpFile.shapes()
 	records = shpFile.records()
 	pId = 1
@@ -58,10 +59,13 @@ def export(shpFile ,filePath):
 
 	# First of all, we'll remove the duplicates
 
+	# A point is dropped when it is the same as the last point kept before it in its shape
 	for i in range(len(shapes)):
-		for j in range(len(shapes[i].points)-1):
-			while j < len(shapes[i].points)-1 and same_point(shapes[i].points[j][0], shapes[i].points[j][1], shapes[i].points[j+1][0], shapes[i].points[j+1][1]):
-				trash = shapes[i].points.pop(j+1)
+		points = shapes[i].points[:1]
+		for p in shapes[i].points[1:]:
+			if not same_point(points[-1][0], points[-1][1], p[0], p[1]):
+				points.append(p)
+		shapes[i].points = points
 		trash = shapes[i].points.pop()
 	i = 0
 	while i < len(shapes):
@@ -71,13 +75,12 @@ def export(shpFile ,filePath):
 		else:
 			i+=1 
 
-	# This for-loop extracts all the points, one by one, and writes them as it goes along
+	# This for-loop writes the points of each shape in one go
 
 	for i in range(len(shapes)):
 		shape = shapes[i]
-		for coord in shape.points:
-			geoFile.write("Point(%d) = {%f, %f, zCoord};\n" %(pId, coord[0], coord[1]))
-			pId+=1
+		geoFile.points(range(pId, pId + len(shape.points)), shape.points, "Point(%d) = {%f, %f, zCoord};\n")
+		pId += len(shape.points)
 	pId = 1
 	lId = 1
 	# This for-loop writes the lines of the file. Each geometric shape (boundary and island) will get an extra edge to close its poligon.
@@ -88,49 +91,40 @@ def export(shpFile ,filePath):
 	while i < len(shapes):
 		init = pId
 		polyId = records[i][1]
-		lLoop = "Line Loop(" + str(lLoopId) + ") = {"
+		lLoop = []
 		while(i<len(shapes) and polyId == records[i][1]):
 			shape = shapes[i]
-
-			for j in range(len(shape.points)):
-				if j==len(shape.points)-1 and (i==len(shapes)-1 or polyId!=records[i+1][1]):
-					geoFile.write("Line(%d) = {%d, %d};\n" %(lId ,pId, init))
-					lLoop += str(lId) + "};\n"
-					phLine.append((int(records[i][0]),lId))
-				else:
-					geoFile.write("Line(%d) = {%d, %d};\n" %(lId, pId, pId+1))
-					lLoop += str(lId) + ", "
-					phLine.append((int(records[i][0]),lId))
-				lId+=1
-				pId+=1
+			n = len(shape.points)
+			ids = range(lId, lId + n)
+			ends = range(pId + 1, pId + n + 1)
+			if i==len(shapes)-1 or polyId!=records[i+1][1]:
+				ends[-1] = init
+			geoFile.lines(ids, zip(range(pId, pId + n), ends))
+			lLoop += ids
+			phLine += [(int(records[i][0]),l) for l in ids]
+			lId+=n
+			pId+=n
 			i+=1
 
-		geoFile.write(lLoop)
+		geoFile.line_loop(lLoopId, lLoop)
 		if lLoopId>1:
 			planeSurface += ", " + str(lLoopId)
 		lLoopId+=1
 	planeSurface += "};\n"
 	# The boundary can be splitted into many different shapes. That's why, the first line loop will contain only the boundary, regardless of how many shape it may encapsulate.
 	# Puts ths ids in the file as physical lines.
-	# How it works: Takes the first element's id, passes it into the file as the id of a physical line and loops through the entire array, searching for lines with the same id. The lines that are found are added to that specific physical line and are deleted from the phLine array. All this stops when phLine will be empty.
-	pids = ""
-	while len(phLine) > 0:  
-		finalId = phLine[0][0] 
-		ok = False
-		geoFile.write("Physical Line(%d) = {" %finalId)
-		i = 0 
-		while i < len(phLine):
-			if phLine[i][0] == finalId:
-				if ok:
-					pids+=", "
-					geoFile.write(", ")
-				ok = True
-				pids+=str(phLine[i][1])
-				geoFile.write(str(phLine[i][1]))
-				phLine.remove(phLine[i])
-				continue
-			i+=1   
-		geoFile.write("};\n")
+	# How it works: The lines are grouped by their id, in the order in which the ids first appear, and each group is written as a physical line. pids keeps all the lines in the same order for the attractor field.
+	pids = []
+	physicalLines = {}
+	order = []
+	for finalId, line in phLine:
+		if finalId not in physicalLines:
+			physicalLines[finalId] = []
+			order.append(finalId)
+		physicalLines[finalId].append(line)
+	for finalId in order:
+		geoFile.physical("Line", finalId, physicalLines[finalId])
+		pids += physicalLines[finalId]
 	
 	
 	geoFile.write("Physical Surface(1)={1};\n")
@@ -139,15 +133,8 @@ def export(shpFile ,filePath):
 	# Additional lines which help the meshing algorithm:
 	
 	geoFile.write("Printf(\"Assigning characteristic mesh sizes...\");\n")
-	geoFile.write("Field[1] = Attractor;\n")
-	geoFile.write("Field[1].EdgesList = {%s};\n" %pids) 
-	geoFile.write("Field[1].NNodesByEdge = 50;\n")
-	geoFile.write("Field[2] = Threshold;\n")
-	geoFile.write("Field[2].DistMax = 50000;\n")
-	geoFile.write("Field[2].DistMin = 500;\n")
-	geoFile.write("Field[2].IField = 1;\n")
-	geoFile.write("Field[2].LcMin = 5000;\n")
-	geoFile.write("Field[2].LcMax = 50000;\n")
+	geoFile.field(1, "Attractor", [("EdgesList", "{%s}" % str(pids)[1:-1]), ("NNodesByEdge", 50)])
+	geoFile.field(2, "Threshold", [("DistMax", 50000), ("DistMin", 500), ("IField", 1), ("LcMin", 5000), ("LcMax", 50000)])
 	geoFile.write("Background Field = 2;\n")
 	geoFile.write("// Dont extent the elements sizes from the boundary inside the domain\n")
 	geoFile.write("Mesh.CharacteristicLengthExtendFromBoundary = 0;\n")
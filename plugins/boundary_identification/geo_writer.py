@@ -0,0 +1,129 @@
+
+##########################################################################
+#
+#  QGIS-meshing plugins.
+#
+#  Copyright (C) 2012-2013 Imperial College London and others.
+#
+#  Please see the AUTHORS file in the main source directory for a
+#  full list of copyright holders.
+#
+#  Dr Adam S. Candy, adam.candy@imperial.ac.uk
+#  Applied Modelling and Computation Group
+#  Department of Earth Science and Engineering
+#  Imperial College London
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation,
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+#  USA
+#
+##########################################################################
+
+"""
+This module writes the entities of a geo file, the copy of the mesh_surface geo_writer
+used by export_plane and pr2sph. It keeps only the entities these write. The points and
+lines are given as arrays and formatted in batches into a buffer, which is only written
+out once it is larger than the flush size.
+"""
+
+import numpy as np
+
+class GeoWriter:
+
+	"""
+	@param stream     : file like object the text is written to
+	@param flush_size : number of characters buffered before they are written
+	@param batch_size : number of points or lines formatted at once
+	"""
+	def __init__( self, stream, flush_size = 1 << 20, batch_size = 1 << 14 ):
+		self.stream = stream
+		self.flush_size = flush_size
+		self.batch_size = batch_size
+		self.buffer = []
+		self.buffered = 0
+
+	"""
+	Buffers text which is already formatted, so the writer can be used in place of a file.
+	"""
+	def write( self, text ):
+		self.buffer.append(text)
+		self.buffered += len(text)
+		if self.buffered >= self.flush_size:
+			self.flush()
+
+	"""
+	Writes a point for every row of coords.
+	@param ids      : the point ids
+	@param coords   : sequence of (x, y) coordinates, any further columns are ignored
+	@param template : format of a single point, given the id, x and y
+	"""
+	def points( self, ids, coords, template ):
+		if len(ids) == 0:
+			return
+		coords = np.asarray(coords, dtype = float).reshape(len(ids), -1)
+		self.__write_rows(template, [np.asarray(ids, dtype = int), coords[:,0], coords[:,1]])
+
+	"""
+	Writes a line or bspline between every pair of points.
+	@param ids         : the line ids
+	@param point_ids   : sequence of (start, end) point ids
+	@param line_string : either Line or BSpline
+	"""
+	def lines( self, ids, point_ids, line_string = "Line" ):
+		if len(ids) == 0:
+			return
+		point_ids = np.asarray(point_ids, dtype = int).reshape(len(ids), 2)
+		self.__write_rows(line_string + "(%i) = {%i, %i};\n", [np.asarray(ids, dtype = int), point_ids[:,0], point_ids[:,1]])
+
+	def line_loop( self, loop_id, line_ids ):
+		self.write("Line Loop(%i) = {%s};\n" % (loop_id, str(list(line_ids))[1:-1]))
+
+	"""
+	@param entity : the type of the physical group, e.g. Line or Surface
+	"""
+	def physical( self, entity, physical_id, ids ):
+		self.write("Physical %s(%i) = {%s};\n" % (entity, physical_id, str(list(ids))[1:-1]))
+
+	"""
+	@param options : list of (option, value) pairs, the values are written as they are given
+	"""
+	def field( self, field_id, field_type, options = [] ):
+		self.write("Field[%i] = %s;\n" % (field_id, field_type))
+		for option, value in options:
+			self.write("Field[%i].%s = %s;\n" % (field_id, option, value))
+
+	"""
+	The rows are formatted batch_size at a time by repeating the template over the
+	interleaved columns, so there is a single format per batch rather than one per
+	entity. Each column keeps its own type, so the ids stay integers.
+	"""
+	def __write_rows( self, template, columns ):
+		for start in range(0, len(columns[0]), self.batch_size):
+			batch = [column[start:start + self.batch_size].tolist() for column in columns]
+			values = [None] * (len(batch[0]) * len(batch))
+			for k in range(len(batch)):
+				values[k::len(batch)] = batch[k]
+			self.write((template * len(batch[0])) % tuple(values))
+
+	def flush( self ):
+		if not self.buffer:
+			return
+		chunk = "".join(self.buffer)
+		self.buffer = []
+		self.buffered = 0
+		self.stream.write(chunk)
+
+	def close( self ):
+		self.flush()
+		self.stream.close()
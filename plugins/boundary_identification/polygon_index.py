@@ -0,0 +1,82 @@
+
+##########################################################################
+#
+#  QGIS-meshing plugins.
+#
+#  Copyright (C) 2012-2013 Imperial College London and others.
+#
+#  Please see the AUTHORS file in the main source directory for a
+#  full list of copyright holders.
+#
+#  Dr Adam S. Candy, adam.candy@imperial.ac.uk
+#  Applied Modelling and Computation Group
+#  Department of Earth Science and Engineering
+#  Imperial College London
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation,
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+#  USA
+#
+##########################################################################
+
+
+"""
+This module finds which of the boundary id polygons a boundary line intersects. The
+polygons are put in a bounding box tree (the shapely STRtree) once and wrapped as
+prepared geometries, so each line is only tested against the polygons whose bounding
+box it overlaps. Older versions of shapely have no STRtree, every polygon is then a
+candidate as it used to be.
+"""
+
+from shapely.prepared import prep
+try:
+	from shapely.strtree import STRtree
+except ImportError:
+	STRtree = None
+
+class PolygonIndex:
+
+	"""
+	@param polygons : list of shapely polygons, later polygons taking precedence
+	"""
+	def __init__( self, polygons ):
+		self.polygons = list(polygons)
+		self.prepared = [prep(polygon) for polygon in self.polygons]
+		self.tree = None
+		if STRtree is not None and self.polygons:
+			self.tree = STRtree(self.polygons)
+			#older trees give back the polygons rather than their positions
+			self.positions = dict((id(polygon), n) for n, polygon in enumerate(self.polygons))
+
+	def __len__( self ):
+		return len(self.polygons)
+
+	"""
+	@return : the positions of the polygons whose bounding box overlaps that of the
+	          geometry, last first
+	"""
+	def candidates( self, geometry ):
+		if self.tree is None:
+			return range(len(self.polygons) - 1, -1, -1)
+		found = self.tree.query(geometry)
+		return sorted([self.positions.get(id(polygon), polygon) for polygon in found], reverse = True)
+
+	"""
+	@return : the position of the last polygon which intersects the geometry, or -1
+	"""
+	def last_intersecting( self, geometry ):
+		for n in self.candidates(geometry):
+			if self.prepared[n].intersects(geometry):
+				return n
+		return -1
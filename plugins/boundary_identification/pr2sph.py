@@ -33,6 +33,7 @@ import sys
 
 import shapefile
 import math
+from geo_writer import GeoWriter
 
  
 #This script projects a shapefile to a sphere. It projects each points to the sphere and then connects the lines using curved lines (so that they won't intersect the sphere.
@@ -50,7 +51,7 @@ def same_point(x1,y1,x2,y2):
 def export(shp, geo):
    shpFile = shp 
    lookupTable = []
-   geoFile =  open(geo,"w")
+   geoFile =  GeoWriter(open(geo,"w"))
    
    # Extracting the shapes and the records.
    
@@ -99,9 +100,11 @@ def export(shp, geo):
    # The duplicate points are removed. It's important for this to be done after the actual projection, otherwise there will be overlaping points in GMsh.
 
    for i in range(len(shapes)):
-     for j in range(len(shapes[i].points)-1):
-       while j < len(shapes[i].points)-1 and same_point(shapes[i].points[j][0], shapes[i].points[j][1], shapes[i].points[j+1][0], shapes[i].points[j+1][1]):
-         trash = shapes[i].points.pop(j+1)
+     points = shapes[i].points[:1]
+     for p in shapes[i].points[1:]:
+       if not same_point(points[-1][0], points[-1][1], p[0], p[1]):
+         points.append(p)
+     shapes[i].points = points
      trash = shapes[i].points.pop()
    i = 0
  
@@ -115,13 +118,12 @@ def export(shp, geo):
        i+=1 
 
 
-   # This for-loop extracts all the points, one by one, and writes them as it goes along
+   # This for-loop writes the points of each shape in one go
 
    for i in range(len(shapes)):
      shape = shapes[i]
-     for coord in shape.points:
-       geoFile.write("Point(%d) = {%f, %f, zCoord};\n" %(pId, coord[0], coord[1]))
-       pId+=1
+     geoFile.points(range(pId, pId + len(shape.points)), shape.points, "Point(%d) = {%f, %f, zCoord};\n")
+     pId += len(shape.points)
 
    # Resent the point and line ids so that we can begin to write the lines:
 
@@ -139,15 +141,15 @@ def export(shp, geo):
      lLoop = "Line Loop(" + str(lLoopId) + ") = {"
      while(i<len(shapes) and polyId == records[i][1]):
        shape = shapes[i]
-       for j in range(len(shape.points)):
-         if j==len(shape.points)-1 and (i+1>=len(shapes) or polyId!=records[i+1][1]):
-           geoFile.write("BSpline(%d) = {%d, %d};\n" %(lId ,pId, init))
-         else:
-           geoFile.write("BSpline(%d) = {%d, %d};\n" %(lId, pId, pId+1))
-         phLine.append((int(records[i][0]),lId))
-         lookupTable.append(lLoopId)
-         lId+=1
-         pId+=1
+       n = len(shape.points)
+       ends = range(pId + 1, pId + n + 1)
+       if i+1>=len(shapes) or polyId!=records[i+1][1]:
+         ends[-1] = init
+       geoFile.lines(range(lId, lId + n), zip(range(pId, pId + n), ends), "BSpline")
+       phLine += [(int(records[i][0]),l) for l in range(lId, lId + n)]
+       lookupTable += [lLoopId] * n
+       lId+=n
+       pId+=n
        i+=1
      lLoop+=str(init) + " : " + str(pId-1) + "};\n"
      geoFile.write(lLoop)
@@ -76,6 +76,41 @@ class _baseCommands( object ):
             BN for BSplines with compound lines disabled
             BY for BSplines with compound lines enabled
       --mval    :sets a math eval field
+      --ranges  :writes consecutive ids in the geofile as gmsh ranges a:b
+      --stats   :writes the time, size and peak memory of each step of
+            writing the geofile to <geofile>.stats.json
+      --snap    :merges points closer than the given tolerance, in the units of
+            the domain or in metres when followed by m, e.g. 50m
+      --simplify  :simplifies the boundaries keeping the points where the id
+            changes, give the method and the tolerance as for --snap:
+            DP for Douglas-Peucker, e.g. --simplify DP 500m
+            VW for Visvalingam-Whyatt
+      --idraster  :assigns the boundary ids with a lookup grid of the id polygons
+            with cells of the given size, in the units of the domain or in metres
+            when followed by m, e.g. --idraster 1000m
+      --batch   :assigns the boundary ids with arrays rather than a line at
+            a time, faster for id polygons of few edges
+      --jobs    :assigns the boundary ids in the given number of processes
+      --cache   :keeps the domain and its ids in a cache in
+            ~/.cache/mesh_surface, or $XDG_CACHE_HOME/mesh_surface, and
+            reads them back when the shapefiles and settings are the same
+      --decimate  :removes boundary points closer together than the given
+            fraction of the metric mesh size, e.g. --decimate 0.5,
+            give the metric first
+      --region  :only reads the shapes of the domain and id layer which
+            overlap the box xmin ymin xmax ymax, in the units of the
+            domain shapefile, e.g. --region -12 48 4 62
+      --structured  :writes the metric as a regular grid for a gmsh Structured
+            field instead of PostView points, give it before the metric
+      --bgmesh  :writes the metric as a binary gmsh background mesh with
+            the values as node data instead of PostView points, give
+            it before the metric
+      --quads   :writes the metric as PostView quadrangles of the grid,
+            which gmsh does not triangulate, give it before the metric
+      --coarsen :coarsens the metric grid before it is written, keeping the
+            smallest value of the points merged, give the factor or auto
+            to choose it from the smallest mesh size, e.g. --coarsen 4,
+            give it before the metric
     -e      :Shows all errors found after command.
     '''
 
@@ -96,6 +131,16 @@ class Modular_meshing ( define_id.DefineDomain, _baseCommands, MeshOp ):
   BSpline = True
   Compound = False
   mEval = None
+  useRanges = False
+  geoStats = False
+  snapTolerance = None
+  simplifyTolerance = None
+  metricDecimation = None
+  rasterResolution = None
+  batchClassification = False
+  jobs = 1
+  useCache = False
+  regionOfInterest = None
   errorHide = True
 
   commands = {
@@ -117,6 +162,20 @@ class Modular_meshing ( define_id.DefineDomain, _baseCommands, MeshOp ):
   '-l':'self.set_lineType()',
   '--line':'self.set_lineType()',
   '--mval':'self.set_mevalcall()',
+  '--ranges':'self.set_ranges()',
+  '--stats':'self.set_stats()',
+  '--snap':'self.set_snap()',
+  '--simplify':'self.set_simplify()',
+  '--decimate':'self.set_decimation()',
+  '--idraster':'self.set_id_raster()',
+  '--batch':'self.set_batch()',
+  '--jobs':'self.set_jobs()',
+  '--cache':'self.set_cache()',
+  '--region':'self.set_region()',
+  '--structured':'self.set_structured()',
+  '--bgmesh':'self.set_bgmesh()',
+  '--quads':'self.set_quads()',
+  '--coarsen':'self.set_coarsening()',
   '-e':'self.error_explicit()'
   }
 
@@ -174,7 +233,7 @@ class Modular_meshing ( define_id.DefineDomain, _baseCommands, MeshOp ):
 
     if self.domainShapefileLayerFileName != None:
       self.define_bounds(self.isIdLayer)
-      self.data = [self.domainData.regionIDs,self.domainData.shapes,self.boundaryIDList,self.domainData.points]
+      self.data = self.domainGeometry
       if self.geofilepath == None:
         self.geofilepath = '%s_idBoundary.geo' % self.domainShapefileLayerFileName[:-4]
       self.export_geo()
@@ -252,7 +311,7 @@ class Modular_meshing ( define_id.DefineDomain, _baseCommands, MeshOp ):
   def _usage( self ):
     _baseCommands._usage(self)
   def export_geo( self ):
-    export_geo.write_geo_file(self.geofilepath,self.data,self.Compound,self.BSpline)
+    export_geo.write_geo_file(self.geofilepath,self.data,self.Compound,self.BSpline,use_ranges = self.useRanges, write_stats = self.geoStats)
   def define_bounds( self, isIdLayer ):
     define_id.DefineDomain.define_bounds(self,isIdLayer)
   def set_defid( self ):
@@ -265,6 +324,36 @@ class Modular_meshing ( define_id.DefineDomain, _baseCommands, MeshOp ):
     MeshOp.gradeToNCFlat(self)
   def set_mevalcall( self ):
     self.mEval = int(self.sarg.pop(0))
+  def set_ranges( self ):
+    self.useRanges = True
+  def set_stats( self ):
+    self.geoStats = True
+  def set_snap( self ):
+    self.snapTolerance = self.sarg.pop(0)
+  def set_simplify( self ):
+    self.simplifyMethod = self.sarg.pop(0)
+    self.simplifyTolerance = self.sarg.pop(0)
+  def set_decimation( self ):
+    self.metricDecimation = float(self.sarg.pop(0))
+  def set_id_raster( self ):
+    self.rasterResolution = self.sarg.pop(0)
+  def set_batch( self ):
+    self.batchClassification = True
+  def set_jobs( self ):
+    self.jobs = int(self.sarg.pop(0))
+  def set_cache( self ):
+    self.useCache = True
+  def set_region( self ):
+    self.regionOfInterest = tuple(float(self.sarg.pop(0)) for i in range(4))
+  def set_structured( self ):
+    self.postype = 'STRUCTURED'
+  def set_bgmesh( self ):
+    self.postype = 'MSH'
+  def set_quads( self ):
+    self.postype = 'SCALARQUADS'
+  def set_coarsening( self ):
+    factor = self.sarg.pop(0)
+    self.posCoarsening = factor if factor == 'auto' else int(factor)
   def write_meval( self ):
     geoFile = open(str(self.geofilepath), 'a')
     geoFile.write('\n//Code added by Mesh NetCDF to create uniform mesh.\n')
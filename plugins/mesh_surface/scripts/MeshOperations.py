@@ -47,17 +47,38 @@ class MeshOp( converter ):
 	"""
 	Merge the PostView file created by writePosFile in PreMeshingFunctions.py. The PostView file is a set of Scalar 
 	Points and therefore needs to be triangulated. As each point is a mesh-size metric it can be used as the background 
-	field.
+	field. Written as Scalar Quadrangles it already covers the domain, so it is not triangulated. With the STRUCTURED
+	postype the metric was written as a regular grid instead, which gmsh reads as a Structured field and samples
+	directly, with no triangulation, and with the MSH postype as a binary mesh of the grid whose node data is used
+	as the PostView.
 	"""
 	def gradeToNCFlat(self):
 
 		f = open(str(self.geoFileName), 'a')
 
-		f.write('\n//Code added by Mesh Surface to merge the created PostView file and use it as mesh-size metric.\n')
-		f.write('Merge "%s";\n' % str(self.postviewFileName))
-		f.write('Field[1] = PostView;\n')
-		f.write('Field[1].IView = 1;\n')
-		f.write('Plugin(Triangulate).Run;\n')
+		if self.postype == 'STRUCTURED':
+			f.write('\n//Code added by Mesh Surface to use the created grid file as mesh-size metric.\n')
+			f.write('Field[1] = Structured;\n')
+			f.write('Field[1].FileName = "%s";\n' % self.structuredFileName())
+			f.write('Field[1].TextFormat = 0;\n')
+		elif self.postype == 'SCALARQUADS':
+			#the quadrangles of the PostView file already cover the domain, so it is not triangulated
+			f.write('\n//Code added by Mesh Surface to merge the created PostView file and use it as mesh-size metric.\n')
+			f.write('Merge "%s";\n' % str(self.postviewFileName))
+			f.write('Field[1] = PostView;\n')
+			f.write('Field[1].IView = 0;\n')
+		elif self.postype == 'MSH':
+			#the node data of the background mesh is the first view, already on elements
+			f.write('\n//Code added by Mesh Surface to merge the created background mesh and use it as mesh-size metric.\n')
+			f.write('Merge "%s";\n' % self.mshFileName())
+			f.write('Field[1] = PostView;\n')
+			f.write('Field[1].IView = 0;\n')
+		else:
+			f.write('\n//Code added by Mesh Surface to merge the created PostView file and use it as mesh-size metric.\n')
+			f.write('Merge "%s";\n' % str(self.postviewFileName))
+			f.write('Field[1] = PostView;\n')
+			f.write('Field[1].IView = 1;\n')
+			f.write('Plugin(Triangulate).Run;\n')
 		f.write('Background Field = 1;\n')
 		f.write('Mesh.CharacteristicLengthExtendFromBoundary = 0;\n')
                 f.write('Mesh.CharacteristicLengthFromPoints = 0;\n')
@@ -156,7 +177,12 @@ class MeshOp( converter ):
 		print 'Geo: ' + str(self.geoFileName) 
 		print 'Mesh: ' + str(self.meshFile)
 		if self.dlg.ui.grpNCDF.isChecked():
-			print "PostView: " + str(self.postviewFileName)
+			if self.postype == 'STRUCTURED':
+				print "Structured Field: " + str(self.structuredFileName())
+			elif self.postype == 'MSH':
+				print "Background Mesh: " + str(self.mshFileName())
+			else:
+				print "PostView: " + str(self.postviewFileName)
 
 	def openGeoFile(self):
 		osString = 'gmsh ' + "\"" + str(self.geoFileName) + "\" &"
@@ -43,9 +43,45 @@ import NcTools
 
 R = 6.378E6
 
+# Returns the points kept along the given dimension of values, every factor-th, and the
+#  values there, each the minimum over the cells either side of its point. When the
+#  points do not divide into whole cells the last cell is padded with the values at the
+#  edge, so its minimum is over the points it has, and a point is added a whole cell on,
+#  past the end of the grid, so the spacing stays uniform.
+def _min_pool( axis, values, factor, dim ):
+  if axis.size < 2:
+    return axis, values
+  nodes = arange(0, axis.size, factor)
+  if nodes[-1] == axis.size - 1:
+    starts = nodes[:-1]
+    coarse = axis[nodes]
+  else:
+    starts = nodes
+    step = (axis[-1] - axis[0]) / (axis.size - 1)
+    coarse = append(axis[nodes], axis[nodes[-1]] + factor * step)
+  ends = append(starts[1:], axis.size - 1)
+  # fmin so that points with no value are only kept where a whole cell has none
+  cells = fmin(fmin.reduceat(values, starts, axis = dim), take(values, ends, axis = dim))
+  before = concatenate((take(cells, [0], axis = dim), cells), axis = dim)
+  after = concatenate((cells, take(cells, [-1], axis = dim)), axis = dim)
+  return coarse, fmin(before, after)
+
 class converter( NcTools.NcReader): #appears to be writing pos files correctly
 
+  #SCALARPOINTS or SCALARQUADS for a PostView file, STRUCTURED for the input of a gmsh
+  #Structured field, see write_structured, or MSH for a binary background mesh, see write_msh
   postype = 'SCALARPOINTS'
+  #significant digits of the coordinates and values in the PostView file
+  posPrecision = 12
+  #number of points formatted at once by _writeLines
+  posChunkSize = 1 << 14
+  #prints the arrays read from the NetCDF before they are written
+  verbose = False
+  #None to write the grid as it is read, 'auto' to coarsen it by a factor chosen from the
+  #smallest mesh size, or the factor itself, see coarsen_grid
+  posCoarsening = None
+  #grid points kept across the smallest mesh size when the factor is chosen with 'auto'
+  posPointsPerEdge = 2
 
   def wholeDirect( self, direc, spherical ):
     posTime = datetime.datetime.now()
@@ -71,11 +107,22 @@ class converter( NcTools.NcReader): #appears to be writing pos files correctly
     self.phi = self.phi/l
 
   def _writeFunc( self ):#alter to primerily call quad
+    if self.postype == 'STRUCTURED':
+      if self.write_structured():
+        return
+      print "Warning:  The metric is not on a regular grid, it is written as PostView points."
+      self.postype = 'SCALARPOINTS'
+    elif self.postype == 'MSH':
+      if self.write_msh():
+        return
+      print "Warning:  The metric is not on a grid, it is written as PostView points."
+      self.postype = 'SCALARPOINTS'
     f = open(str(self.postviewFileName),'w')
     f.write("""View "background_edgelength" {\n""")
-    print 'ASC', self.x0.flatten()
-    print 'ASC', self.x1.flatten()
-    print 'ASC', self.phi.flatten()
+    if self.verbose:
+      print 'ASC', self.x0.flatten()
+      print 'ASC', self.x1.flatten()
+      print 'ASC', self.phi.flatten()
     if self.postype == 'SCALARPOINTS':
       self._writeLines(f,self.x0.flatten(),self.x1.flatten(),self.phi.flatten())
     elif self.postype == 'SCALARQUADS':
@@ -83,36 +130,169 @@ class converter( NcTools.NcReader): #appears to be writing pos files correctly
     f.write('};')
     f.close()
     
-  _writeLines = vectorize(lambda f, x, y, z: f.write("SP("+str(x)+","+str(y)+",0){"+str(z)+"};\n"))
+  # The points are written posChunkSize at a time, the template being repeated over
+  #  the chunk so each chunk is a single format and a single write.
+  def _writeLines( self, f, x, y, z ):
+    template = "SP(%%.%ig,%%.%ig,0){%%.%ig};\n" % ((self.posPrecision,)*3)
+    for start in range(0, len(z), self.posChunkSize):
+      end = start + self.posChunkSize
+      rows = column_stack((x[start:end], y[start:end], z[start:end])).astype(float64)
+      f.write((template * len(rows)) % tuple(rows.ravel().tolist()))
   
+  def structuredFileName( self ):
+    return '%s.dat' % os.path.splitext(str(self.postviewFileName))[0]
+
+  def mshFileName( self ):
+    return '%s.msh' % os.path.splitext(str(self.postviewFileName))[0]
+
+  # Returns the x and y axes of the grid the points lie on and the values as an array
+  #  indexed by x then y, or None when the points do not fill a grid.
+  def _grid( self ):
+    x0 = asarray(self.x0, dtype = float64).ravel()
+    x1 = asarray(self.x1, dtype = float64).ravel()
+    x = unique(x0); y = unique(x1)
+    if x.size * y.size != x0.size or asarray(self.phi).size != x0.size:
+      return None
+    i = searchsorted(x, x0); j = searchsorted(y, x1)
+    if bincount(i * y.size + j, minlength = x0.size).max() != 1:
+      return None
+    values = empty((x.size, y.size))
+    values[i, j] = asarray(self.phi, dtype = float64).ravel()
+    return x, y, values
+
+  # The metric is written in the binary format read by the gmsh Structured field: the
+  #  origin, the spacing and the number of points of the grid as 3 doubles, 3 doubles and
+  #  3 ints, then the values with x varying slowest and z fastest. The grid is given two
+  #  layers in z around z = 0 so the field interpolates only in x and y. Returns False,
+  #  writing nothing, when the points are not a regular grid.
+  def write_structured( self ):
+    grid = self._grid()
+    if grid is None:
+      return False
+    x, y, values = grid
+    spacing = []
+    for axis in (x, y):
+      step = (axis[-1] - axis[0]) / max(axis.size - 1, 1) or 1.0
+      # the coordinates are often single precision, so small errors in the steps are allowed
+      if axis.size > 1 and abs(diff(axis) - step).max() > 1e-3 * step:
+        return False
+      spacing.append(step)
+    f = open(self.structuredFileName(), 'wb')
+    array([x[0], y[0], -0.5, spacing[0], spacing[1], 1.0], dtype = float64).tofile(f)
+    array([x.size, y.size, 2], dtype = intc).tofile(f)
+    chunk = max(self.posChunkSize // y.size, 1)
+    for start in range(0, x.size, chunk):
+      repeat(values[start:start + chunk, :, newaxis], 2, axis = 2).tofile(f)
+    f.close()
+    return True
+
+  # The metric is written as a binary gmsh 2.2 mesh of the grid, a node at each point
+  #  numbered along y then x and a quadrangle for each cell, with the values as
+  #  $NodeData, which gmsh reads as a view for a PostView field. The grid need not be
+  #  regular. Returns False, writing nothing, when the points do not fill a grid.
+  def write_msh( self ):
+    grid = self._grid()
+    if grid is None:
+      return False
+    x, y, values = grid
+    nx, ny = x.size, y.size
+    chunk = max(self.posChunkSize // ny, 1)
+    f = open(self.mshFileName(), 'wb')
+    f.write('$MeshFormat\n2.2 1 8\n')
+    array([1], dtype = intc).tofile(f)
+    f.write('\n$EndMeshFormat\n$Nodes\n%i\n' % (nx * ny))
+    node = dtype([('id', intc), ('xyz', float64, 3)])
+    for start in range(0, nx, chunk):
+      rows = min(chunk, nx - start)
+      nodes = zeros(rows * ny, dtype = node)
+      nodes['id'] = arange(start * ny, (start + rows) * ny) + 1
+      nodes['xyz'][:, 0] = repeat(x[start:start + rows], ny)
+      nodes['xyz'][:, 1] = tile(y, rows)
+      nodes.tofile(f)
+    quads = (nx - 1) * (ny - 1)
+    f.write('\n$EndNodes\n$Elements\n%i\n' % quads)
+    if quads:
+      # a single block of quadrangles (type 3), each with two tags
+      array([3, quads, 2], dtype = intc).tofile(f)
+      for start in range(0, nx - 1, chunk):
+        i = arange(start, min(start + chunk, nx - 1))
+        first = (i[:, newaxis] * ny + arange(ny - 1)).ravel() + 1
+        elements = empty((first.size, 7), dtype = intc)
+        elements[:, 0] = (i[:, newaxis] * (ny - 1) + arange(ny - 1)).ravel() + 1
+        elements[:, 1:3] = 1
+        elements[:, 3] = first
+        elements[:, 4] = first + ny
+        elements[:, 5] = first + ny + 1
+        elements[:, 6] = first + 1
+        elements.tofile(f)
+    f.write('\n$EndElements\n$NodeData\n1\n"background_edgelength"\n1\n0.0\n3\n0\n1\n%i\n' % (nx * ny))
+    value = dtype([('id', intc), ('value', float64)])
+    for start in range(0, nx, chunk):
+      rows = values[start:start + chunk]
+      data = zeros(rows.size, dtype = value)
+      data['id'] = arange(start * ny, start * ny + rows.size) + 1
+      data['value'] = rows.ravel()
+      data.tofile(f)
+    f.write('\n$EndNodeData\n')
+    f.close()
+    return True
+
+  # Each cell of the grid is written as an SQ record of its four corners, anticlockwise,
+  #  and their values, posChunkSize cells at a time as in _writeLines. When the points
+  #  do not fill a grid they are written as SP points instead.
   def write_quadrangle( self, f ):
-    x0 = self.x0[:-1,:-1]; x1 = self.x1[:-1,:-1]
-    x0_s = roll(self.x0,-1,axis=1)[:-1,:-1]; x1_s = roll(self.x1,-1,axis=0)[:-1,:-1]
-    
-    phi01 = self.phi[:-1,:-1]
-    phi0_s1 = roll(self.phi,-1,axis=1)[:-1,:-1]
-    phi0_s1_s = roll(roll(self.phi,-1,axis=0),-1,axis=1)[:-1,:-1]
-    phi01_s = roll(self.phi,-1,axis=0)[:-1,:-1]
-    
-    x0 = x0.flatten(); x1 = x1.flatten()
-    x0_s = x0_s.flatten(); x1_s = x1_s.flatten()
-    phi01 = phi01.flatten(); phi0_s1 = phi0_s1.flatten() 
-    phi0_s1_s = phi0_s1_s.flatten(); phi01_s = phi01_s.flatten()
-    
-    #this is incorrect: not obteining quadrangle verteses
-    r = range(len(x0)-1) # is this correct, where do the rolled doubles end up?
-    
-    map(lambda i:                             \
-    f.write("SQ(" +                           \
-    str(x0[i])+","+str(x1[i])+",0," +         \
-    str(x0_s[i])+","+str(x1[i])+",0," +       \
-    str(x0_s[i])+","+str(x1_s[i])+",0," +     \
-    str(x0[i])+","+str(x1_s[i])+",0){" +      \
-    str(phi01[i])+","+str(phi0_s1[i])+"," +   \
-    str(phi0_s1_s[i])+","+str(phi01_s[i]) +   \
-    "};\n"),                                  \
-    r)
-    
+    grid = self._grid()
+    if grid is None:
+      print "Warning:  The metric is not on a grid, it is written as PostView points."
+      self.postype = 'SCALARPOINTS'
+      self._writeLines(f,self.x0.flatten(),self.x1.flatten(),self.phi.flatten())
+      return
+    x, y, values = grid
+    corner = "%%.%ig,%%.%ig,0" % (self.posPrecision, self.posPrecision)
+    value = "%%.%ig" % self.posPrecision
+    template = "SQ(" + ",".join([corner]*4) + "){" + ",".join([value]*4) + "};\n"
+    cells = y.size - 1
+    chunk = max(self.posChunkSize // max(cells, 1), 1)
+    for start in range(0, x.size - 1, chunk):
+      i = arange(start, min(start + chunk, x.size - 1))
+      x_0 = repeat(x[i], cells); x_1 = repeat(x[i + 1], cells)
+      y_0 = tile(y[:-1], i.size); y_1 = tile(y[1:], i.size)
+      rows = column_stack((x_0, y_0, x_1, y_0, x_1, y_1, x_0, y_1,
+        values[i, :-1].ravel(), values[i + 1, :-1].ravel(), values[i + 1, 1:].ravel(), values[i, 1:].ravel()))
+      f.write((template * len(rows)) % tuple(rows.ravel().tolist()))
+
+  # The grid is cut to every factor-th point along each axis, a point being added past the
+  #  end when the last cell is not whole, see _min_pool, so a regular grid stays regular
+  #  and can still be written as STRUCTURED. Each point kept takes the smallest value of
+  #  the points in the coarse cells around it. The coarse field interpolated over a cell
+  #  is then never above the values read there, so no refinement is lost. The coarse grid
+  #  replaces x0, x1 and phi. Returns the factor used, 1 when the grid is left as it is.
+  # @param factor : the number of points merged along each axis, or 'auto' to choose it
+  #                 so the spacing stays within the smallest mesh size over posPointsPerEdge
+  def coarsen_grid( self, factor = 'auto' ):
+    grid = self._grid()
+    if grid is None:
+      return 1
+    x, y, values = grid
+    if factor == 'auto':
+      factor = self._autoCoarsening(x, y, values)
+    factor = int(factor)
+    if factor <= 1:
+      return 1
+    x, values = _min_pool(x, values, factor, 0)
+    y, values = _min_pool(y, values, factor, 1)
+    self.x0 = outer(ones_like(y), x)
+    self.x1 = outer(y, ones_like(x))
+    self.phi = values.T.copy()
+    return factor
+
+  def _autoCoarsening( self, x, y, values ):
+    sizes = values[isfinite(values) & (values > 0)]
+    steps = [diff(axis).max() for axis in (x, y) if axis.size > 1]
+    if sizes.size == 0 or not steps:
+      return 1
+    return max(int(floor(sizes.min() / (self.posPointsPerEdge * max(steps)))), 1)
+
   def _read_nc( self ):
     NcTools.NcReader._read_nc( self )
   def _read_nc_xyrange( self ):
@@ -130,6 +310,10 @@ class converter( NcTools.NcReader): #appears to be writing pos files correctly
     self._ReadFunc()
     if spherical:
       self._convertSpherical()
+    if self.posCoarsening:
+      factor = self.coarsen_grid(self.posCoarsening)
+      if factor > 1:
+        print "Metric grid coarsened by a factor of %i." % factor
     self._writeFunc()
     print "PostView File Written."
     
@@ -79,6 +79,8 @@ class PreMesh(DefineDomain):
 	'''
 	def runIdDef(self):
 		self.defID = int(str(self.dlg.ui.Default_Id.text()))
+		self.jobs = self.dlg.ui.workersSpinBox.value()
+		self.batchClassification = self.dlg.ui.batchCheckBox.isChecked()
 		self.domainSavePath = '%s_idBoundary' % self.domainShapefileLayerFileName[:-4]
 
 		self.domainText = self.domainShapefileLayerFileName[:-4]
@@ -94,8 +96,7 @@ class PreMesh(DefineDomain):
 		self.define_bounds(self.dlg.ui.grpDefID.isChecked())
 
 		# Write the Geo.
-		data = [self.domainData.regionIDs,self.domainData.shapes,self.boundaryIDList,self.domainData.points]
-		write_geo_file(self.domainSavePath,data, self.dlg.ui.compoundCheckBox.isChecked(), self.dlg.ui.bSplineRadioButton.isChecked())
+		write_geo_file(self.domainSavePath,self.domainGeometry, self.dlg.ui.compoundCheckBox.isChecked(), self.dlg.ui.bSplineRadioButton.isChecked())
 		
 
 	"""
@@ -111,6 +112,10 @@ class PreMesh(DefineDomain):
 		else:
 			self.getNetCDFDropDownOptions()
 		self.postviewFileName = '%s_meshing_posfile.pos' % self.singleNetCDFLayerFileName[:-3]
+		if self.dlg.ui.structuredFieldCheckBox.isChecked():
+			self.postype = 'STRUCTURED'
+		else:
+			self.postype = 'SCALARPOINTS'
 		if self.dlg.ui.chooseGeoFileRadioButton.isChecked():
 			self.geoFileName = self.dlg.ui.chooseGeoFileLineEdit.text()
 		else:
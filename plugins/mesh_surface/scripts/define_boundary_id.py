@@ -36,52 +36,132 @@
 
 # Second function, connectLines joins sequential lines if they share the same ID number.
 
+import os
+import multiprocessing
 import shapefile
 from shapely.geometry import *
+import numpy as np
+from domain_geometry import DomainGeometry, BoundaryRuns
+from polygon_index import PolygonIndex
 
 
 class assignIDs():
+
+	# When set the lines are classified together with arrays rather than one shapely line at a time,
+	# testing at most chunkSize line and polygon edge pairs at once. Every line near a polygon is tested
+	# against all of its edges, so for polygons of many edges the bounding box tree is faster.
+	batchClassification = False
+	chunkSize = 1 << 18
+	# When set the polygons are burnt into a lookup grid of cells of this size, which gives the id
+	# of most lines at once, the lines near the polygon edges being classified as above.
+	rasterResolution = None
+	# The number of processes classifying the lines, each taking a share of the lines by number.
+	jobs = 1
+
 	def assignIDsMethod(self, idShapeFile):
 
 		# Generate a list of Shapely polygons from the coordinates of the boundary-ID polygons.
-		self.boundaryIDList = []		
 		self.idShapeFile = idShapeFile
 		self.IDPolygons = []
 		if idShapeFile:
-			for j in range(len(self.boundaryData.points)):
-				self.IDPolygons.append(Polygon([self.boundaryData.points[j][i] for i in range(len(self.boundaryData.points[j]))]))
-
-		# Break into component lines and see which intersect the boundary polygons.
-		for i in range(len(self.domainData.points)):
-				self.generateIds(i)
+			for polygon in self.boundaryData.geometry.parts():
+				self.IDPolygons.append(Polygon(polygon))
+		self.IDPolygonIndex = PolygonIndex(self.IDPolygons)
+
+		# The ids of the lines of each part are kept as runs of the same id as soon as they are found, so the
+		# ids of all the lines are not held at once.
+		geometry = self.domainData.geometry
+		self.segmentOffsets = geometry.segment_offsets()
+
+		if self.idShapeFile and (self.batchClassification or self.rasterResolution or self.jobs > 1):
+			geometry.boundary_runs = self.classifySegments()
+		else:
+			# Break into component lines and see which intersect the boundary polygons.
+			geometry.boundary_runs = BoundaryRuns.join([self.generateIds(i) for i in range(len(geometry))])
+		self.boundaryIDList = geometry.boundary_runs
 		
 
 	def generateIds(self, part):
-		localIdList = []
-		for j in range(len(self.domainData.points[part]) - 1):
-			if not self.idShapeFile:
-				localIdList.append(self.defID)
-				continue
+		lineCount = self.segmentOffsets[part + 1] - self.segmentOffsets[part]
+		if not self.idShapeFile:
+			# a single run of the default id, or none for a part with no lines
+			runs = int(lineCount > 0)
+			return BoundaryRuns([0, runs], [0] * runs, [lineCount] * runs, [self.defID] * runs)
+		localIdList = np.empty(lineCount, dtype = int)
+		for j in range(lineCount):
 			self.methodIDPolygons(localIdList, part, j)
-		self.boundaryIDList.append(localIdList)
+		return BoundaryRuns.from_ids(localIdList, [0, lineCount])
+
+
+	def classifySegments(self):
+		geometry = self.domainData.geometry
+		starts = geometry.segments()
+		state = (self.IDPolygonIndex, geometry.coords[starts], geometry.coords[starts + 1], self.batchClassification, self.rasterResolution, self.chunkSize)
+		# The workers are forked so they take over the polygons and the lines without copying, where there is no fork
+		# the lines are classified here.
+		if self.jobs > 1 and hasattr(os, 'fork') and len(starts) > self.jobs:
+			polygons = self.classifyInWorkers(state)
+		else:
+			polygons = _segmentPolygons(state, 0, len(starts))
+		# The ids of the polygons, lined up as in methodIDPolygons, with the default id last for the lines outside them all.
+		records = self.boundaryData.records[len(self.boundaryData.records) - len(self.IDPolygons):]
+		ids = np.array([record[0] for record in records] + [self.defID])
+		return BoundaryRuns.from_ids(ids[polygons], self.segmentOffsets)
+
+
+	def classifyInWorkers(self, state):
+		global _workerState
+		if self.rasterResolution and not all([polygon.is_empty for polygon in self.IDPolygons]):
+			self.IDPolygonIndex.burn(self.rasterResolution)
+		# A few ranges of lines for each worker, of the same number of lines, so a worker given lines near many
+		# polygons does not hold up the rest. The ranges come back in order.
+		bounds = np.linspace(0, len(state[1]), 4 * self.jobs + 1).astype(int)
+		_workerState = state
+		pool = multiprocessing.Pool(self.jobs)
+		try:
+			polygons = pool.map(_workerPolygons, zip(bounds[:-1], bounds[1:]))
+		finally:
+			pool.close()
+			pool.join()
+			_workerState = None
+		return np.concatenate(polygons)
 
 
 	def methodIDPolygons(self, localIdList, part, j):
 
 		# Want to make a shapely line from sequential points.
-		line = LineString([tuple(self.domainData.points[part][j]), tuple(self.domainData.points[part][j + 1])])
-		done = False
-		for n in range(len(self.IDPolygons)):
-			if line.intersects(self.IDPolygons[-(n+1)]):
-				localIdList.append(self.boundaryData.records[-(n+1)][0])
-				done = True
-				break
-		if not done:
-			localIdList.append(self.defID)
-
-
-
+		points = self.domainData.geometry.part(part)
+		line = LineString([tuple(points[j]), tuple(points[j + 1])])
+		n = self.IDPolygonIndex.last_intersecting(line)
+		if n >= 0:
+			# the polygons line up with the last records, shapes of several parts giving no polygon
+			localIdList[j] = self.boundaryData.records[n - len(self.IDPolygons)][0]
+		else:
+			localIdList[j] = self.defID
+
+
+# The polygon index, the points of the lines and the settings of assignIDs.classifySegments, set before the workers are forked.
+_workerState = None
+
+# The position of the last polygon each of the lines from first to last intersects, or -1.
+def _segmentPolygons(state, first, last):
+	index, starts, ends, batch, resolution, chunkSize = state
+	starts = starts[first:last]
+	ends = ends[first:last]
+	if resolution:
+		return index.classify_segments_raster(starts, ends, resolution, chunkSize)
+	if not batch:
+		return np.array([index.last_intersecting(LineString([tuple(start), tuple(end)])) for start, end in zip(starts, ends)], dtype = int)
+	return index.classify_segments(starts, ends, chunkSize)
+
+def _workerPolygons(bounds):
+	return _segmentPolygons(_workerState, bounds[0], bounds[1])
+
+
+# The lines of a DomainGeometry are the consecutive points of its parts so it is returned as it is.
 def connectLines (bounds):
+	if isinstance(bounds, DomainGeometry):
+		return bounds
 	
 	lineLists = []
 	for points in bounds:
@@ -32,20 +32,157 @@ from input_output_for_id import ShapeData
 ##########################################################################
 
 from define_boundary_id import *
+from vertex_snapping import snap_geometry, DEGREES_PER_METRE
+from simplify_boundaries import simplify_geometry, decimate_geometry, sample_grid
+from geometry_cache import GeometryCache, cache_key, array_hash
+import os
+import numpy as np
+
+"""
+A domain is geographic when its .prj is a GEOGCS or, without a .prj, when its bounding
+box lies within longitude and latitude.
+"""
+def _is_geographic(shapefileName):
+	prj = os.path.splitext(str(shapefileName))[0] + '.prj'
+	if os.path.exists(prj):
+		return open(prj).read().lstrip().upper().startswith('GEOGCS')
+	with shapefile.Reader(str(shapefileName)) as reader:
+		bbox = reader.bbox
+	return -180 <= bbox[0] and bbox[2] <= 180 and -90 <= bbox[1] and bbox[3] <= 90
+
+"""
+A domain in a projection has its coordinates in metres when its .prj gives metres.
+"""
+def _is_in_metres(shapefileName):
+	prj = os.path.splitext(str(shapefileName))[0] + '.prj'
+	if not os.path.exists(prj):
+		return False
+	text = open(prj).read().upper()
+	return 'UNIT["METER"' in text or 'UNIT["METRE"' in text
+
+"""
+This method gives a tolerance in the units of the domain. A tolerance given as text, as
+on the command line, is in the units of the domain or, when it ends with m, in metres,
+which are converted to degrees for a geographic domain and kept for a domain projected
+in metres. Any other tolerance is returned as it is.
+@param tolerance      : the tolerance, None when it is not set
+@param shapefileName  : the domain shapefile
+"""
+def domain_tolerance(tolerance, shapefileName):
+	if not isinstance(tolerance, basestring):
+		return tolerance
+	if not tolerance.endswith('m'):
+		return float(tolerance)
+	if _is_geographic(shapefileName):
+		return float(tolerance[:-1])*DEGREES_PER_METRE
+	if _is_in_metres(shapefileName):
+		return float(tolerance[:-1])
+	raise AssertionError("Error: The tolerance %s is in metres but the units of %s are not known, give it in the units of the domain." % (tolerance, shapefileName))
 
 class DefineDomain(assignIDs):
+
+	#points of the domain closer than this are merged before the ids are assigned
+	snapTolerance = None
+	#the boundaries are simplified with DP (Douglas-Peucker) or VW (Visvalingam-Whyatt)
+	#once the ids are assigned, keeping the points where the id changes
+	simplifyMethod = "DP"
+	simplifyTolerance = None
+	#points closer together than this fraction of the mesh size metric (x0, x1 and phi
+	#read by NcReader) are removed once the ids are assigned
+	metricDecimation = None
+	#the domains are kept in .npz files, in cacheDirectory or by default in mesh_surface in the
+	#user's cache directory, and read back when the shapefiles and settings are the same
+	useCache = False
+	cacheDirectory = None
+	cacheSize = 256 << 20
+	#(xmin, ymin, xmax, ymax) of the region to mesh, only the shapes of the domain whose
+	#bounding boxes overlap it are read, and the id polygons around them, see idRegion
+	regionOfInterest = None
+
 	def define_bounds(self, isIdLayer):   
 		print "Defining ID's..."
+		self.snapTolerance = domain_tolerance(self.snapTolerance, self.domainShapefileLayerFileName)
+		self.simplifyTolerance = domain_tolerance(self.simplifyTolerance, self.domainShapefileLayerFileName)
+		self.rasterResolution = domain_tolerance(self.rasterResolution, self.domainShapefileLayerFileName)
 		
-		self.domainData = ShapeData(self.domainShapefileLayerFileName, self.threshold, True)
+		if self.useCache:
+			cache, key = self.domainCache(isIdLayer)
+			try:
+				geometry = cache.load(key)
+			except (IOError, OSError), e:
+				print "Warning:  The domain could not be read from the cache %s, %s" % (cache.directory, e)
+				geometry = None
+			if geometry is not None:
+				#the shapefile is not read so there is no domainData, nothing after
+				#define_bounds uses it, the domain being given by domainGeometry, see
+				#tests/test_cache_export.py
+				self.domainGeometry = geometry
+				self.boundaryIDList = geometry.boundary_runs
+				print "Read the domain from the cache."
+				print "Done Defining ID's."
+				return
+
+		self.domainData = ShapeData(self.domainShapefileLayerFileName, self.threshold, True, self.regionOfInterest, self.useCache)
+		if self.regionOfInterest is not None and len(self.domainData.geometry) == 0:
+			raise AssertionError("Error: No domain shapes intersect the region %s." % (tuple(self.regionOfInterest),))
+		if self.snapTolerance:
+			self.domainData.geometry, merged = snap_geometry(self.domainData.geometry, self.snapTolerance)
+			print "Snapped %i points" % merged
 		if isIdLayer:
-			self.boundaryData = ShapeData(self.idFilePath, self.threshold, False)
+			self.boundaryData = ShapeData(self.idFilePath, self.threshold, False, self.idRegion(), self.useCache)
 
 		self.assignIDsMethod(isIdLayer)
-		self.domainData.points = connectLines(self.domainData.points)
+		if self.simplifyTolerance:
+			self.domainData.geometry, removed = simplify_geometry(self.domainData.geometry, self.simplifyTolerance, self.simplifyMethod)
+			self.boundaryIDList = self.domainData.geometry.boundary_runs
+			print "Simplified the boundaries, removing %i points" % removed
+		if self.metricDecimation:
+			if getattr(self, 'phi', None) is None:
+				print "Warning:  No mesh size metric has been read, the boundaries are not decimated."
+			else:
+				target = sample_grid(self.x0, self.x1, self.phi, self.domainData.geometry.coords)
+				self.domainData.geometry, removed = decimate_geometry(self.domainData.geometry, target, self.metricDecimation)
+				self.boundaryIDList = self.domainData.geometry.boundary_runs
+				print "Decimated the boundaries to the metric, removing %i points" % removed
+		self.domainGeometry = connectLines(self.domainData.geometry)
+		if self.useCache:
+			try:
+				cache.store(key, self.domainGeometry)
+			except (IOError, OSError), e:
+				print "Warning:  The domain could not be kept in the cache %s, %s" % (cache.directory, e)
 		#self.toTextFile()
 		print "Done Defining ID's."
 
+	"""
+	The domain shapes overlapping the region are read whole, so the id polygons are read
+	over the bounding box of the domain which was read rather than over the region.
+	@return : (xmin, ymin, xmax, ymax) the id layer is read over, or None to read it all
+	"""
+	def idRegion(self):
+		if self.regionOfInterest is None:
+			return None
+		coords = self.domainData.geometry.coords
+		return tuple(coords.min(axis = 0).tolist() + coords.max(axis = 0).tolist())
+
+	"""
+	@return : the cache and the key of the domain with the current shapefiles and settings
+	"""
+	def domainCache(self, isIdLayer):
+		files = [self.domainShapefileLayerFileName]
+		if isIdLayer:
+			files.append(self.idFilePath)
+		settings = [isIdLayer, self.threshold, self.defID, self.snapTolerance, self.simplifyMethod, self.simplifyTolerance]
+		if self.regionOfInterest is not None:
+			settings += [tuple(self.regionOfInterest)]
+		if self.metricDecimation and getattr(self, 'phi', None) is not None:
+			settings += [self.metricDecimation, array_hash(self.x0, self.x1, self.phi)]
+		directory = self.cacheDirectory
+		if directory is None:
+			#the keys hash the contents of the shapefiles, so one cache serves every domain
+			userCache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+			directory = os.path.join(userCache, 'mesh_surface')
+		return GeometryCache(directory, self.cacheSize), cache_key(files, settings)
+
 	def assignIDsMethod(self,ok):
 		assignIDs.assignIDsMethod(self,ok)
 
@@ -56,7 +193,7 @@ class DefineDomain(assignIDs):
 		txt.write('\n\nshapes\n')
 		txt.write(str(self.domainData.shapes))
 		txt.write('\n\nboundaryIDList\n')
-		txt.write(str(self.boundaryIDList))
+		txt.write(str(self.domainGeometry.to_data()[2]))
 		txt.write('\n\ndomainPoints\n')
-		txt.write(str(self.domainData.points))
+		txt.write(str(self.domainGeometry.lines()))
 		txt.close
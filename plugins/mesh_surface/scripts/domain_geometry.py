@@ -0,0 +1,274 @@
+
+##########################################################################
+#
+#  QGIS-meshing plugins.
+#
+#  Copyright (C) 2012-2013 Imperial College London and others.
+#
+#  Please see the AUTHORS file in the main source directory for a
+#  full list of copyright holders.
+#
+#  Dr Adam S. Candy, adam.candy@imperial.ac.uk
+#  Applied Modelling and Computation Group
+#  Department of Earth Science and Engineering
+#  Imperial College London
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation,
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+#  USA
+#
+##########################################################################
+
+"""
+This module holds the domain passed from ShapeData through assignIDs to write_geo_file.
+All the points are kept in a single Nx2 array, the parts (the boundary and the islands
+of each shape) and the shapes are given by offset arrays and the lines of a part are its
+consecutive points, so no line is stored.
+
+The boundary ids of the lines are kept as runs of lines with the same id, so they take
+space for each change of id rather than for each line.
+"""
+
+import numpy as np
+
+class BoundaryRuns(object):
+
+	__slots__ = ('part_offsets', 'starts', 'lengths', 'ids')
+
+	"""
+	@param part_offsets : the first run of each part followed by the number of runs
+	@param starts       : the first line of each run, counted from the first line of its part
+	@param lengths      : the number of lines in each run
+	@param ids          : the physical id of each run
+	"""
+	def __init__(self, part_offsets, starts, lengths, ids):
+		self.part_offsets = np.asarray(part_offsets, dtype = int)
+		self.starts = np.asarray(starts, dtype = int)
+		self.lengths = np.asarray(lengths, dtype = int)
+		self.ids = np.asarray(ids, dtype = int)
+
+	"""
+	This method finds the runs of the ids of the lines, a run ending wherever the id
+	changes or a part ends.
+	@param ids             : the physical id of each line
+	@param segment_offsets : the first line of each part followed by the number of lines
+	"""
+	@classmethod
+	def from_ids(cls, ids, segment_offsets):
+		ids = np.asarray(ids, dtype = int)
+		segment_offsets = np.asarray(segment_offsets, dtype = int)
+		first = np.ones(ids.size, dtype = bool)
+		first[1:] = ids[1:] != ids[:-1]
+		first[segment_offsets[:-1][np.diff(segment_offsets) > 0]] = True
+		run_lines = np.flatnonzero(first)
+		part_of_run = np.searchsorted(segment_offsets, run_lines, side = 'right') - 1
+		return cls(np.searchsorted(run_lines, segment_offsets), run_lines - segment_offsets[part_of_run],
+			np.diff(np.append(run_lines, ids.size)), ids[run_lines])
+
+	def __len__(self):
+		return self.ids.size
+
+	"""
+	@return : the first line of every run, counted from the first line of all the parts
+	"""
+	def first_lines(self):
+		return np.cumsum(self.lengths) - self.lengths
+
+	"""
+	@param lines : the lines, counted over all the parts, or None for every line
+	@return : the physical id of each of the lines
+	"""
+	def line_ids(self, lines = None):
+		if lines is None:
+			return np.repeat(self.ids, self.lengths)
+		return self.ids[np.searchsorted(self.first_lines(), lines, side = 'right') - 1]
+
+	"""
+	This method joins the runs of consecutive parts.
+	@param parts : the runs of each part, each holding a single part
+	"""
+	@classmethod
+	def join(cls, parts):
+		empty = [np.zeros(0, dtype = int)]
+		return cls(np.cumsum([0] + map(len, parts)), np.concatenate(empty + [p.starts for p in parts]),
+			np.concatenate(empty + [p.lengths for p in parts]), np.concatenate(empty + [p.ids for p in parts]))
+
+	"""
+	@return : the starts, lengths and ids of the runs of a part
+	"""
+	def part(self, i):
+		runs = slice(self.part_offsets[i], self.part_offsets[i+1])
+		return self.starts[runs], self.lengths[runs], self.ids[runs]
+
+class DomainGeometry(object):
+
+	__slots__ = ('coords', 'part_offsets', 'shape_offsets', 'region_ids', 'boundary_runs')
+
+	"""
+	@param coords        : Nx2 array of the points of all the parts
+	@param part_offsets  : the first point of each part followed by the number of points
+	@param shape_offsets : the first part of each shape followed by the number of parts
+	@param region_ids    : the region id of each part
+	@param boundary_ids  : the physical id of each line, see segment_offsets, kept as
+	                      boundary_runs. The ids of every line are not kept, they are
+	                      given by boundary_runs.line_ids()
+	"""
+	def __init__(self, coords, part_offsets, shape_offsets, region_ids, boundary_ids = None):
+		self.coords = np.asarray(coords, dtype = np.float64).reshape(-1, 2)
+		self.part_offsets = np.asarray(part_offsets, dtype = int)
+		self.shape_offsets = np.asarray(shape_offsets, dtype = int)
+		self.region_ids = np.asarray(region_ids, dtype = int)
+		self.boundary_runs = None
+		if boundary_ids is not None:
+			self.boundary_runs = BoundaryRuns.from_ids(boundary_ids, self.segment_offsets())
+
+	"""
+	This method builds the geometry from the lists ShapeData used to keep.
+	@param parts      : list of the points of each part
+	@param region_ids : the region id of each part
+	@param shapes     : the first part of each shape
+	"""
+	@classmethod
+	def from_parts(cls, parts, region_ids, shapes):
+		part_offsets = np.cumsum([0] + map(len, parts))
+		coords = np.empty((part_offsets[-1], 2))
+		for i in range(len(parts)):
+			if len(parts[i]) > 0:
+				coords[part_offsets[i]:part_offsets[i+1]] = np.asarray(parts[i], dtype = np.float64)[:,:2]
+		return cls(coords, part_offsets, list(shapes) + [len(parts)], region_ids)
+
+	def __len__(self):
+		return self.part_offsets.size - 1
+
+	def part(self, i):
+		return self.coords[self.part_offsets[i]:self.part_offsets[i+1]]
+
+	def parts(self):
+		for i in range(len(self)):
+			yield self.part(i)
+
+	"""
+	@return : the first line of each part followed by the number of lines, a part
+	          of n points having n - 1 lines
+	"""
+	def segment_offsets(self):
+		return np.concatenate(([0], np.cumsum(np.maximum(np.diff(self.part_offsets) - 1, 0))))
+
+	"""
+	@return : the index in coords of the first point of every line, the second point
+	          being the next one
+	"""
+	def segments(self):
+		first = np.ones(self.coords.shape[0], dtype = bool)
+		lengths = np.diff(self.part_offsets)
+		first[self.part_offsets[1:][lengths > 0] - 1] = False
+		return np.flatnonzero(first)
+
+	"""
+	This method gives the lines of each part as the lists of (point1, point2) that
+	connectLines used to build, for code which has not been moved to the arrays.
+	"""
+	def lines(self):
+		lineLists = []
+		for points in self.parts():
+			points = points.tolist()
+			lineLists.append(zip(points[:-1], points[1:]))
+		return lineLists
+
+	"""
+	@return : the [region ids, shapes, boundary ids, lines] list write_geo_file used
+	          to be given
+	"""
+	def to_data(self):
+		offsets = self.segment_offsets()
+		line_ids = self.boundary_runs.line_ids()
+		boundary_ids = [line_ids[offsets[i]:offsets[i+1]].tolist() for i in range(len(self))]
+		return [self.region_ids.tolist(), self.shape_offsets[:-1].tolist(), boundary_ids, self.lines()]
+
+	"""
+	This method removes points from the parts, the line ending at a removed point being
+	removed with it so the line starting there keeps its boundary id. The first point
+	of a part should be kept.
+	@param keep       : mask of the points which are kept
+	@param min_points : parts left with fewer points are removed along with their lines,
+	                    and shapes left with no parts are removed
+	@return : the new geometry
+	"""
+	def keep_points(self, keep, min_points = 1):
+		keep = np.array(keep, dtype = bool)
+		part_of_point = np.repeat(np.arange(len(self)), np.diff(self.part_offsets))
+		counts = np.bincount(part_of_point[keep], minlength = len(self))
+		keep_parts = counts >= min_points
+		keep &= keep_parts[part_of_point]
+		parts_in_shape = np.diff(np.concatenate(([0], np.cumsum(keep_parts)))[self.shape_offsets])
+		keep_shapes = (parts_in_shape > 0) | (np.diff(self.shape_offsets) == 0)
+		boundary_ids = None
+		if self.boundary_runs is not None:
+			boundary_ids = self.boundary_runs.line_ids()[keep[self.segments() + 1]]
+		return DomainGeometry(self.coords[keep], np.concatenate(([0], np.cumsum(counts[keep_parts]))),
+			np.concatenate(([0], np.cumsum(parts_in_shape[keep_shapes]))), self.region_ids[keep_parts], boundary_ids)
+
+class GeometryBuilder(object):
+
+	__slots__ = ('coords', 'size', 'part_offsets', 'shape_offsets', 'region_ids')
+
+	"""
+	This class builds a DomainGeometry as the shapes are read, the points being copied
+	into a single array which is grown in place, so the points of the whole domain are
+	never held as lists.
+	@param capacity : the number of points there is room for at first
+	"""
+	def __init__(self, capacity = 1 << 12):
+		self.coords = np.empty((capacity, 2))
+		self.size = 0
+		self.part_offsets = [0]
+		self.shape_offsets = []
+		self.region_ids = []
+
+	def start_shape(self):
+		self.shape_offsets.append(len(self.region_ids))
+
+	"""
+	@param points    : sequence of (x, y) points, any further columns are ignored
+	@param region_id : the region id of the part
+	"""
+	def add_part(self, points, region_id):
+		self.__append(points)
+		self.part_offsets.append(self.size)
+		self.region_ids.append(region_id)
+
+	"""
+	This method appends the first point of the last part to its end.
+	"""
+	def close_part(self):
+		self.__append(self.coords[self.part_offsets[-2]].copy())
+		self.part_offsets[-1] = self.size
+
+	def __append(self, points):
+		points = np.asarray(points, dtype = np.float64)
+		points = points.reshape(-1, points.shape[-1] if points.ndim > 1 else 2)[:,:2]
+		end = self.size + points.shape[0]
+		if end > self.coords.shape[0]:
+			self.coords.resize((max(end, self.coords.shape[0] * 3 // 2), 2), refcheck = False)
+		self.coords[self.size:end] = points
+		self.size = end
+
+	"""
+	@return : the geometry of the parts added, the array being cut down to the points
+	          so the builder should not be used afterwards
+	"""
+	def geometry(self):
+		self.coords.resize((self.size, 2), refcheck = False)
+		return DomainGeometry(self.coords, self.part_offsets, self.shape_offsets + [len(self.region_ids)],
+			self.region_ids)
@@ -45,8 +45,12 @@ to enable compound lines.
 #import for message box to display error
 from PyQt4.QtGui import QMessageBox
 import numpy as np
-import numpy.lib.arraysetops as nset
-import copy
+import os
+import sys
+import time
+import json
+from geo_writer import GeoWriter
+from domain_geometry import DomainGeometry, BoundaryRuns
 
 def _flatten( l1temp ): #replace with _r_l_g
 	l2temp = []
@@ -57,26 +61,6 @@ def _flatten( l1temp ): #replace with _r_l_g
 #def _flatten_np( arr ):
 
 
-#would have to pass arr1 in as a Globals, still might need to call additional vectorize?, could probably change syntax
-class __recersive_list_gen:
-	def __init__( self, arr1, index, iscon, Globals = None, brk = False):
-		#note arr1 and index might not nessicarilly be convertable to a numpy array
-		self.Globals = Globals
-		self.index = index
-		f = lambda k, isc, self = self: self._sub_gen(k, isc, brk)
-		self.new_list = dict(enumerate(map(f,range(len(arr1)),map(lambda k, self = self:eval(iscon,locals(),globals()),range(len(arr1))))))
-		map(lambda x, self = self: self._rem_emp(x,self.new_list),self.new_list.keys())
-		
-	def _sub_gen( self, k, iscon, brk):
-		a = np.extract(iscon,self.index)
-		if brk and a.size != 0:
-			return np.array([a[0]])
-		return a
-
-	def _rem_emp( self, x, diction ):
-		if diction[x].size == 0:
-			del diction[x]
-
 def _set_dict( diction ):#rewrite _r_l_g
 	new_list = []
 	for val in diction.values():
@@ -92,7 +76,6 @@ def unzip( arr1, index = 0):
 #def unzip_d( diction, index = 0):
 	#return map(lambda x, x[index], diction.values())
 
-
 """
 This funcion writes the physical surafces in the geo file. The id used for
 the physical surface is the id from the shapefile which contains all the region
@@ -100,7 +83,8 @@ ids which distingueshes multiple domains
 @param region_id_list    : specifies the ids of different surfaces in a list 
 @param number_of_regions : specifies the number of different surfaces in the #pointless
                            given domain data
-@param geoFile           : file stream for the geo file to write the surfaces
+@param geoFile           : GeoWriter for the geo file to write the surfaces
+@return : the number of physical surfaces written
 """
 def __write_physical_surface_list_obs(region_id_list,number_of_regions,geoFile) :#why two physical surface calls?
 	#unique_list = set(region_id_list)
@@ -111,7 +95,8 @@ def __write_physical_surface_list_obs(region_id_list,number_of_regions,geoFile)
 			continue
 		physical_id_dict[region_id_list[i]].append(i+1)
 	for k in physical_id_dict.keys():
-		geoFile.write("Physical Surface(%i) = {%s};\n" % (k,str(physical_id_dict[k])[1:-1]))
+		geoFile.physical("Surface", k, physical_id_dict[k])
+	return len(physical_id_dict)
 		
 def __write_physical_surface_list( region_id_list, p_surface_dict, geoFile ):#printing blanks
 	physical_id_dict = {}
@@ -125,7 +110,7 @@ def __write_physical_surface_list( region_id_list, p_surface_dict, geoFile ):#pr
 				lst.append(p[0])
 		physical_id_dict[region_id_list[i]] = lst	
 	for k in physical_id_dict.keys():
-		geoFile.write("Physical Surface(%i) = {%s};\n" % (k,str(physical_id_dict[k])[1:-1]))
+		geoFile.physical("Surface", k, physical_id_dict[k])
 
 
 """
@@ -133,7 +118,8 @@ This method writes the physical line ids for individual lines in teh given domai
 This method uses a helper method second which returns the second element in the tuple
 @param lines_ids : list of tuples which consists of the id for the line and the physical
                    id for the line
-@param geoFile   : file stream for the geo file to write the physical lines
+@param geoFile   : GeoWriter for the geo file to write the physical lines
+@return : the number of physical lines written
 """
 def __write_physical_lines_to_geo(lines_ids, geoFile):
  	def second(a):
@@ -147,18 +133,19 @@ def __write_physical_lines_to_geo(lines_ids, geoFile):
 	for line,pid in lines_ids:
 		physical_line_id_dict[pid].append(line)
 	for i in range(len(physical_line_id_dict.keys())):
-		geoFile.write("Physical Line(%i) = {%s};\n" % (physical_line_id_dict.keys()[i],str(physical_line_id_dict.values()[i])[1:-1]))
+		geoFile.physical("Line", physical_line_id_dict.keys()[i], physical_line_id_dict.values()[i])
+	return len(physical_line_id_dict)
 
 """
 This method writes the physical line ids for individual compound lines in the 
 given domain data.
 @param lines_ids : list of tuples which consists of the id for the line and the physical
                    id for the line
-@param geoFile   : file stream for the geo file to write the physical lines
+@param geoFile   : GeoWriter for the geo file to write the physical lines
 """
 def __write_physical_compound_lines_to_geo(lines_ids, geoFile):
 	for key in lines_ids.keys():
-		geoFile.write("Physical Line(%i) = {%s};\n" % (key,str(lines_ids[key])[1:-1]))
+		geoFile.physical("Line", key, lines_ids[key])
 
 def __write_compound_lines_as_physical( compound_line_dict, geoFile ):
 	keys = compound_line_dict.keys()
@@ -170,150 +157,85 @@ def __write_compound_lines_as_physical( compound_line_dict, geoFile ):
 			continue
 		physical_line_dict[keys[1][k]] = [keys[0][k]]
 	for k in physical_line_dict.keys():
-		geoFile.write("Physical Line(%i) = {%s};\n" % (k,str(physical_line_dict[k])[1:-1]))#physical Line Ids may be wrong
-		
-#still missing some compound lines in some instances, possibly working under the assumtion that the idpolygons only intersect the boundary once?
-#optermising this code is vital it is the slowest part of the script
-def __split_compound_lines_for_line_ids( compound_line_list, line_dict, line_num ):#again very bad coding, at some point use more efficient types
-	dictn_list = []
-	count = line_num
-	a = copy.copy(compound_line_list)
-	#produces dictionary of line ids for component lines present in each compound line
-	a = __recersive_list_gen(\
-	a,\
-	unzip(copy.copy(line_dict.values()),1),\
-	'map(lambda x: x in self.Globals[1][k], self.Globals[0])',\
-	Globals = (unzip(copy.copy(line_dict.values())),__list_abs(a))).new_list#should produce{0:[0,0,0,0],1:[0,0,0,0]}
-	#splits compound lines based on the change of value in a
-	for i in range(len(compound_line_list)):#note a now a dictionary, might not be of correct length, keys for each compound line?, that would make the indexes correct
-		clist = copy.copy(compound_line_list[i])
-		val = []
-		tmp = []
-		for j in range(len(a[i])):
-			if j == 0 or a[i][j] == a[i][j-1]:
-				tmp += [clist[j]]
-			else:
-				val += [tmp]
-				tmp = [clist[j]]
-		val += [tmp]
-		key = list(enumerate(set(a[i]),count))
-		count += len(key)
-		dictn_list += zip(key,val)
-	line_num += len(dictn_list)
-	return dict(dictn_list), line_num
+		geoFile.physical("Line", k, physical_line_dict[k])#physical Line Ids may be wrong
+	return len(physical_line_dict)
 		
+"""
+This method splits a line loop at the runs of the physical ids of its lines, so the
+physical id of each line is not looked up.
+@param line_loop     : the signed line ids of the line loop
+@param boundary_runs : BoundaryRuns of the lines of every line loop, a line loop may
+                       leave out the last line of its part
+@param i             : the part of the line loop in boundary_runs
+@return : list of (physical id, signed line ids) for each run
+"""
+def __line_loop_runs( line_loop, boundary_runs, i ):
+	starts, lengths, ids = boundary_runs.part(i)
+	return [(pid, line_loop[start:start + length]) for start, length, pid in \
+	zip(starts.tolist(), lengths.tolist(), ids.tolist()) if start < len(line_loop)]
 
 """
-this method splits the compound lines for multiple region which have adjacent boundaries
+This method numbers the compound lines from the next free line id.
+@param compound_line_list : list of (physical id, signed line ids) for each compound line
+@param line_num           : the next free line id
+@return : dictionary of {(compound line id, physical id) : line ids} and the next free line id
 """
+def __number_compound_lines( compound_line_list, line_num ):
+	compound_dict = dict([((line_num + j, pid), lines) for j, (pid, lines) in enumerate(compound_line_list)])
+	return compound_dict, line_num + len(compound_line_list)
 
-class __split_compound_lines_for_multiple_regions:
-	def __init__( self, compound_line_list ):
-		self.values = compound_line_list
-		for self.itr1 in range(len(self.values)):
-			for self.itr2 in range(self.itr1+1,len(self.values)):
-				try:
-					test = (self.values[self.itr1],self.values[self.itr2])#again possibly unnesicary
-				except:
-					return
-#				print 'a'
-#				print self.values[self.itr1]
-#				print self.values[self.itr2]
-				apre, a1l, apo, s1l, bpre, b1l, bpo = self.__check_for_intersection(self.values[self.itr1],self.values[self.itr2])
-#				print s1l+apre+bpre+a1l+b1l+apo+bpo
-				if s1l == []:
-					continue
-				try:#bad code+probably wrong, might now be unnesicary
-					del self.values[self.itr1]
-					try:
-						del self.values[self.itr2-1]
-					except:
-						pass
-				except:
-					pass
-				self.values += s1l+apre+bpre+a1l+b1l+apo+bpo
-				
-				#not currently working
-				#vtmp = self.values + self.__check_for_intersection(self.values[self.itr1],self.values[self.itr2])[0]
-				#if vtmp == self.values:
-					#continue
-				#self.values = vtmp
-				#del self.values[self.itr1]
-				#del self.values[self.itr2-1]
-				
-	"""
-	This method is to be implemented and would carry out the intersection
-	"""
-	#note have replaced intersect1d_nu with intersect1d
-	#note horribly long - shorten?
-	def __check_for_intersection(self,arr1,arr2):
-		inset = nset.intersect1d(arr1,arr2)#hopefully based on arr1
-		arr2.reverse()
-		insetr = nset.intersect1d(arr1,map(lambda x: -x, arr2))#could replace this with numpy array for speed at some point
-		arr2.reverse()
-		rvs = False
-		if insetr.size > inset.size:#note may need to addapt subsiquent code
-			inset = insetr
-			rvs = True
-		if inset.size == 0:
-			return [], [], [], [], [], [], []
-		br = arr2
-		if rvs:
-			arr2.reverse()
-			br = map(lambda x: -x, arr2)
-			arr2.reverse()
-		apre = [arr1[:arr1.index(inset[0])]]; apo = [arr1[arr1.index(inset[-1])+1:]]
-		bpre = [arr2[:br.index(inset[0])]]; bpo = [arr2[br.index(inset[-1])+1:]]
-		ra = range(arr1.index(inset[0]),arr1.index(inset[-1])+1)
-		rb = range(br.index(inset[0]),br.index(inset[-1])+1)
-		con = 0
-		con_s = 0
-		flp = 0
-		a1l = [[]]
-		s1l = [[]]
-		for i in ra: #vectorize/mapline_loop_dict.keys()
-			if arr1[i] in inset:
-				if flp == 1:
-					flp = 0
-					con_s += 1
-					s1l.append([])
-				s1l[con_s].append(arr1[i])
-				continue
-			if flp == 0:
-				flp = 1
-				con += 1
-				a1l.append([])
-			a1l[con] += [arr1[i]]
-		con = 0
-		flp = 0
-		b1l = [[]]
-		for i in rb:
-			if br[i] in inset:
-				if flp == 1:
-					flp = 0
-				continue
-			if flp == 0:
-				flp = 1
-				con += 1
-				b1l.append([])
-			b1l[con].append(br[i])
-		if rvs:
-			for i in b1l:
-				i.reverse()
-				i = map(lambda x: -x, i)
-		apre = self.rmvMulti( apre, [] )
-		a1l = self.rmvMulti( a1l, [] )
-		apo = self.rmvMulti( apo, [] )
-		s1l = self.rmvMulti( s1l, [] )
-		bpre = self.rmvMulti( bpre, [] )
-		b1l = self.rmvMulti( b1l, [] )
-		bpo = self.rmvMulti( bpo, [] )
-		return [apre,a1l,apo,s1l,bpre,b1l,bpo]
-
-	def rmvMulti( self, lst, val ):#change to extract?,np.extract(arr!=val,val), note arr must be ndarray
-		while val in lst:
-			lst.remove(val)
-		return lst
+"""
+This method finds the compound lines making up each line loop through an index from
+line id to the compound lines containing it.
+@param line_loop_list : list of the signed line ids in each line loop
+@param compound_dict  : dictionary of {(compound line id, physical id) : line ids}
+@return : list of the compound line ids, in compound_dict order, for every line loop
+          which contains a compound line
+"""
+def __compound_lines_in_line_loops( line_loop_list, compound_dict ):
+	compound_ids = np.array(unzip(compound_dict.keys()))
+	compound_of = {}
+	for c, lines in enumerate(compound_dict.values()):
+		for l in lines:
+			compound_of.setdefault(abs(l), []).append(c)
+	loop_compounds = []
+	for loop in line_loop_list:
+		members = sorted(set([c for l in loop for c in compound_of.get(abs(l), [])]))
+		if members:
+			loop_compounds.append(compound_ids[members])
+	return loop_compounds
+
+"""
+this method splits the compound lines for multiple region which have adjacent boundaries
+and for the physical ids of their lines
+
+The line loops using each absolute line id are found once, then every run of the same
+physical id in every line loop is walked once and cut wherever the line loops sharing
+its lines change, so each piece is either only in this line loop or shared with the
+same neighbours all along. A shared piece is kept by the first line loop it is in, in
+that line loop's direction, so it is given once. Runs in line loops sharing no lines
+are kept whole and in place.
+@param line_loop_list : list of the runs of each line loop, see __line_loop_runs
+@return : list of (physical id, signed line ids) for each piece
+"""
+def __split_compound_lines_for_multiple_regions( line_loop_list ):
+	loops_of_line = {}
+	for k, line_loop in enumerate(line_loop_list):
+		for pid, lines in line_loop:
+			for l in lines:
+				loops_of_line.setdefault(abs(l), set()).add(k)
+	for l in loops_of_line.keys():
+		loops_of_line[l] = tuple(sorted(loops_of_line[l]))
+	pieces = []
+	for k, line_loop in enumerate(line_loop_list):
+		for pid, lines in line_loop:
+			loops = None
+			for l in lines:
+				if loops_of_line[abs(l)] != loops:
+					loops = loops_of_line[abs(l)]
+					pieces.append((loops[0] == k, pid, []))
+				pieces[-1][2].append(l)
+	return [(pid, piece) for first, pid, piece in pieces if first]
 
 __list_abs = lambda arr1: map(lambda y: map(lambda x: abs(x), y), arr1)
 
@@ -323,7 +245,177 @@ this method writes the compound line to the geo file
 """
 def __write_compound_lines(compound_dict, geo):
 	for i in range(len(compound_dict.keys())):
-		geo.write("Compound Line(%i) = {%s};\n"%(compound_dict.keys()[i][0],str(compound_dict.values()[i])[1:-1]))
+		geo.compound_line(compound_dict.keys()[i][0], compound_dict.values()[i])
+
+"""
+This method labels the equal rows of the given columns from 1 in order of their first
+occurrence, which is the numbering given by filling a dictionary row by row.
+lexsort is stable so the first row of each sorted group is its first occurrence.
+@param columns : arrays of equal length, the first column being the primary key
+@return : the label of every row and a mask of the rows where a label first occurs
+"""
+def _first_occurrence_ids(*columns):
+	n = columns[0].size
+	order = np.lexsort(columns[::-1])
+	sorted_columns = [c[order] for c in columns]
+	group_start = np.ones(n, dtype = bool)
+	if n > 1:
+		group_start[1:] = reduce(np.logical_or, [c[1:] != c[:-1] for c in sorted_columns])
+	group = np.cumsum(group_start) - 1
+	first = order[group_start]
+	rank = np.empty(first.size, dtype = int)
+	rank[np.argsort(first)] = np.arange(first.size)
+	labels = np.empty(n, dtype = int)
+	labels[order] = rank[group] + 1
+	is_first = np.zeros(n, dtype = bool)
+	is_first[first] = True
+	return labels, is_first
+
+"""
+This method gives the runs of the physical ids of the lines in the lists of lines.
+@param domain_points : list of line loops, each a list of (point1, point2) lines
+@param boundary_id   : list of the physical ids of the lines in each line loop
+@return : BoundaryRuns of the lines of every line loop
+"""
+def __line_loop_boundary_runs(domain_points, boundary_id):
+	loop_offsets = np.cumsum([0] + map(len, domain_points))
+	return BoundaryRuns.from_ids(_flatten([boundary_id[k][:len(domain_points[k])] for k in range(len(domain_points))]), loop_offsets)
+
+"""
+This method gives the lines of the line loops as arrays from the lists of
+(point1, point2) lines.
+@param domain_points : list of line loops, each a list of (point1, point2) lines
+@return : the two points of every line as a (2 * lines)x2 array, the offsets of
+          each line loop in the lines and the position of every line in the
+          boundary runs, see __line_loop_boundary_runs
+"""
+def __line_loop_segments(domain_points):
+	loop_offsets = np.cumsum([0] + map(len, domain_points))
+	coords = np.array([line for line_loop in domain_points for line in line_loop], dtype = float).reshape(-1, 2)
+	return coords, loop_offsets, np.arange(loop_offsets[-1])
+
+"""
+This method gives the lines of the line loops as arrays from a DomainGeometry, the
+last line of a part being left out when it has the same point twice.
+@return : as __line_loop_segments, the lines being counted in geometry.boundary_runs
+"""
+def __geometry_segments(geometry):
+	starts = geometry.segments()
+	segment_offsets = geometry.segment_offsets()
+	keep = np.ones(starts.size, dtype = bool)
+	last = segment_offsets[1:][np.diff(segment_offsets) > 0] - 1
+	keep[last] = np.any(geometry.coords[starts[last]] != geometry.coords[starts[last] + 1], axis = 1)
+	loop_offsets = np.concatenate(([0], np.cumsum(keep)))[segment_offsets]
+	starts = starts[keep]
+	coords = np.empty((2 * starts.size, 2))
+	coords[0::2] = geometry.coords[starts]
+	coords[1::2] = geometry.coords[starts + 1]
+	return coords, loop_offsets, np.flatnonzero(keep)
+
+"""
+This method is the array based replacement of the point and line dictionaries in
+write_geo_file. The coordinates of every line loop are deduplicated in a single pass
+and the lines are keyed on their (min, max) point ids with a direction sign, so the
+Point and Line numbering is the same as the dictionary method.
+@param coords        : the two points of every line, see __line_loop_segments
+@param loop_offsets  : the first line of each line loop followed by the number of lines
+@param lines         : the position of every line in boundary_runs
+@param boundary_runs : BoundaryRuns giving the physical ids of the lines, which are
+                       only looked up for the lines written
+@return : the points and lines to write, see __write_loop_entities, the signed line
+          id of every line and the line dictionary, {(point1, point2) : (line id,
+          physical id)}, in order of creation
+"""
+def __dedup_lines_array(coords, loop_offsets, lines, boundary_runs):
+	point_ids, new_point = _first_occurrence_ids(coords[:,0], coords[:,1])
+	start = point_ids[0::2]
+	end = point_ids[1::2]
+	line_ids, new_line = _first_occurrence_ids(np.minimum(start, end), np.maximum(start, end))
+	#lines written in the opposite direction to their first occurrence are negative
+	first_line = np.flatnonzero(new_line)
+	signed_line_ids = np.where(start == start[first_line][line_ids - 1], line_ids, -line_ids)
+
+	#every point is written just before the first line using it and so are given the
+	#sort keys 3*line, 3*line+1 with the new lines following at 3*line+2, the points
+	#and the lines each being in order already
+	first_point = np.flatnonzero(new_point)
+	point_keys = 3*(first_point//2) + first_point%2
+	line_keys = 3*first_line + 2
+	order = np.argsort(np.concatenate((point_keys, line_keys)), kind = 'mergesort')
+	entities = (order >= first_point.size, np.concatenate((point_ids[first_point], line_ids[first_line]))[order],
+		coords[first_point], np.column_stack((start[first_line], end[first_line])),
+		np.searchsorted(point_keys, 3*loop_offsets), np.searchsorted(line_keys, 3*loop_offsets))
+
+	line_pids = boundary_runs.line_ids(lines[first_line]).tolist()
+	line_dict = dict(zip(zip(start[first_line].tolist(), end[first_line].tolist()), zip(line_ids[first_line].tolist(), line_pids)))
+	return entities, signed_line_ids, line_dict
+
+"""
+This method writes the points and lines first used by a line loop.
+@param geo         : the GeoWriter of the geo file
+@param entities    : mask of the lines among the points and lines in the order they are
+                     written, their ids, the coordinates of the points, the point ids of
+                     the lines and the first point and line of each line loop
+@param i           : the line loop
+@param line_string : either Line or BSpline
+"""
+def __write_loop_entities(geo, entities, i, line_string):
+	is_line, ids, point_coords, line_points, point_offsets, line_offsets = entities
+	points = slice(point_offsets[i], point_offsets[i+1])
+	lines = slice(line_offsets[i], line_offsets[i+1])
+	written = slice(point_offsets[i] + line_offsets[i], point_offsets[i+1] + line_offsets[i+1])
+	geo.points_and_lines(is_line[written], ids[written], point_coords[points], line_points[lines], line_string)
+
+"""
+This method gives the peak resident memory of the process since it started in
+kilobytes, or None where the resource module is not available. This is the peak of
+the whole process, not of write_geo_file, so it also covers reading the shapefiles.
+"""
+def _peak_memory():
+	try:
+		import resource
+	except ImportError:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	#ru_maxrss is in bytes on Mac OS X and in kilobytes elsewhere
+	if sys.platform == "darwin":
+		peak //= 1024
+	return peak
+
+"""
+This class records the wall time, the characters written and the number of entities
+of each phase of write_geo_file. A phase runs from the end of the previous one, so the
+phases cover the whole of write_geo_file. Each phase also has the peak memory of the
+process at its end, see _peak_memory, and how much this rose during the phase, which
+is 0 when the phase did not go above the earlier peak.
+"""
+class _GeoStats:
+
+	def __init__( self ):
+		self.phases = []
+		self.started = time.time()
+		self.phase_started = self.started
+		self.written = 0
+		self.peak_memory = _peak_memory()
+
+	"""
+	@param name    : the name of the phase which has just finished
+	@param written : the number of characters written to the geo file so far
+	@param counts  : dictionary of the number of each entity dealt with in the phase
+	"""
+	def end_phase( self, name, written, counts = {} ):
+		now = time.time()
+		peak = _peak_memory()
+		rise = None if peak is None else peak - self.peak_memory
+		self.phases.append({"name" : name, "time" : now - self.phase_started, "bytes" : written - self.written,
+			"peak_memory_kb" : peak, "peak_memory_rise_kb" : rise, "counts" : dict(counts)})
+		self.phase_started = now
+		self.written = written
+		self.peak_memory = peak
+
+	def as_dict( self ):
+		return {"phases" : self.phases, "time" : time.time() - self.started, "bytes" : self.written,
+			"process_peak_memory_kb" : _peak_memory()}
 
 """
 This method writes the geo and physical ids using the helper emthods defined above.
@@ -331,91 +423,125 @@ This method makes sure there are no duplicate lines or points in the geo. The li
 which are shared are only written once and the same id for the line is used anywhere
 else where the same line is in the shape.
 @param filepath : specifies the filepath of the geo file to be written
-@param data     : specifies the data for teh domains, i.e. the ids and points
+@param data     : specifies the data for teh domains, either a DomainGeometry with its
+                  boundary ids or the list of the region ids, shapes, boundary ids and lines
+@param use_array_dedup : numbers the points and lines with __dedup_lines_array, when
+                         False the original dictionary method is used which gives the
+                         same numbering and is kept as a reference for regression testing
+@param use_ranges : writes runs of consecutive ids in the line loops, compound lines,
+                    surfaces and physical groups as gmsh ranges, see geo_writer._id_list
+@param write_stats : also writes the statistics as JSON next to the geo file, as
+                     <name>.stats.json
+@return : the statistics of the phases, dedup, loops, compounds, surfaces and physical,
+          see _GeoStats. With the dictionary method the points and lines are numbered
+          while the line loops are written and so are counted in the loops phase
 """
-def write_geo_file(filepath,data, compound_line_enable, use_bspline):#there should be 1:1 map between line loop and compound lines prior to split
+def write_geo_file(filepath,data, compound_line_enable, use_bspline, use_array_dedup = True, use_ranges = False, write_stats = False):#there should be 1:1 map between line loop and compound lines prior to split
 	def __remove_last_line_using_same_point(lines):
 		last = lines[-1]
 		if last[0]==last[1]:
 			lines.pop()
 		return lines
-	region_id = data[0]
-	
+	stats = _GeoStats()
 	if use_bspline:
 		line_string = "BSpline"
 	else:
 		line_string = "Line"
 
-	shapes_index = data[1]
-	boundary_id = data[2]
-	domain_points = data[3]
-	#remove the last line which has same point twice
-
-	map(__remove_last_line_using_same_point, domain_points)
+	#the dictionary method works on the lists of lines
+	if isinstance(data, DomainGeometry) and not use_array_dedup:
+		data = data.to_data()
+	if isinstance(data, DomainGeometry):
+		region_id = data.region_ids.tolist()
+		shapes_index = data.shape_offsets.tolist()
+		boundary_runs = data.boundary_runs
+		segments = __geometry_segments(data)
+	else:
+		region_id = data[0]
+		shapes_index = data[1]
+		boundary_id = data[2]
+		domain_points = data[3]
+		#remove the last line which has same point twice
+
+		map(__remove_last_line_using_same_point, domain_points)
+
+		#add the end of last shape to the shapes_index array
+		shapes_index.append(len(domain_points))
+		boundary_runs = __line_loop_boundary_runs(domain_points, boundary_id)
+		if use_array_dedup:
+			segments = __line_loop_segments(domain_points)
 	if ".geo" not in filepath:
 		filepath += ".geo"
-
-	#add the end of last shape to the shapes_index array
-	shapes_index.append(len(domain_points))
 	try:
 		#open the file to write the geo file
-		geo = open(filepath,"w")
+		geo = GeoWriter(open(filepath,"w"), use_ranges = use_ranges)
 		print "Writing geo file"
 		#define the loop variants being used by the following
 		point_dict = {}
 		line_dict = {}
 		line_loop_dict = {}
+		loop_runs_dict = {}
 		line_index = -1
 		surface_dict = {}
 		line_num = 1
 		line_loop_num = 1
 		point_num = 1
 		surface_num = 1
-		shape_number = -1
 		p_surface_dict = {}
+		if use_array_dedup:
+			coords, loop_offsets, lines = segments
+			entities, signed_line_ids, line_dict = __dedup_lines_array(coords, loop_offsets, lines, boundary_runs)
+			line_num = len(line_dict) + 1
+			stats.end_phase("dedup", geo.written, {"points" : len(entities[2]), "lines" : len(line_dict)})
+		else:
+			stats.end_phase("dedup", geo.written)
 
 		#loop for every shape. each shape contains some islands so split points are used
 		for i in range(len(shapes_index)-1):
 			surface_line_loops = []
 			#loop for every line loop in each shape. i.e. boundary and islands
-			for line_loop in domain_points[shapes_index[i]:shapes_index[i+1]]:
+			for shape_number in range(shapes_index[i], shapes_index[i+1]):
 				compound_line = []
 				prev_line_pid = -1
-				shape_number += 1
 				line_in_line_loop = []
 				line_index = -1
-				for line in line_loop:
-					line_index += 1
-					points_in_line = []
-					for p in line:
-						try:
-							#check if the current point already exists
-							point_id = point_dict[tuple(p)]
-							points_in_line.append(point_id)
-						except KeyError:
-							#write the point to geo file and add it to the dictionary
-							point_dict[tuple(p)] = point_num
-							points_in_line.append(point_num)
-							geo.write("Point(%i) = {%s,0};\n"%(point_num, str(p)[1:-1]))
-							point_num += 1
-					try :
-						#check if the current line has already been written
-						line_id,line_pid = line_dict[tuple(points_in_line)]
-						line_in_line_loop.append(line_id)
-					except KeyError:
-						try :#this section is wrong for some reason
-							#check if the line in opposite direction exists
-							reverse_line = points_in_line + []
-							reverse_line.reverse()
-							line_id,line_pid = line_dict[tuple(reverse_line)]
-							line_in_line_loop.append(0-line_id)
+				if use_array_dedup:
+					#the points and lines are already numbered, write the ones first used by this line loop
+					__write_loop_entities(geo, entities, shape_number, line_string)
+					line_in_line_loop = signed_line_ids[loop_offsets[shape_number]:loop_offsets[shape_number+1]].tolist()
+				else:
+					for line in domain_points[shape_number]:
+						line_index += 1
+						points_in_line = []
+						for p in line:
+							try:
+								#check if the current point already exists
+								point_id = point_dict[tuple(p)]
+								points_in_line.append(point_id)
+							except KeyError:
+								#write the point to geo file and add it to the dictionary
+								point_dict[tuple(p)] = point_num
+								points_in_line.append(point_num)
+								geo.write("Point(%i) = {%s,0};\n"%(point_num, str(p)[1:-1]))
+								point_num += 1
+						try :
+							#check if the current line has already been written
+							line_id,line_pid = line_dict[tuple(points_in_line)]
+							line_in_line_loop.append(line_id)
 						except KeyError:
-							#if the line has not yet been written then write the file and add to the dictionary
-							line_pid = boundary_id[shape_number][line_index]
-							line_dict[tuple(points_in_line)] = (line_num,line_pid)
-							line_in_line_loop.append(line_num)
-							geo.write("%s(%i) = {%s};\n" %(line_string, line_num,str(points_in_line)[1:-1]))
-							line_num += 1
+							try :#this section is wrong for some reason
+								#check if the line in opposite direction exists
+								reverse_line = points_in_line + []
+								reverse_line.reverse()
+								line_id,line_pid = line_dict[tuple(reverse_line)]
+								line_in_line_loop.append(0-line_id)
+							except KeyError:
+								#if the line has not yet been written then write the file and add to the dictionary
+								line_pid = boundary_id[shape_number][line_index]
+								line_dict[tuple(points_in_line)] = (line_num,line_pid)
+								line_in_line_loop.append(line_num)
+								geo.write("%s(%i) = {%s};\n" %(line_string, line_num,str(points_in_line)[1:-1]))
+								line_num += 1
 				try:
 					#check if the current line loop already exists
 					line_loop_id = line_loop_dict[tuple(line_in_line_loop)]
@@ -432,7 +558,9 @@ def write_geo_file(filepath,data, compound_line_enable, use_bspline):#there shou
 						line_loop_dict[tuple(line_in_line_loop)] = line_loop_num
 						surface_line_loops.append(line_loop_num)
 						if not compound_line_enable:
-							geo.write("Line Loop(%i) = {%s};\n" % (line_loop_num,str(line_in_line_loop)[1:-1]))
+							geo.line_loop(line_loop_num, line_in_line_loop)
+						else:
+							loop_runs_dict[tuple(line_in_line_loop)] = __line_loop_runs(line_in_line_loop, boundary_runs, shape_number)
 						line_loop_num += 1#don't change this
 			if not compound_line_enable:
 				surface_pid = region_id[shapes_index[i]]
@@ -442,30 +570,33 @@ def write_geo_file(filepath,data, compound_line_enable, use_bspline):#there shou
 				except KeyError:
 					surface_dict[surface_pid] = [surface_num]
 				p_surface_dict[surface_num] = surface_line_loops
-				geo.write("Plane Surface(%i) = {%s};\n" % (surface_num,str(surface_line_loops)[1:-1]))
+				geo.plane_surface(surface_num, surface_line_loops)
 				surface_num +=1
+		if use_array_dedup:
+			point_count = len(entities[2])
+		else:
+			point_count = len(point_dict)
+		stats.end_phase("loops", geo.written, {"points" : point_count, "lines" : len(line_dict),
+			"line_loops" : line_loop_num - 1, "surfaces" : surface_num - 1})
 		if compound_line_enable:
 			print 'lines written'
-			compound_line_list_b = map(list,line_loop_dict.keys())
+			compound_line_list_b = [loop_runs_dict[key] for key in line_loop_dict.keys()]
 			if len(shapes_index)>1:
-				compound_line_list = __split_compound_lines_for_multiple_regions(copy.copy(compound_line_list_b)).values
+				compound_line_list = __split_compound_lines_for_multiple_regions(compound_line_list_b)
 #			print compound_line_list
-			compound_line_dict, line_num = __split_compound_lines_for_line_ids(compound_line_list,line_dict,line_num)#note currently incompatible with line id's
+			compound_line_dict, line_num = __number_compound_lines(compound_line_list,line_num)
 #			print compound_line_dict
 			compound_line_dict = dict(zip(compound_line_dict.keys(),__list_abs(compound_line_dict.values())))
 			__write_compound_lines(compound_line_dict,geo)
 			print 'compounds written'
 			
-			line_loop_line = __recersive_list_gen(\
-			line_loop_dict.keys(),\
-			unzip(compound_line_dict.keys()),\
-			'map(lambda x, nset = nset: nset.intersect1d(x,self.Globals[1][k]).size != 0, self.Globals[0])',\
-			Globals = (compound_line_dict.values(),__list_abs(line_loop_dict.keys()))).new_list#possiblity reordering occuring here, can keys be reorder at all (or do it post creating dictionary)
+			line_loop_line = __compound_lines_in_line_loops(line_loop_dict.keys(), compound_line_dict)#possiblity reordering occuring here, can keys be reorder at all (or do it post creating dictionary)
 #			print 'l', line_loop_line
-			line_loop_dict = dict(enumerate(line_loop_line.values(), line_num))#note too many when there is complete intersection, may not matter too much, note this is fine res ordering
+			line_loop_dict = dict(enumerate(line_loop_line, line_num))#note too many when there is complete intersection, may not matter too much, note this is fine res ordering
 			for key in line_loop_dict.keys():#these might not be correct/or possibly the compound lines
-				geo.write("Line Loop(%i) = {%s};\n" % (key,str(list(line_loop_dict[key]))[1:-1]))
+				geo.line_loop(key, line_loop_dict[key])
 			print 'line loops written'
+			stats.end_phase("compounds", geo.written, {"compound_lines" : len(compound_line_dict), "line_loops" : len(line_loop_dict)})
 #			print line_loop_dict.keys()
 #			print line_loop_dict.values()
 #			print shapes_index
@@ -498,12 +629,13 @@ def write_geo_file(filepath,data, compound_line_enable, use_bspline):#there shou
 					#continue
 				crnt = xkeys2[shapes_index[i]:shapes_index[i+1]]
 #				print crnt
-				geo.write("Plane Surface(%i) = {%s};\n" % (surface_num,str(crnt)[1:-1]))
+				geo.plane_surface(surface_num, crnt)
 				#prev = _flatten(map(list,line_loop_dict.values()[shapes_index[i]:shapes_index[i+1]]))
 				#prev_i = i
 				surface_num +=1
 			print 'Planes Written'
-			__write_compound_lines_as_physical( compound_line_dict,geo )#hopefully doesn't need changing
+			stats.end_phase("surfaces", geo.written, {"surfaces" : surface_num - 1})
+			physical_lines = __write_compound_lines_as_physical( compound_line_dict,geo )#hopefully doesn't need changing
 			print 'Physical Lines Written'
 			#may want to make sure shape_loop_list isn't called
 			physical_list = {}
@@ -516,15 +648,23 @@ def write_geo_file(filepath,data, compound_line_enable, use_bspline):#there shou
 					continue
 			#note sometimes reverse of physical_line_list - thought this may not work in all situations 
 			for key in physical_list.keys():
-				geo.write("Physical Surface(%i) = {%s};\n" % (key,str(physical_list[key])[1:-1]))
+				geo.physical("Surface", key, physical_list[key])
+			physical_surfaces = len(physical_list)
 			print 'Surfaces Written'
 		else :
-			__write_physical_lines_to_geo(line_dict.values(),geo)#sort out Physical Lines!
-			__write_physical_surface_list_obs(region_id, len(shapes_index), geo)
+			physical_lines = __write_physical_lines_to_geo(line_dict.values(),geo)#sort out Physical Lines!
+			physical_surfaces = __write_physical_surface_list_obs(region_id, len(shapes_index), geo)
 
 		geo.write("\n\nMesh.RemeshAlgorithm=1;\n")
 		geo.close()
+		stats.end_phase("physical", geo.written, {"physical_lines" : physical_lines, "physical_surfaces" : physical_surfaces})
 		print "geo file written : " + filepath
+		stats = stats.as_dict()
+		if write_stats:
+			statsFile = open(os.path.splitext(filepath)[0] + ".stats.json", "w")
+			json.dump(stats, statsFile, indent = 2, sort_keys = True)
+			statsFile.close()
+		return stats
 	except IOError:
 		print "Error: An error occurred while writing the geo file"
 		QMessageBox.critical(None,"Error: In Writing Geo File","An error has occurred while writing the geo file")
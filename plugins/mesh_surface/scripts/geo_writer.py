@@ -0,0 +1,242 @@
+
+##########################################################################
+#
+#  QGIS-meshing plugins.
+#
+#  Copyright (C) 2012-2013 Imperial College London and others.
+#
+#  Please see the AUTHORS file in the main source directory for a
+#  full list of copyright holders.
+#
+#  Dr Adam S. Candy, adam.candy@imperial.ac.uk
+#  Applied Modelling and Computation Group
+#  Department of Earth Science and Engineering
+#  Imperial College London
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation,
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+#  USA
+#
+##########################################################################
+
+"""
+This module writes the entities of a geo file. The points, lines, line loops, surfaces,
+physical groups and fields are given as records and formatted in batches into a buffer,
+which is only written out once it is larger than the flush size, so large domains are
+written with a few large writes instead of one per entity.
+
+The writer can be given a file, or anything with a write method such as a gzip file or a
+socket file, or no stream at all in which case the text is kept as chunks to be taken
+with chunks(). geo_chunks turns a sequence of records into a generator of text chunks.
+"""
+
+import numpy as np
+from collections import deque
+
+POINT = "Point(%i) = {%r, %r,0};\n"
+LINE = "(%i) = {%i, %i};\n"
+
+"""
+This method formats a list of ids for an entity in the geo file. With use_ranges
+runs of at least three consecutive ids, counting either up or down, are written
+as the gmsh range a:b, which for coastlines is most of the list.
+@param ids        : list or array of the ids
+@param use_ranges : if False the ids are written out in full
+"""
+def _id_list( ids, use_ranges = False ):
+	if not use_ranges:
+		return str(list(ids))[1:-1]
+	ids = map(int, ids)
+	items = []
+	i = 0
+	while i < len(ids):
+		j = i + 1
+		if j < len(ids) and abs(ids[j] - ids[i]) == 1:
+			step = ids[j] - ids[i]
+			while j < len(ids) and ids[j] - ids[j-1] == step:
+				j += 1
+		if j - i >= 3:
+			items.append("%i:%i" % (ids[i], ids[j-1]))
+			i = j
+		else:
+			items.append("%i" % ids[i])
+			i += 1
+	return ", ".join(items)
+
+class GeoWriter:
+
+	"""
+	@param stream     : file like object the text is written to, if None the text is
+	                    kept in memory and taken with chunks()
+	@param flush_size : number of characters buffered before they are written
+	@param batch_size : number of points or lines formatted at once
+	@param use_ranges : writes the id lists with gmsh ranges, see _id_list
+	"""
+	def __init__( self, stream = None, flush_size = 1 << 20, batch_size = 1 << 14, use_ranges = False ):
+		self.stream = stream
+		self.flush_size = flush_size
+		self.batch_size = batch_size
+		self.use_ranges = use_ranges
+		self.buffer = []
+		self.buffered = 0
+		self.ready = deque()
+		#number of characters written since the writer was made
+		self.written = 0
+
+	"""
+	Buffers text which is already formatted, so the writer can be used in place of a file.
+	"""
+	def write( self, text ):
+		self.buffer.append(text)
+		self.buffered += len(text)
+		self.written += len(text)
+		if self.buffered >= self.flush_size:
+			self.flush()
+
+	def writelines( self, texts ):
+		for text in texts:
+			self.write(text)
+
+	def comment( self, text ):
+		self.write("// %s\n" % text)
+
+	"""
+	Writes a point for every row of coords.
+	@param ids      : the point ids
+	@param coords   : sequence of (x, y) coordinates, any further columns are ignored
+	@param template : format of a single point, given the id, x and y
+	"""
+	def points( self, ids, coords, template = POINT ):
+		if len(ids) == 0:
+			return
+		coords = np.asarray(coords, dtype = float).reshape(len(ids), -1)
+		self.__write_rows(template, [np.asarray(ids, dtype = int), coords[:,0], coords[:,1]])
+
+	"""
+	Writes a line or bspline between every pair of points.
+	@param ids         : the line ids
+	@param point_ids   : sequence of (start, end) point ids
+	@param line_string : either Line or BSpline
+	"""
+	def lines( self, ids, point_ids, line_string = "Line" ):
+		if len(ids) == 0:
+			return
+		point_ids = np.asarray(point_ids, dtype = int).reshape(len(ids), 2)
+		self.__write_rows(line_string + LINE, [np.asarray(ids, dtype = int), point_ids[:,0], point_ids[:,1]])
+
+	"""
+	Writes points and lines mixed in the order given, with the same formats as points
+	and lines, so a point can be written just before the first line using it.
+	@param is_line     : mask of the entities which are lines, the others being points
+	@param ids         : the point or line id of every entity
+	@param coords      : the (x, y) coordinates of the points, in order
+	@param point_ids   : the (start, end) point ids of the lines, in order
+	@param line_string : either Line or BSpline
+	"""
+	def points_and_lines( self, is_line, ids, coords, point_ids, line_string = "Line", template = POINT ):
+		is_line = np.asarray(is_line, dtype = bool)
+		if is_line.size == 0:
+			return
+		coords = np.asarray(coords, dtype = float).reshape(-1, 2)
+		point_ids = np.asarray(point_ids, dtype = int).reshape(-1, 2)
+		#object columns so the coordinates stay floats and the point ids integers
+		first = np.empty(is_line.size, dtype = object)
+		second = np.empty(is_line.size, dtype = object)
+		first[~is_line] = coords[:,0].tolist()
+		second[~is_line] = coords[:,1].tolist()
+		first[is_line] = point_ids[:,0].tolist()
+		second[is_line] = point_ids[:,1].tolist()
+		templates = np.where(is_line, line_string + LINE, template).astype(object)
+		self.__write_rows(templates, [np.asarray(ids, dtype = int), first, second])
+
+	def line_loop( self, loop_id, line_ids ):
+		self.write("Line Loop(%i) = {%s};\n" % (loop_id, _id_list(line_ids, self.use_ranges)))
+
+	def plane_surface( self, surface_id, line_loops ):
+		self.write("Plane Surface(%i) = {%s};\n" % (surface_id, _id_list(line_loops, self.use_ranges)))
+
+	def compound_line( self, line_id, line_ids ):
+		self.write("Compound Line(%i) = {%s};\n" % (line_id, _id_list(line_ids, self.use_ranges)))
+
+	"""
+	@param entity : the type of the physical group, e.g. Line or Surface
+	"""
+	def physical( self, entity, physical_id, ids ):
+		self.write("Physical %s(%i) = {%s};\n" % (entity, physical_id, _id_list(ids, self.use_ranges)))
+
+	"""
+	@param options : list of (option, value) pairs, the values are written as they are given
+	"""
+	def field( self, field_id, field_type, options = [] ):
+		self.write("Field[%i] = %s;\n" % (field_id, field_type))
+		for option, value in options:
+			self.write("Field[%i].%s = %s;\n" % (field_id, option, value))
+
+	"""
+	The rows are formatted batch_size at a time by repeating the template over the
+	interleaved columns, so there is a single format per batch rather than one per
+	entity. Each column keeps its own type, so the ids stay integers.
+	@param template : the format of every row, or an array of the format of each row
+	"""
+	def __write_rows( self, template, columns ):
+		for start in range(0, len(columns[0]), self.batch_size):
+			batch = [column[start:start + self.batch_size].tolist() for column in columns]
+			values = [None] * (len(batch[0]) * len(batch))
+			for k in range(len(batch)):
+				values[k::len(batch)] = batch[k]
+			if isinstance(template, basestring):
+				batch_template = template * len(batch[0])
+			else:
+				batch_template = "".join(template[start:start + self.batch_size].tolist())
+			self.write(batch_template % tuple(values))
+
+	def flush( self ):
+		if not self.buffer:
+			return
+		chunk = "".join(self.buffer)
+		self.buffer = []
+		self.buffered = 0
+		if self.stream is None:
+			self.ready.append(chunk)
+		else:
+			self.stream.write(chunk)
+
+	"""
+	Generator of the chunks of text buffered since the last call, only used when there
+	is no stream.
+	"""
+	def chunks( self ):
+		self.flush()
+		while self.ready:
+			yield self.ready.popleft()
+
+	def close( self ):
+		self.flush()
+		if self.stream is not None:
+			self.stream.close()
+
+"""
+This method is a generator of the text of a geo file given its records.
+@param records : sequence of tuples of a GeoWriter method name and its arguments,
+                 e.g. ("points", ids, coords) or ("line_loop", 1, [1, 2, 3])
+@return : chunks of text, each about flush_size characters
+"""
+def geo_chunks( records, flush_size = 1 << 20, use_ranges = False ):
+	writer = GeoWriter(None, flush_size, use_ranges = use_ranges)
+	for record in records:
+		getattr(writer, record[0])(*record[1:])
+		while writer.ready:
+			yield writer.ready.popleft()
+	for chunk in writer.chunks():
+		yield chunk
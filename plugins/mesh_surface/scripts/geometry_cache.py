@@ -0,0 +1,176 @@
+
+##########################################################################
+#
+#  QGIS-meshing plugins.
+#
+#  Copyright (C) 2012-2013 Imperial College London and others.
+#
+#  Please see the AUTHORS file in the main source directory for a
+#  full list of copyright holders.
+#
+#  Dr Adam S. Candy, adam.candy@imperial.ac.uk
+#  Applied Modelling and Computation Group
+#  Department of Earth Science and Engineering
+#  Imperial College London
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation,
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+#  USA
+#
+##########################################################################
+
+
+"""
+This module keeps the domains made by DefineDomain.define_bounds, with their boundary
+ids, in .npz files so a run over the same shapefiles with the same settings can go
+straight to writing the geo file. The files are named by a hash of the contents of the
+shapefiles (.shp, .dbf and .shx) and of the settings, so a changed shapefile is never
+read from the cache. Once the files take more than the size cap the ones used longest
+ago are removed.
+"""
+
+import os
+import hashlib
+import tempfile
+import zipfile
+import numpy as np
+from domain_geometry import DomainGeometry, BoundaryRuns
+
+#changed whenever the contents of the cache files change
+CACHE_VERSION = 1
+
+"""
+@param files    : the shapefiles, each given by its .shp file
+@param settings : anything else the domain depends on, given by its repr
+@return : the hash of the contents of the files and of the settings
+"""
+def cache_key( files, settings ):
+	key = hashlib.sha1(repr((CACHE_VERSION, settings)))
+	for filename in files:
+		for extension in ('.shp', '.dbf', '.shx'):
+			part = os.path.splitext(str(filename))[0] + extension
+			if not os.path.exists(part):
+				key.update('no %s' % extension)
+				continue
+			data = open(part, 'rb')
+			block = data.read(1 << 20)
+			while block:
+				key.update(block)
+				block = data.read(1 << 20)
+			data.close()
+	return key.hexdigest()
+
+"""
+@return : the hash of the contents of the arrays, for settings which are arrays
+"""
+def array_hash( *arrays ):
+	key = hashlib.sha1()
+	for array in arrays:
+		array = np.ascontiguousarray(array, dtype = np.float64)
+		key.update(repr(array.shape))
+		key.update(array.tostring())
+	return key.hexdigest()
+
+"""
+@return : whether the offsets of the geometry and of its runs agree with its arrays
+"""
+def _is_whole( geometry ):
+	parts = geometry.part_offsets.size - 1
+	if geometry.part_offsets.size == 0 or geometry.part_offsets[-1] != geometry.coords.shape[0] or geometry.region_ids.size != parts:
+		return False
+	if geometry.shape_offsets.size == 0 or geometry.shape_offsets[-1] != parts:
+		return False
+	runs = geometry.boundary_runs
+	if runs is None:
+		return True
+	return runs.part_offsets.size == parts + 1 and runs.part_offsets[-1] == len(runs) and \
+		runs.starts.size == len(runs) and runs.lengths.size == len(runs) and \
+		runs.lengths.sum() == geometry.segment_offsets()[-1]
+
+class GeometryCache:
+
+	"""
+	@param directory : the directory the files are kept in, made when it is first used
+	@param max_bytes : the size cap of all the files together
+	"""
+	def __init__( self, directory, max_bytes = 256 << 20 ):
+		self.directory = directory
+		self.max_bytes = max_bytes
+
+	def path( self, key ):
+		return os.path.join(self.directory, key + '.npz')
+
+	"""
+	A file which can not be read or does not hold a whole geometry is removed, so it is
+	made again by the next store.
+	@return : the DomainGeometry kept under the key, or None if there is none
+	"""
+	def load( self, key ):
+		path = self.path(key)
+		if not os.path.exists(path):
+			return None
+		try:
+			data = np.load(path)
+			try:
+				geometry = DomainGeometry(data['coords'], data['part_offsets'], data['shape_offsets'], data['region_ids'])
+				if 'run_ids' in data.files:
+					geometry.boundary_runs = BoundaryRuns(data['run_part_offsets'], data['run_starts'], data['run_lengths'], data['run_ids'])
+			finally:
+				data.close()
+		except (IOError, KeyError, ValueError, zipfile.BadZipfile):
+			geometry = None
+		if geometry is None or not _is_whole(geometry):
+			os.remove(path)
+			return None
+		#the time the file was last used orders the files for removal
+		os.utime(path, None)
+		return geometry
+
+	"""
+	This method keeps the geometry under the key, writing it to a temporary file first
+	so a file is never read half written, and then removes the files used longest ago
+	until the cache is under its size cap.
+	"""
+	def store( self, key, geometry ):
+		if not os.path.isdir(self.directory):
+			os.makedirs(self.directory)
+		arrays = {'coords' : geometry.coords, 'part_offsets' : geometry.part_offsets,
+			'shape_offsets' : geometry.shape_offsets, 'region_ids' : geometry.region_ids}
+		runs = geometry.boundary_runs
+		if runs is not None:
+			arrays.update({'run_part_offsets' : runs.part_offsets, 'run_starts' : runs.starts,
+				'run_lengths' : runs.lengths, 'run_ids' : runs.ids})
+		handle, temporary = tempfile.mkstemp(suffix = '.part', dir = self.directory)
+		output = os.fdopen(handle, 'wb')
+		np.savez(output, **arrays)
+		output.close()
+		if os.path.exists(self.path(key)):
+			os.remove(self.path(key))
+		os.rename(temporary, self.path(key))
+		self.evict()
+
+	def evict( self ):
+		entries = []
+		for name in os.listdir(self.directory):
+			if name.endswith('.npz'):
+				path = os.path.join(self.directory, name)
+				entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+		entries.sort()
+		total = sum([size for used, size, path in entries])
+		#the newest file is kept even when it is over the cap on its own
+		for used, size, path in entries[:-1]:
+			if total <= self.max_bytes:
+				break
+			os.remove(path)
+			total -= size
@@ -39,70 +39,144 @@ import shapefile
 from shapely.geometry import MultiLineString, Polygon
 import sys
 from numpy import pi, cos, sin, array
+import numpy as np
+from itertools import izip
+from domain_geometry import DomainGeometry, GeometryBuilder
 
 __islandField = "Island"
 __boundaryField = "Boundary"
 
 R = 6.3781e6
 
+"""
+This method finds the areas of the islands of multipart shapes in a single pass over
+all their points, as the area of the ring in degrees, by the shoelace formula, scaled
+to the sphere over the latitudes of its bounding box.
+@param coords  : Nx2 array of the points of all the rings one after the other
+@param offsets : the first point of each ring followed by the number of points
+@return : the scaled area of every ring
+"""
+def _ring_areas(coords, offsets):
+  lengths = np.diff(offsets)
+  areas = np.zeros(lengths.size)
+  bottom = np.zeros(lengths.size)
+  top = np.zeros(lengths.size)
+  rings = np.flatnonzero(lengths > 0)
+  if rings.size == 0:
+    return areas
+  ring = np.repeat(np.arange(lengths.size), lengths)
+  first = offsets[:-1]
+  last = offsets[1:] - 1
+  #a ring given closed is taken without its last point, as shapely closes the ring
+  ends = np.clip(np.column_stack((first, last)), 0, coords.shape[0] - 1)
+  closed = (lengths > 1) & np.all(coords[ends[:,0]] == coords[ends[:,1]], axis = 1)
+  last = np.where(closed, last - 1, last)
+  #only the points used are taken, so the point after the last point of a closed ring,
+  #which is past the end of coords for the last ring, is never looked up
+  index = np.flatnonzero(np.arange(coords.shape[0]) <= last[ring])
+  ring = ring[index]
+  following = np.where(index == last[ring], first[ring], index + 1)
+  previous = np.where(index == first[ring], last[ring], index - 1)
+  x = coords[index,0] - coords[first[ring],0]
+  terms = x * (coords[previous,1] - coords[following,1])
+  areas = np.bincount(ring, weights = terms, minlength = lengths.size) / 2
+  bottom[rings] = np.minimum.reduceat(coords[:,1], first[rings])
+  top[rings] = np.maximum.reduceat(coords[:,1], first[rings])
+  phi1 = bottom*pi/180
+  phi3 = top*pi/180
+  olderr = np.seterr(divide = 'ignore', invalid = 'ignore')
+  Sf = 2*34*pi*R**2*(phi3*sin(phi3)-phi1*sin(phi1))/(pi*(phi3-phi1)*1000000000000)
+  np.seterr(**olderr)
+  return abs(areas*Sf)
+
+"""
+@param areas     : the areas of the islands of a shape
+@param threshold : the area below which islands are dropped, or None to keep them all
+@return : mask of the islands which are kept
+"""
+def _above_threshold(areas, threshold):
+  if threshold is None:
+    return np.ones(areas.size, dtype = bool)
+  if isinstance(threshold, (int, long, float, np.number)):
+    return areas > threshold
+  return np.array([area > threshold for area in areas], dtype = bool)
+
 """
 This method gets the points of the all the shapes in the shapefile given
 @param filename : 	specifies the filename of the shapefile which has
 					to be converted to .geo file
+@param region : 	(xmin, ymin, xmax, ymax) of the region of interest, only
+					the shapes whose bounding boxes overlap it are read
+@param save_index : 	writes the bounding box index of the shapefile next
+					to it, so it is not built again for the next region,
+					a warning being printed when it can not be written
 @return	: 	returns a list of points containing all the points
 			for the shapes within the shapefile and the records
 			of the given shapefile
 """
 
-class ShapeData:
+class ShapeData(object):
 
-  def __init__(self, filename, threshold, is_domain):
+  def __init__(self, filename, threshold, is_domain, region = None, save_index = False):
     #try:
     bounds = shapefile.Reader(str(filename))
     #except shapefile.ShapefileException:
     #raise AssertionError()
     try:
-      records = bounds.records()
+      # The shapes and records are read one at a time, the points of a shape being a
+      #  view of the mapped file, and the parts kept are copied straight into the
+      #  geometry, so only the kept points are held in memory.
+      records = []
       regionIDs = []
-      pointsList = []
-      shapes = bounds.shapes()
       shapeList = []
-      PartNumber = 0
-      # Loop through shape-records and extract point coordinates and
-      #  Regiod IDs
-      for shapeNo in range(len(shapes)):
-        shape = shapes[shapeNo]
-        ID = records[shapeNo][0]
-        points = shape.points
-        shapeParts = shape.parts
+      builder = GeometryBuilder()
+      if region is None:
+        shapeRecords = izip(bounds.iter_shape_arrays(), bounds.iterRecords())
+      else:
+        try:
+          bounds.bbox_index(save = save_index)
+        except (IOError, OSError), e:
+          print "Warning:  The bounding box index of %s could not be saved, %s" % (filename, e)
+        shapeRecords = ((bounds.shape_arrays(i), bounds.record(i)) for i in bounds.shape_ids_in_bbox(*region))
+      for (coords, shapeParts), record in shapeRecords:
+        ID = record[0]
+        records.append(record)
 #        print shapeParts
-        shapeList.append(PartNumber)
+        shapeList.append(len(regionIDs))
+        builder.start_shape()
         if len(shapeParts) == 1 :
-          pointsList.append(points)
+          builder.add_part(coords, ID)
           regionIDs.append(ID)
-          PartNumber += 1
         else:
-          shapeParts.append(len(points)-1)
+          # each part runs to the start of the next, the last leaving out the last point
+          shapeParts = list(shapeParts) + [len(coords) - 1]
+          areas = _ring_areas(coords[shapeParts[0]:shapeParts[-1]], np.array(shapeParts) - shapeParts[0])
+          islandKept = _above_threshold(areas, threshold)
           for i in range(len(shapeParts)-1):
-            ptList = (points[shapeParts[i]:shapeParts[i+1]])
-            phi = array(Polygon(ptList).bounds)*pi/180
-            Sf = 2*34*pi*R**2*(phi[3]*sin(phi[3])-phi[1]*sin(phi[1]))/(pi*(phi[3]-phi[1])*1000000000000)
-            area = abs(Polygon(ptList).area*Sf)
-            if is_domain and area > threshold:
+            if is_domain and islandKept[i]:
+              builder.add_part(coords[shapeParts[i]:shapeParts[i+1]], ID)
               regionIDs.append(ID)
-              pointsList.append(ptList)
-              PartNumber += 1
             if is_domain :
-              pointsList[-1].append(pointsList[-1][0])
+              builder.close_part()
 
     except IOError:
       raise AssertionError()
+    finally:
+      # the points have been copied into the geometry, so the mapped file is no longer used
+      bounds.close()
 
-    self.points = pointsList
+    self.geometry = builder.geometry()
     self.records = records
     self.regionIDs = regionIDs
     self.shapes = shapeList
 
+  @property
+  def points(self):
+    """
+    The points of each part as lists, the geometry holds them as arrays.
+    """
+    return [part.tolist() for part in self.geometry.parts()]
+
 
   def __saveShapeFile(self, boundaryIds, bounds, filename):
     """
@@ -0,0 +1,311 @@
+
+##########################################################################
+#
+#  QGIS-meshing plugins.
+#
+#  Copyright (C) 2012-2013 Imperial College London and others.
+#
+#  Please see the AUTHORS file in the main source directory for a
+#  full list of copyright holders.
+#
+#  Dr Adam S. Candy, adam.candy@imperial.ac.uk
+#  Applied Modelling and Computation Group
+#  Department of Earth Science and Engineering
+#  Imperial College London
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation,
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+#  USA
+#
+##########################################################################
+
+
+"""
+This module finds which of the boundary id polygons a boundary line intersects. The
+polygons are put in a bounding box tree (the shapely STRtree) once and wrapped as
+prepared geometries, so each line is only tested against the polygons whose bounding
+box it overlaps. Older versions of shapely have no STRtree, every polygon is then a
+candidate as it used to be.
+
+Large numbers of lines are classified without making a shapely object for each one by
+classify_segments, which tests the lines against the edges of each polygon with arrays.
+A line intersects a polygon when it touches one of its edges or when its first point
+is inside it, found by counting the edges crossed by a ray from the point. The signs of
+the orientations these tests use are checked exactly where rounding could change them,
+so the result is the same as shapely's.
+
+classify_segments_raster first burns the polygons into a grid of the position of the
+last polygon holding the centre of each cell, and marks the cells any polygon edge
+passes through. A line whose bounding box has no marked cell crosses no polygon edge
+and so has the polygon of any cell in the box. Only the other lines are classified with
+classify_segments, so the result is the same.
+"""
+
+from fractions import Fraction
+import numpy as np
+from shapely.prepared import prep
+try:
+	from shapely.strtree import STRtree
+except ImportError:
+	STRtree = None
+
+class PolygonIndex:
+
+	"""
+	@param polygons : list of shapely polygons, later polygons taking precedence
+	"""
+	def __init__( self, polygons ):
+		self.polygons = list(polygons)
+		self.prepared = [prep(polygon) for polygon in self.polygons]
+		self.tree = None
+		self.raster = None
+		if STRtree is not None and self.polygons:
+			self.tree = STRtree(self.polygons)
+			#older trees give back the polygons rather than their positions
+			self.positions = dict((id(polygon), n) for n, polygon in enumerate(self.polygons))
+
+	def __len__( self ):
+		return len(self.polygons)
+
+	"""
+	@return : the positions of the polygons whose bounding box overlaps that of the
+	          geometry, last first
+	"""
+	def candidates( self, geometry ):
+		if self.tree is None:
+			return range(len(self.polygons) - 1, -1, -1)
+		found = self.tree.query(geometry)
+		return sorted([self.positions.get(id(polygon), polygon) for polygon in found], reverse = True)
+
+	"""
+	@return : the position of the last polygon which intersects the geometry, or -1
+	"""
+	def last_intersecting( self, geometry ):
+		for n in self.candidates(geometry):
+			if self.prepared[n].intersects(geometry):
+				return n
+		return -1
+
+	"""
+	This method gives the same result as last_intersecting for every line from starts
+	to ends. The lines are taken against each polygon, last first, in chunks of at most
+	chunk_size line and edge pairs, leaving out the lines which already have a polygon
+	or are outside the bounding box of the polygon.
+	@param starts     : Nx2 array of the first point of every line
+	@param ends       : Nx2 array of the second point of every line
+	@param chunk_size : the largest number of line and edge pairs tested at once
+	@return : array of the position of the last polygon each line intersects, or -1
+	"""
+	def classify_segments( self, starts, ends, chunk_size = 1 << 18 ):
+		starts = np.asarray(starts, dtype = np.float64).reshape(-1, 2)
+		ends = np.asarray(ends, dtype = np.float64).reshape(-1, 2)
+		result = -np.ones(starts.shape[0], dtype = int)
+		lower = np.minimum(starts, ends)
+		upper = np.maximum(starts, ends)
+		for n in range(len(self.polygons) - 1, -1, -1):
+			if self.polygons[n].is_empty:
+				continue
+			edge_starts, edge_ends = _polygon_edges(self.polygons[n])
+			x0, y0, x1, y1 = self.polygons[n].bounds
+			lines = np.flatnonzero((result < 0) & (upper[:,0] >= x0) & (lower[:,0] <= x1) & (upper[:,1] >= y0) & (lower[:,1] <= y1))
+			step = max(1, chunk_size // max(1, edge_starts.shape[0]))
+			for k in range(0, lines.size, step):
+				chunk = lines[k:k + step]
+				hit = _segments_intersect_polygon(starts[chunk], ends[chunk], edge_starts, edge_ends)
+				result[chunk[hit]] = n
+		return result
+
+	"""
+	This method gives the same result as classify_segments using a lookup grid of the
+	polygons, which is made the first time and kept for later calls with the same
+	resolution.
+	@param resolution : the size of the cells of the grid, in the units of the points
+	@return : as classify_segments
+	"""
+	def classify_segments_raster( self, starts, ends, resolution, chunk_size = 1 << 18 ):
+		starts = np.asarray(starts, dtype = np.float64).reshape(-1, 2)
+		ends = np.asarray(ends, dtype = np.float64).reshape(-1, 2)
+		result = -np.ones(starts.shape[0], dtype = int)
+		polygons = [polygon for polygon in self.polygons if not polygon.is_empty]
+		if not polygons or starts.shape[0] == 0:
+			return result
+		resolution, origin, values, edge_counts = self.burn(resolution)
+		#the cells of the bounding box of every line, widened by the same margin as the edges
+		lower = np.floor((np.minimum(starts, ends) - origin) / resolution - _CELL_MARGIN).astype(int)
+		upper = np.floor((np.maximum(starts, ends) - origin) / resolution + _CELL_MARGIN).astype(int)
+		size = np.array(values.shape[::-1])
+		outside = np.any((upper < 0) | (lower >= size), axis = 1)
+		lower = np.clip(lower, 0, size - 1)
+		upper = np.clip(upper, 0, size - 1)
+		edges = edge_counts[upper[:,1] + 1, upper[:,0] + 1] - edge_counts[lower[:,1], upper[:,0] + 1] \
+			- edge_counts[upper[:,1] + 1, lower[:,0]] + edge_counts[lower[:,1], lower[:,0]]
+		clear = ~outside & (edges == 0)
+		result[clear] = values[lower[clear,1], lower[clear,0]]
+		exact = np.flatnonzero(~outside & ~clear)
+		result[exact] = self.classify_segments(starts[exact], ends[exact], chunk_size)
+		return result
+
+	"""
+	This method makes the lookup grid of classify_segments_raster if it has not already
+	been made for this resolution.
+	@return : the resolution followed by the grid, see __burn
+	"""
+	def burn( self, resolution ):
+		if self.raster is None or self.raster[0] != resolution:
+			self.raster = (resolution,) + self.__burn(resolution)
+		return self.raster
+
+	"""
+	@return : the origin of the grid, the position of the last polygon holding the centre
+	          of every cell, or -1, and the sums of the cells holding a polygon edge over
+	          the cells below and to the left of every cell, so the number in any box of
+	          cells is found from its corners
+	"""
+	def __burn( self, resolution ):
+		bounds = np.array([polygon.bounds for polygon in self.polygons if not polygon.is_empty])
+		origin = bounds[:,:2].min(axis = 0)
+		columns, rows = np.floor((bounds[:,2:].max(axis = 0) - origin) / resolution).astype(int) + 1
+		values = -np.ones((rows, columns), dtype = int)
+		edge_cells = np.zeros((rows, columns), dtype = bool)
+		for n in range(len(self.polygons)):
+			if not self.polygons[n].is_empty:
+				edge_starts, edge_ends = _polygon_edges(self.polygons[n])
+				edge_starts = (edge_starts - origin) / resolution
+				edge_ends = (edge_ends - origin) / resolution
+				values[_inside_cells(edge_starts, edge_ends, rows, columns)] = n
+				column, row = _edge_cells(edge_starts, edge_ends)
+				keep = (column >= 0) & (column < columns) & (row >= 0) & (row < rows)
+				edge_cells[row[keep], column[keep]] = True
+		edge_counts = np.zeros((rows + 1, columns + 1), dtype = int)
+		edge_counts[1:,1:] = np.cumsum(np.cumsum(edge_cells, axis = 0), axis = 1)
+		return origin, values, edge_counts
+
+#cells within this fraction of a cell of an edge are marked, so rounding cannot leave out
+#a cell an edge passes through
+_CELL_MARGIN = 1e-6
+
+"""
+This method fills the rows of the grid between the edges of a polygon, taking the edges
+crossing the centre line of each row in pairs from the left. The cells on the edges are
+marked by _edge_cells, so it does not matter which way a centre on an edge goes.
+@param edge_starts, edge_ends : Ex2 arrays of the points of the edges in grid coordinates
+@return : boolean array of the cells whose centre is inside the polygon
+"""
+def _inside_cells( edge_starts, edge_ends, rows, columns ):
+	bottom = np.minimum(edge_starts[:,1], edge_ends[:,1])
+	top = np.maximum(edge_starts[:,1], edge_ends[:,1])
+	#the rows whose centre line, at row + 0.5, is in [bottom, top)
+	first = np.clip(np.ceil(bottom - 0.5).astype(int), 0, rows)
+	counts = np.clip(np.ceil(top - 0.5).astype(int), 0, rows) - first
+	edge = np.repeat(np.arange(edge_starts.shape[0]), counts)
+	row = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+	p = edge_starts[edge]
+	q = edge_ends[edge]
+	x = p[:,0] + (row + 0.5 - p[:,1]) * (q[:,0] - p[:,0]) / (q[:,1] - p[:,1])
+	order = np.lexsort((x, row))
+	row = row[order][0::2]
+	x = x[order]
+	filled = np.zeros((rows, columns + 1), dtype = int)
+	np.add.at(filled, (row, np.clip(np.ceil(x[0::2] - 0.5).astype(int), 0, columns)), 1)
+	np.add.at(filled, (row, np.clip(np.ceil(x[1::2] - 0.5).astype(int), 0, columns)), -1)
+	return np.cumsum(filled, axis = 1)[:,:columns] > 0
+
+"""
+This method gives the cells the edges pass through, in grid coordinates where cell
+(column, row) is the unit square from (column, row).
+@param edge_starts, edge_ends : Ex2 arrays of the points of the edges
+@return : arrays of the columns and rows of the cells, which may repeat
+"""
+def _edge_cells( edge_starts, edge_ends ):
+	left = np.where(edge_starts[:,0] <= edge_ends[:,0], edge_starts.T, edge_ends.T).T
+	right = np.where(edge_starts[:,0] <= edge_ends[:,0], edge_ends.T, edge_starts.T).T
+	first = np.floor(left[:,0] - _CELL_MARGIN).astype(int)
+	last = np.floor(right[:,0] + _CELL_MARGIN).astype(int)
+	#the part of each edge within each of the columns it crosses
+	counts = last - first + 1
+	edge = np.repeat(np.arange(left.shape[0]), counts)
+	column = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+	width = right[edge,0] - left[edge,0]
+	slope = np.where(width > 0, (right[edge,1] - left[edge,1]) / np.where(width > 0, width, 1), 0)
+	x0 = np.clip(column - _CELL_MARGIN, left[edge,0], right[edge,0])
+	x1 = np.clip(column + 1 + _CELL_MARGIN, left[edge,0], right[edge,0])
+	y0 = np.where(width > 0, left[edge,1] + slope * (x0 - left[edge,0]), left[edge,1])
+	y1 = np.where(width > 0, left[edge,1] + slope * (x1 - left[edge,0]), right[edge,1])
+	bottom = np.floor(np.minimum(y0, y1) - _CELL_MARGIN).astype(int)
+	top = np.floor(np.maximum(y0, y1) + _CELL_MARGIN).astype(int)
+	counts = top - bottom + 1
+	row = np.repeat(bottom - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+	return np.repeat(column, counts), row
+
+"""
+@return : the first and second points of the edges of all the rings of the polygon,
+          leaving out edges of no length
+"""
+def _polygon_edges( polygon ):
+	edge_starts = []
+	edge_ends = []
+	for ring in [polygon.exterior] + list(polygon.interiors):
+		coords = np.asarray(ring.coords, dtype = np.float64)[:,:2]
+		keep = np.any(coords[:-1] != coords[1:], axis = 1)
+		edge_starts.append(coords[:-1][keep])
+		edge_ends.append(coords[1:][keep])
+	return np.concatenate(edge_starts), np.concatenate(edge_ends)
+
+"""
+This method gives the sign of the orientation of r relative to the line from p to q,
+positive when r is on the left. The arrays are broadcast together. Where the size of
+the determinant is within its rounding error bound it is worked out again exactly.
+"""
+def _orientation( p, q, r ):
+	left = (q[...,0] - p[...,0]) * (r[...,1] - p[...,1])
+	right = (q[...,1] - p[...,1]) * (r[...,0] - p[...,0])
+	det = left - right
+	bound = 3.3306690738754716e-16 * (np.abs(left) + np.abs(right))
+	sign = np.sign(det)
+	uncertain = np.abs(det) < bound
+	if uncertain.any():
+		p, q, r = np.broadcast_arrays(p, q, r)
+		for index in zip(*np.nonzero(uncertain)):
+			px, py = map(Fraction, p[index])
+			qx, qy = map(Fraction, q[index])
+			rx, ry = map(Fraction, r[index])
+			exact = (qx - px) * (ry - py) - (qy - py) * (rx - px)
+			sign[index] = (exact > 0) - (exact < 0)
+	return sign
+
+"""
+@param starts, ends           : Sx2 arrays of the points of the lines
+@param edge_starts, edge_ends : Ex2 arrays of the points of the edges of the polygon
+@return : boolean array of the lines which intersect the polygon
+"""
+def _segments_intersect_polygon( starts, ends, edge_starts, edge_ends ):
+	a = starts[:,np.newaxis,:]
+	b = ends[:,np.newaxis,:]
+	c = edge_starts[np.newaxis,:,:]
+	d = edge_ends[np.newaxis,:,:]
+	o1 = _orientation(c, d, a)
+	o2 = _orientation(c, d, b)
+	o3 = _orientation(a, b, c)
+	o4 = _orientation(a, b, d)
+	#collinear lines and edges only touch where their extents overlap
+	collinear = (o1 == 0) & (o2 == 0) & (o3 == 0) & (o4 == 0)
+	overlap = np.all((np.maximum(np.minimum(a, b), np.minimum(c, d)) <= np.minimum(np.maximum(a, b), np.maximum(c, d))), axis = 2)
+	touches = (o1 * o2 <= 0) & (o3 * o4 <= 0) & (~collinear | overlap)
+	#a line touching no edge is inside if its first point is, an edge crossing the ray
+	#to the right of the point when the point is on the left of an edge going up
+	above_start = c[...,1] > a[...,1]
+	above_end = d[...,1] > a[...,1]
+	crossings = (above_start != above_end) & (o1 != 0) & ((o1 > 0) == above_end)
+	inside = np.sum(crossings, axis = 1) % 2 == 1
+	return np.any(touches, axis = 1) | inside
@@ -44,6 +44,12 @@ import os
 import sys
 import time
 import array
+import mmap
+try:
+    import numpy
+except ImportError:
+    # the array methods of the Reader need numpy, the rest of the module does not
+    numpy = None
 #
 # Constants for shape types
 NULL = 0
@@ -61,6 +67,9 @@ POLYGONM = 25
 MULTIPOINTM = 28
 MULTIPATCH = 31
 
+# Version of the bounding box index sidecar written by Reader.bbox_index
+BBOX_INDEX_VERSION = 1
+
 PYTHON3 = sys.version_info[0] == 3
 
 def b(v):
@@ -342,6 +351,238 @@ class Reader:
             shapes.append(self.__shape())
         return shapes
 
+    def close(self):
+        """Unmaps the .shp file and closes the files opened by load. The
+        arrays given by shape_arrays, iter_shape_arrays and shapes_as_arrays
+        are views of the mapped file, so they must be copied before the
+        Reader is closed."""
+        shpBuffer = getattr(self, "_shpBuffer", None)
+        if isinstance(shpBuffer, mmap.mmap):
+            shpBuffer.close()
+        self._shpBuffer = None
+        if self.shapeName != "Not specified":
+            for f in (self.shp, self.shx, self.dbf):
+                if f is not None:
+                    f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def __shpBuffer(self):
+        """Maps the .shp file into memory, or reads it whole if it is a
+        file-like object with no file descriptor, so the points can be
+        viewed in place by numpy."""
+        if numpy is None:
+            raise ShapefileException("The shape arrays of a Reader require numpy.")
+        if getattr(self, "_shpBuffer", None) is None:
+            shp = self.__getFileObj(self.shp)
+            try:
+                self._shpBuffer = mmap.mmap(shp.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, ValueError, EnvironmentError):
+                shp.seek(0)
+                self._shpBuffer = shp.read()
+        return self._shpBuffer
+
+    def __shapeOffsets(self):
+        """Returns the offset in the .shp file of every shape, from the .shx
+        index file if there is one and otherwise by walking the record
+        headers of the .shp file."""
+        if getattr(self, "_shapeOffsets", None) is not None:
+            return self._shapeOffsets
+        if self.shx:
+            self.shx.seek(24)
+            shxLength = unpack(">i", self.shx.read(4))[0] * 2
+            self.shx.seek(100)
+            index = numpy.frombuffer(self.shx.read(shxLength - 100), ">i4")
+            self._shapeOffsets = index[0::2].astype(int) * 2
+            return self._shapeOffsets
+        buf = self.__shpBuffer()
+        offsets = []
+        offset = 100
+        end = min(self.shpLength, len(buf))
+        while offset + 12 <= end:
+            offsets.append(offset)
+            length = unpack(">i", buf[offset + 4:offset + 8])[0] * 2
+            # a broken record header ends the walk rather than looping
+            if length <= 0:
+                break
+            offset += 8 + length
+        self._shapeOffsets = numpy.array(offsets, dtype=int)
+        return self._shapeOffsets
+
+    def __shapeArrays(self, offset):
+        """Returns the points of the shape at an offset in the .shp file as
+        an Nx2 view of the mapped file, and the first point of each part."""
+        buf = self.__shpBuffer()
+        shapeType = unpack("<i", buf[offset + 8:offset + 12])[0]
+        if shapeType in (3,5,13,15,23,25,31):
+            (nParts, nPoints) = unpack("<2i", buf[offset + 44:offset + 52])
+            parts = numpy.frombuffer(buf, "<i4", nParts, offset + 52).astype(int)
+            start = offset + 52 + 4 * nParts
+            # Multipatch part types follow the parts
+            if shapeType == 31:
+                start += 4 * nParts
+        elif shapeType in (8,18,28):
+            nPoints = unpack("<i", buf[offset + 44:offset + 48])[0]
+            parts = numpy.zeros(1, dtype=int)
+            start = offset + 48
+        elif shapeType in (1,11,21):
+            nPoints = 1
+            parts = numpy.zeros(1, dtype=int)
+            start = offset + 12
+        else:
+            nPoints = 0
+            parts = numpy.zeros(0, dtype=int)
+            start = offset
+        points = numpy.frombuffer(buf, "<f8", 2 * nPoints, start).reshape(nPoints, 2)
+        return (points, parts)
+
+    def shape_arrays(self, i=0):
+        """Returns the points of a shape as an Nx2 numpy array, which is a
+        read-only view of the .shp file rather than a copy, and the first
+        point of each of its parts. Only the x and y of each point are
+        given."""
+        i = self.__restrictIndex(i)
+        return self.__shapeArrays(self.__shapeOffsets()[i])
+
+    def iter_shape_arrays(self):
+        """Serves up the points and parts of the shapes in a shapefile as
+        shape_arrays does, as an iterator."""
+        for offset in self.__shapeOffsets():
+            yield self.__shapeArrays(offset)
+
+    def shapes_as_arrays(self):
+        """Returns all the shapes as a single Nx2 numpy array of their
+        points, the first point of each part followed by the number of
+        points, and the first part of each shape followed by the number
+        of parts."""
+        points = []
+        parts = []
+        nParts = [0]
+        nPoints = 0
+        for (shapePoints, shapeParts) in self.iter_shape_arrays():
+            points.append(shapePoints)
+            parts.append(shapeParts + nPoints)
+            nParts.append(len(shapeParts))
+            nPoints += len(shapePoints)
+        parts.append(numpy.array([nPoints], dtype=int))
+        if points:
+            coords = numpy.concatenate(points)
+        else:
+            coords = numpy.zeros((0, 2))
+        return (coords, numpy.concatenate(parts), numpy.cumsum(nParts))
+
+    def shape_bboxes(self):
+        """Returns the bounding box (xmin, ymin, xmax, ymax) of every shape
+        as an Nx4 numpy array, read from the record headers without
+        decoding the points. Null shapes have a box of nan, which no box
+        overlaps."""
+        if getattr(self, "_shapeBboxes", None) is not None:
+            return self._shapeBboxes
+        offsets = self.__shapeOffsets()
+        raw = numpy.frombuffer(self.__shpBuffer(), numpy.uint8)
+        shapeTypes = raw[(offsets + 8)[:,None] + numpy.arange(4)].copy().view("<i4").ravel()
+        bboxes = numpy.empty((len(offsets), 4))
+        bboxes.fill(numpy.nan)
+        hasBbox = numpy.in1d(shapeTypes, (3,5,8,13,15,18,23,25,28,31))
+        bboxes[hasBbox] = raw[(offsets[hasBbox] + 12)[:,None] + numpy.arange(32)].copy().view("<f8")
+        # a single point is its own box
+        isPoint = numpy.in1d(shapeTypes, (1,11,21))
+        points = raw[(offsets[isPoint] + 12)[:,None] + numpy.arange(16)].copy().view("<f8")
+        bboxes[isPoint] = numpy.hstack((points, points))
+        self._shapeBboxes = bboxes
+        return bboxes
+
+    def bbox_index(self, leafSize=64, save=False):
+        """Returns a packed index of the shape bounding boxes, which are
+        sorted into leaves of leafSize shapes by sort-tile-recursive
+        packing so a box only has to be tested against the leaves it
+        overlaps. The index is read from the <shapefile>.bbox.npz sidecar
+        if it is newer than the .shp file, and written there when save
+        is True. An error writing the sidecar is raised once the index
+        is kept, so the index can still be used."""
+        if getattr(self, "_bboxIndex", None) is not None:
+            return self._bboxIndex
+        sidecar = None
+        if self.shapeName != "Not specified":
+            sidecar = "%s.bbox.npz" % self.shapeName
+        index = self.__loadBboxIndex(sidecar)
+        if index is None:
+            bboxes = self.shape_bboxes()
+            n = len(bboxes)
+            centres = numpy.nan_to_num((bboxes[:,:2] + bboxes[:,2:]) / 2)
+            leaves = max(1, -(-n // leafSize))
+            tiles = int(numpy.ceil(numpy.sqrt(leaves)))
+            rankX = numpy.empty(n, dtype=int)
+            rankX[numpy.argsort(centres[:,0], kind="mergesort")] = numpy.arange(n)
+            order = numpy.lexsort((centres[:,1], rankX // (tiles * leafSize)))
+            starts = numpy.arange(0, n, leafSize)
+            if n:
+                packed = bboxes[order]
+                leafBoxes = numpy.column_stack((numpy.fmin.reduceat(packed[:,0], starts),
+                    numpy.fmin.reduceat(packed[:,1], starts), numpy.fmax.reduceat(packed[:,2], starts),
+                    numpy.fmax.reduceat(packed[:,3], starts)))
+            else:
+                leafBoxes = numpy.zeros((0, 4))
+            index = (leafSize, order, leafBoxes, bboxes)
+            self._bboxIndex = index
+            if save and sidecar is not None:
+                try:
+                    f = open(sidecar, "wb")
+                    try:
+                        numpy.savez(f, version=BBOX_INDEX_VERSION, shpLength=self.shpLength,
+                            leafSize=leafSize, order=order, leafBoxes=leafBoxes, bboxes=bboxes)
+                    finally:
+                        f.close()
+                except EnvironmentError:
+                    # a half written sidecar would be newer than the .shp file
+                    if os.path.isfile(sidecar):
+                        os.remove(sidecar)
+                    raise
+        self._bboxIndex = index
+        return index
+
+    def __loadBboxIndex(self, sidecar):
+        """Reads an index written by bbox_index, or returns None if there
+        is none or it is out of date."""
+        if sidecar is None or not os.path.exists(sidecar):
+            return None
+        if os.path.getmtime(sidecar) < os.path.getmtime("%s.shp" % self.shapeName):
+            return None
+        try:
+            f = open(sidecar, "rb")
+            try:
+                data = numpy.load(f)
+                if int(data["version"]) != BBOX_INDEX_VERSION or int(data["shpLength"]) != self.shpLength:
+                    return None
+                index = (int(data["leafSize"]), data["order"], data["leafBoxes"], data["bboxes"])
+            finally:
+                f.close()
+        except (EnvironmentError, ValueError, KeyError):
+            return None
+        self._shapeBboxes = index[3]
+        return index
+
+    def shape_ids_in_bbox(self, xmin, ymin, xmax, ymax):
+        """Returns the indices, in the order of the file, of the shapes
+        whose bounding boxes overlap the given box."""
+        (leafSize, order, leafBoxes, bboxes) = self.bbox_index()
+        leaves = numpy.flatnonzero((leafBoxes[:,0] <= xmax) & (leafBoxes[:,2] >= xmin) &
+            (leafBoxes[:,1] <= ymax) & (leafBoxes[:,3] >= ymin))
+        positions = (leaves[:,None] * leafSize + numpy.arange(leafSize)).ravel()
+        candidates = order[positions[positions < len(order)]]
+        boxes = bboxes[candidates]
+        overlap = (boxes[:,0] <= xmax) & (boxes[:,2] >= xmin) & (boxes[:,1] <= ymax) & (boxes[:,3] >= ymin)
+        return numpy.sort(candidates[overlap])
+
+    def shapes_in_bbox(self, xmin, ymin, xmax, ymax):
+        """Returns the shapes whose bounding boxes overlap the given box,
+        only these shapes being decoded."""
+        return [self.shape(i) for i in self.shape_ids_in_bbox(xmin, ymin, xmax, ymax)]
+
     def __dbfHeaderLength(self):
         """Retrieves the header length of a dbf file header."""
         if not self.__dbfHdrLength:
@@ -447,6 +688,20 @@ class Reader:
                 records.append(r)
         return records
 
+    def iterRecords(self):
+        """Serves up records in a dbf file as an iterator.
+        Useful for large shapefiles or dbf files."""
+        if not self.numRecords:
+            self.__dbfHeader()
+        f = self.__getFileObj(self.dbf)
+        f.seek(self.__dbfHeaderLength())
+        for i in range(self.numRecords):
+            r = self.__record()
+            position = f.tell()
+            if r:
+                yield r
+            f.seek(position)
+
     def shapeRecord(self, i=0):
         """Returns a combination geometry and attribute record for the
         supplied record index."""
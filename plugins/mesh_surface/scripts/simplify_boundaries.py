@@ -0,0 +1,344 @@
+
+##########################################################################
+#
+#  QGIS-meshing plugins.
+#
+#  Copyright (C) 2012-2013 Imperial College London and others.
+#
+#  Please see the AUTHORS file in the main source directory for a
+#  full list of copyright holders.
+#
+#  Dr Adam S. Candy, adam.candy@imperial.ac.uk
+#  Applied Modelling and Computation Group
+#  Department of Earth Science and Engineering
+#  Imperial College London
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation,
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+#  USA
+#
+##########################################################################
+
+
+"""
+This module simplifies the parts of a DomainGeometry with either Douglas-Peucker or
+Visvalingam-Whyatt, or decimates them to the mesh size metric. These work on every part
+at once with array operations.
+
+The points where the boundary id changes, the ends of the parts and the points where
+parts meet are never removed, so every line of the simplified domain has the same id
+as the lines it replaces. Between these points a boundary shared by two parts is the
+same list of points in both, so the distances and areas are always worked out with the
+points in the same order and ties are broken on the point, not on where it is in the
+part. The shared boundaries are then simplified the same way in both parts and are
+still shared in the geo file.
+"""
+
+import numpy as np
+
+"""
+@return : the same id for points with the same coordinates, numbered in order of
+          their first occurrence
+"""
+def _point_ids( coords ):
+	n = coords.shape[0]
+	order = np.lexsort((coords[:,1], coords[:,0]))
+	new = np.ones(n, dtype = bool)
+	new[1:] = np.any(coords[order][1:] != coords[order][:-1], axis = 1)
+	group = np.cumsum(new) - 1
+	first = np.full(group[-1] + 1, n, dtype = int)
+	np.minimum.at(first, group, order)
+	rank = np.empty(first.size, dtype = int)
+	rank[np.argsort(first)] = np.arange(first.size)
+	ids = np.empty(n, dtype = int)
+	ids[order] = rank[group]
+	return ids
+
+"""
+@return : the index of the previous and next point in the same part, -1 at the ends
+"""
+def _neighbours( part_offsets, n ):
+	previous = np.arange(-1, n - 1)
+	following = np.arange(1, n + 1)
+	previous[part_offsets[:-1][part_offsets[:-1] < n]] = -1
+	following[part_offsets[1:][part_offsets[1:] > 0] - 1] = -1
+	return previous, following
+
+"""
+This method gives the distance from the points to the lines a - b.
+"""
+def _segment_distance( points, a, b ):
+	v = b - a
+	w = points - a
+	vv = np.sum(v * v, axis = 1)
+	t = np.clip(np.sum(w * v, axis = 1) / np.where(vv > 0, vv, 1), 0, 1)
+	return np.hypot(w[:,0] - t * v[:,0], w[:,1] - t * v[:,1])
+
+"""
+This method picks the point furthest from a - b in every run of points, ties going to
+the point with the lowest id.
+@param runs : the first entry of each run, all the runs being non empty
+@return : the distance and index of the picked point of each run
+"""
+def _furthest( coords, ids, index, a, b, runs ):
+	d = _segment_distance(coords[index], a, b)
+	run = np.repeat(np.arange(runs.size), np.diff(np.append(runs, index.size)))
+	furthest = np.maximum.reduceat(d, runs)
+	candidate = d == furthest[run]
+	lowest = np.minimum.reduceat(np.where(candidate, ids[index], ids.size), runs)
+	picked = np.minimum.reduceat(np.where(candidate & (ids[index] == lowest[run]), index, ids.size), runs)
+	return furthest, picked
+
+"""
+@return : the index of the first and last point of each chain, the points from the
+          first to the last except the first are put in index and the start of each
+          chain in index is given by runs
+"""
+def _chain_points( first, last ):
+	lengths = last - first
+	runs = np.cumsum(lengths) - lengths
+	index = np.arange(lengths.sum()) - np.repeat(runs, lengths) + np.repeat(first + 1, lengths)
+	return index, runs
+
+"""
+This method finds the points which can not be removed.
+@return : mask of the points of the geometry which are kept
+"""
+def _locked_points( geometry, ids ):
+	coords = geometry.coords
+	n = coords.shape[0]
+	offsets = geometry.part_offsets
+	previous, following = _neighbours(offsets, n)
+	locked = np.zeros(n, dtype = bool)
+	#the ends of the parts
+	locked[offsets[:-1][np.diff(offsets) > 0]] = True
+	locked[offsets[1:][np.diff(offsets) > 0] - 1] = True
+	#the points between lines with different ids
+	if geometry.boundary_runs is not None:
+		runs = geometry.boundary_runs
+		locked[geometry.segments()[runs.first_lines()[runs.starts > 0]]] = True
+	#the points which do not have exactly two neighbours over all the parts they are in
+	pairs = np.concatenate((np.column_stack((ids, np.where(previous >= 0, ids[previous], -1))),
+		np.column_stack((ids, np.where(following >= 0, ids[following], -1)))))
+	pairs = pairs[pairs[:,1] >= 0]
+	pairs = pairs[np.lexsort((pairs[:,1], pairs[:,0]))]
+	distinct = np.ones(pairs.shape[0], dtype = bool)
+	distinct[1:] = np.any(pairs[1:] != pairs[:-1], axis = 1)
+	neighbours = np.bincount(pairs[distinct,0], minlength = ids.max() + 1)
+	locked |= neighbours[ids] != 2
+	locked = __lock_everywhere(locked, ids)
+
+	#closed parts with fewer than three different locked points could be simplified away,
+	#so the point furthest from the lowest locked point and the point furthest from the
+	#line between the two are locked as well
+	part = np.repeat(np.arange(len(geometry)), np.diff(offsets))
+	counts = np.zeros(len(geometry), dtype = int)
+	np.add.at(counts, part[locked], 1)
+	open_parts = np.ones(len(geometry), dtype = bool)
+	nonempty = np.diff(offsets) > 0
+	open_parts[nonempty] = ids[offsets[:-1][nonempty]] != ids[offsets[1:][nonempty] - 1]
+	few = (~open_parts) & (counts <= 3) & (np.diff(offsets) > 3)
+	if np.any(few):
+		index, runs = _chain_points(offsets[:-1][few] - 1, offsets[1:][few] - 1)
+		lowest = np.full(len(geometry), ids.size, dtype = int)
+		np.minimum.at(lowest, part[locked], ids[locked])
+		reference = np.full(ids.size + 1, -1, dtype = int)
+		reference[ids[locked]] = np.flatnonzero(locked)
+		a = coords[reference[lowest[few]]]
+		run = np.repeat(np.arange(runs.size), np.diff(np.append(runs, index.size)))
+		d, first = _furthest(coords, ids, index, a[run], a[run], runs)
+		b = coords[first]
+		d, second = _furthest(coords, ids, index, a[run], b[run], runs)
+		locked[first] = True
+		locked[second] = True
+		locked = __lock_everywhere(locked, ids)
+	return locked
+
+def __lock_everywhere( locked, ids ):
+	locked_ids = np.zeros(ids.max() + 1, dtype = bool)
+	locked_ids[ids[locked]] = True
+	return locked_ids[ids]
+
+"""
+Douglas-Peucker, every chain between locked points is split at its furthest point
+until no point is further than the tolerance from the chain it is in. Each pass splits
+all the chains at once.
+"""
+def _douglas_peucker( coords, ids, locked, tolerance ):
+	keep = locked.copy()
+	ends = np.flatnonzero(locked)
+	first = ends[:-1]
+	last = ends[1:]
+	#the chains are between locked points in the same part, the ends of the parts being locked
+	while first.size:
+		inner = last - first > 1
+		first = first[inner]
+		last = last[inner]
+		if not first.size:
+			break
+		index, runs = _chain_points(first, last - 1)
+		#the ends are put in the order of their ids so both sides of a shared boundary agree
+		swap = ids[first] > ids[last]
+		a = coords[np.where(swap, last, first)]
+		b = coords[np.where(swap, first, last)]
+		run = np.repeat(np.arange(runs.size), np.diff(np.append(runs, index.size)))
+		furthest, picked = _furthest(coords, ids, index, a[run], b[run], runs)
+		split = furthest > tolerance
+		keep[picked[split]] = True
+		first, last = np.concatenate((first[split], picked[split])), np.concatenate((picked[split], last[split]))
+	return keep
+
+"""
+Visvalingam-Whyatt, points are removed in order of the area of the triangle they make
+with their neighbours until every area is at least tolerance squared. Each pass removes
+all the points whose area is smaller than that of both their neighbours.
+"""
+def _visvalingam_whyatt( coords, ids, locked, part_offsets, tolerance ):
+	previous, following = _neighbours(part_offsets, coords.shape[0])
+	keep = np.ones(coords.shape[0], dtype = bool)
+	area = np.full(coords.shape[0], np.inf)
+	points = np.flatnonzero(~locked)
+	threshold = tolerance * tolerance
+	while points.size:
+		p = previous[points]
+		f = following[points]
+		swap = ids[p] > ids[f]
+		a = coords[np.where(swap, f, p)] - coords[points]
+		b = coords[np.where(swap, p, f)] - coords[points]
+		area[points] = 0.5 * np.abs(a[:,0] * b[:,1] - a[:,1] * b[:,0])
+		candidates = np.flatnonzero(keep & (area < threshold))
+		if not candidates.size:
+			break
+		p = previous[candidates]
+		f = following[candidates]
+		smallest = __less(area, ids, candidates, p) & __less(area, ids, candidates, f)
+		removed = candidates[smallest]
+		if not removed.size:
+			break
+		keep[removed] = False
+		p = previous[removed]
+		f = following[removed]
+		following[p] = f
+		previous[f] = p
+		points = np.unique(np.concatenate((p, f)))
+		points = points[~locked[points]]
+	return keep
+
+def __less( area, ids, i, j ):
+	return (area[i] < area[j]) | ((area[i] == area[j]) & (ids[i] < ids[j]))
+
+"""
+This method removes the points which are much closer together than the mesh is to be,
+following the feature length approach of extras/shore/src/DecimateCoast.cpp. A point is
+removed when the line joining its neighbours is shorter than the allowed length and the
+original boundary between them is no further than the allowed length from this line.
+The allowed length is fraction times the smallest target edge length of the three points.
+Each pass removes all the points whose new line is shorter, relative to the allowed
+length, than those of both their neighbours.
+@param target   : the target edge length at each point, see sample_grid
+@param fraction : how much shorter than the target edge length the lines can be
+@return : the decimated geometry and the number of points removed
+"""
+def decimate_geometry( geometry, target, fraction = 0.5 ):
+	coords = geometry.coords
+	if coords.shape[0] == 0:
+		return geometry, 0
+	ids = _point_ids(coords)
+	locked = _locked_points(geometry, ids)
+	previous, following = _neighbours(geometry.part_offsets, coords.shape[0])
+	allowed = fraction * np.asarray(target, dtype = np.float64)
+	keep = np.ones(coords.shape[0], dtype = bool)
+	cost = np.full(coords.shape[0], np.inf)
+	points = np.flatnonzero(~locked)
+	while points.size:
+		p = previous[points]
+		f = following[points]
+		swap = ids[p] > ids[f]
+		a = coords[np.where(swap, f, p)]
+		b = coords[np.where(swap, p, f)]
+		limit = np.minimum(np.minimum(allowed[p], allowed[f]), allowed[points])
+		length = np.hypot(b[:,0] - a[:,0], b[:,1] - a[:,1])
+		#the original points between the neighbours, the removed ones included
+		index, runs = _chain_points(p, f - 1)
+		run = np.repeat(np.arange(runs.size), np.diff(np.append(runs, index.size)))
+		error = np.maximum.reduceat(_segment_distance(coords[index], a[run], b[run]), runs)
+		cost[points] = np.where((length <= limit) & (error <= limit), length / limit, np.inf)
+		candidates = np.flatnonzero(keep & (cost < np.inf))
+		if not candidates.size:
+			break
+		smallest = __less(cost, ids, candidates, previous[candidates]) & __less(cost, ids, candidates, following[candidates])
+		removed = candidates[smallest]
+		if not removed.size:
+			break
+		keep[removed] = False
+		p = previous[removed]
+		f = following[removed]
+		following[p] = f
+		previous[f] = p
+		points = np.unique(np.concatenate((p, f)))
+		points = points[~locked[points]]
+	return geometry.keep_points(keep), int(coords.shape[0] - np.count_nonzero(keep))
+
+"""
+This method samples a gridded field, such as the mesh size metric read by NcReader, at
+the given points by bilinear interpolation, points outside the grid taking the value at
+its edge.
+@param x0     : x coordinate of every grid point, as NcReader.x0
+@param x1     : y coordinate of every grid point, as NcReader.x1
+@param phi    : the field on the grid
+@param coords : Nx2 array of the points
+"""
+def sample_grid( x0, x1, phi, coords ):
+	phi = np.asarray(phi, dtype = np.float64)
+	x = np.asarray(x0, dtype = np.float64).reshape(phi.shape)[0,:]
+	y = np.asarray(x1, dtype = np.float64).reshape(phi.shape)[:,0]
+	if x[0] > x[-1]:
+		x = x[::-1]
+		phi = phi[:,::-1]
+	if y[0] > y[-1]:
+		y = y[::-1]
+		phi = phi[::-1,:]
+	i, s = __grid_position(x, coords[:,0])
+	j, t = __grid_position(y, coords[:,1])
+	i1 = np.minimum(i + 1, x.size - 1)
+	j1 = np.minimum(j + 1, y.size - 1)
+	return (1 - s) * (1 - t) * phi[j,i] + s * (1 - t) * phi[j,i1] + (1 - s) * t * phi[j1,i] + s * t * phi[j1,i1]
+
+def __grid_position( axis, values ):
+	position = np.interp(values, axis, np.arange(axis.size))
+	cell = np.minimum(np.floor(position).astype(int), max(axis.size - 2, 0))
+	return cell, position - cell
+
+"""
+This method simplifies the parts of the geometry.
+@param geometry  : the DomainGeometry, with its boundary ids if they are to be kept
+@param tolerance : the furthest a removed point can be from the simplified boundary,
+                   in the units of the coordinates
+@param method    : DP for Douglas-Peucker or VW for Visvalingam-Whyatt, where the
+                   smallest area kept is the tolerance squared
+@return : the simplified geometry and the number of points removed
+"""
+def simplify_geometry( geometry, tolerance, method = "DP" ):
+	coords = geometry.coords
+	if coords.shape[0] == 0 or not tolerance > 0:
+		return geometry, 0
+	ids = _point_ids(coords)
+	locked = _locked_points(geometry, ids)
+	if method == "DP":
+		keep = _douglas_peucker(coords, ids, locked, tolerance)
+	elif method == "VW":
+		keep = _visvalingam_whyatt(coords, ids, locked, geometry.part_offsets, tolerance)
+	else:
+		raise ValueError("Unknown simplification method %s, use DP or VW" % method)
+	return geometry.keep_points(keep), int(coords.shape[0] - np.count_nonzero(keep))
@@ -0,0 +1,137 @@
+
+##########################################################################
+#
+#  QGIS-meshing plugins.
+#
+#  Copyright (C) 2012-2013 Imperial College London and others.
+#
+#  Please see the AUTHORS file in the main source directory for a
+#  full list of copyright holders.
+#
+#  Dr Adam S. Candy, adam.candy@imperial.ac.uk
+#  Applied Modelling and Computation Group
+#  Department of Earth Science and Engineering
+#  Imperial College London
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation,
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307
+#  USA
+#
+##########################################################################
+
+
+"""
+This module merges points which are closer together than a tolerance. The points are
+hashed into a grid of cells the size of the tolerance, so a point only has to be compared
+with the points in its own and the eight neighbouring cells. These comparisons are made
+with array operations, so the points with no other point within the tolerance, which are
+nearly all of them, are left as they are without a Python loop over them. Each of the
+other points is moved onto the first earlier point within the tolerance, if there is one.
+"""
+
+import numpy as np
+from domain_geometry import DomainGeometry
+
+#the degrees in a metre along a great circle, for tolerances given in metres
+DEGREES_PER_METRE = 180/(np.pi*6.3781e6)
+
+__NEIGHBOURS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+def __cell_hash( cx, cy ):
+	#wraps around, two cells with the same hash only cost a few comparisons
+	return cx * np.int64(2654435761) + cy
+
+"""
+@return : mask of the points which have another point within the tolerance, found by
+          comparing each point with the points in the nine cells around it, block_size
+          points at a time
+"""
+def __near_points( coords, cells, tolerance, block_size = 1 << 15 ):
+	hashes = __cell_hash(cells[:,0], cells[:,1])
+	order = np.argsort(hashes, kind = 'mergesort')
+	sorted_hashes = hashes[order]
+	tolerance2 = tolerance * tolerance
+	near = np.zeros(coords.shape[0], dtype = bool)
+	for start in range(0, coords.shape[0], block_size):
+		block = np.arange(start, min(start + block_size, coords.shape[0]))
+		for dx, dy in __NEIGHBOURS:
+			h = __cell_hash(cells[block,0] + dx, cells[block,1] + dy)
+			first = np.searchsorted(sorted_hashes, h, side = 'left')
+			counts = np.searchsorted(sorted_hashes, h, side = 'right') - first
+			#every point of the block paired with every point hashed to the cell
+			points = np.repeat(block, counts)
+			others = order[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - first, counts)]
+			d = coords[points] - coords[others]
+			close = (points != others) & ((d * d).sum(axis = 1) <= tolerance2)
+			near[points[close]] = True
+	return near
+
+"""
+@param coords    : Nx2 array of the points
+@param tolerance : points closer than this are merged, in the units of coords
+@return : the snapped points and the number of points which were moved
+"""
+def snap_points( coords, tolerance ):
+	coords = np.asarray(coords, dtype = np.float64).reshape(-1, 2)
+	if coords.shape[0] == 0 or not tolerance > 0:
+		return coords.copy(), 0
+	cells = np.floor(coords / tolerance).astype(np.int64)
+	#only a point with another point within the tolerance can be moved or moved onto
+	near = __near_points(coords, cells, tolerance)
+
+	target = np.arange(coords.shape[0])
+	grid = {}
+	x = coords[:,0].tolist()
+	y = coords[:,1].tolist()
+	cx = cells[:,0].tolist()
+	cy = cells[:,1].tolist()
+	tolerance2 = tolerance * tolerance
+	for i in np.flatnonzero(near).tolist():
+		j = -1
+		for dx, dy in __NEIGHBOURS:
+			for k in grid.get((cx[i] + dx, cy[i] + dy), ()):
+				if (j < 0 or k < j) and (x[i] - x[k])**2 + (y[i] - y[k])**2 <= tolerance2:
+					j = k
+					break
+		if j >= 0:
+			target[i] = j
+		else:
+			grid.setdefault((cx[i], cy[i]), []).append(i)
+	snapped = coords[target]
+	return snapped, int(np.count_nonzero(np.any(snapped != coords, axis = 1)))
+
+"""
+@param point_parts : array of the part of each point
+@return : mask of the points which are not the same as the point before them in the part
+"""
+def _unrepeated( coords, point_parts ):
+	keep = np.ones(coords.shape[0], dtype = bool)
+	keep[1:] = np.any(coords[1:] != coords[:-1], axis = 1) | (point_parts[1:] != point_parts[:-1])
+	return keep
+
+"""
+This method snaps the points of a DomainGeometry and removes the points left repeating
+the one before them, with the line between them. Parts left with fewer than four points,
+i.e. not a closed triangle, are removed.
+@return : the new geometry and the number of points which were moved
+"""
+def snap_geometry( geometry, tolerance ):
+	coords, merged = snap_points(geometry.coords, tolerance)
+	if merged == 0:
+		return geometry, 0
+	#the geometry given is left as it is
+	snapped = DomainGeometry(coords, geometry.part_offsets, geometry.shape_offsets, geometry.region_ids)
+	snapped.boundary_runs = geometry.boundary_runs
+	point_parts = np.repeat(np.arange(len(geometry)), np.diff(geometry.part_offsets))
+	return snapped.keep_points(_unrepeated(coords, point_parts), 4), merged
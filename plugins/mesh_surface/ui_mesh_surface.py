@@ -26,17 +26,17 @@ except AttributeError:
 class Ui_MeshSurface(object):
     def setupUi(self, MeshSurface):
         MeshSurface.setObjectName(_fromUtf8("MeshSurface"))
-        MeshSurface.resize(550, 787)
+        MeshSurface.resize(550, 817)
         icon = QtGui.QIcon()
         icon.addPixmap(QtGui.QPixmap(_fromUtf8(":/plugins/mesh_surface/icon.png")), QtGui.QIcon.Normal, QtGui.QIcon.Off)
         MeshSurface.setWindowIcon(icon)
         self.buttonBox = QtGui.QDialogButtonBox(MeshSurface)
-        self.buttonBox.setGeometry(QtCore.QRect(350, 750, 191, 32))
+        self.buttonBox.setGeometry(QtCore.QRect(350, 780, 191, 32))
         self.buttonBox.setOrientation(QtCore.Qt.Horizontal)
         self.buttonBox.setStandardButtons(QtGui.QDialogButtonBox.Cancel|QtGui.QDialogButtonBox.Ok)
         self.buttonBox.setObjectName(_fromUtf8("buttonBox"))
         self.frame = QtGui.QFrame(MeshSurface)
-        self.frame.setGeometry(QtCore.QRect(10, 330, 531, 201))
+        self.frame.setGeometry(QtCore.QRect(10, 360, 531, 201))
         self.frame.setFrameShape(QtGui.QFrame.StyledPanel)
         self.frame.setFrameShadow(QtGui.QFrame.Raised)
         self.frame.setObjectName(_fromUtf8("frame"))
@@ -81,17 +81,20 @@ class Ui_MeshSurface(object):
         self.addLayerToCanvasCheckBox.setEnabled(False)
         self.addLayerToCanvasCheckBox.setGeometry(QtCore.QRect(30, 160, 126, 22))
         self.addLayerToCanvasCheckBox.setObjectName(_fromUtf8("addLayerToCanvasCheckBox"))
+        self.structuredFieldCheckBox = QtGui.QCheckBox(self.grpNCDF)
+        self.structuredFieldCheckBox.setGeometry(QtCore.QRect(250, 160, 160, 22))
+        self.structuredFieldCheckBox.setObjectName(_fromUtf8("structuredFieldCheckBox"))
         self.multipleNetCDFFilesRadioButton = QtGui.QRadioButton(self.grpNCDF)
         self.multipleNetCDFFilesRadioButton.setGeometry(QtCore.QRect(11, 130, 370, 22))
         self.multipleNetCDFFilesRadioButton.setChecked(False)
         self.multipleNetCDFFilesRadioButton.setObjectName(_fromUtf8("multipleNetCDFFilesRadioButton"))
         self.frame_2 = QtGui.QFrame(MeshSurface)
-        self.frame_2.setGeometry(QtCore.QRect(10, 10, 531, 311))
+        self.frame_2.setGeometry(QtCore.QRect(10, 10, 531, 341))
         self.frame_2.setFrameShape(QtGui.QFrame.StyledPanel)
         self.frame_2.setFrameShadow(QtGui.QFrame.Raised)
         self.frame_2.setObjectName(_fromUtf8("frame_2"))
         self.grpDom = QtGui.QGroupBox(self.frame_2)
-        self.grpDom.setGeometry(QtCore.QRect(10, 10, 521, 271))
+        self.grpDom.setGeometry(QtCore.QRect(10, 10, 521, 301))
         self.grpDom.setFlat(False)
         self.grpDom.setObjectName(_fromUtf8("grpDom"))
         self.domainShapefileLayerDropDown = QtGui.QComboBox(self.grpDom)
@@ -150,9 +153,20 @@ class Ui_MeshSurface(object):
         self.compoundCheckBox.setGeometry(QtCore.QRect(30, 190, 171, 22))
         self.compoundCheckBox.setChecked(True)
         self.compoundCheckBox.setObjectName(_fromUtf8("compoundCheckBox"))
+        self.label_6 = QtGui.QLabel(self.grpDom)
+        self.label_6.setGeometry(QtCore.QRect(250, 192, 71, 17))
+        self.label_6.setObjectName(_fromUtf8("label_6"))
+        self.workersSpinBox = QtGui.QSpinBox(self.grpDom)
+        self.workersSpinBox.setGeometry(QtCore.QRect(330, 188, 61, 22))
+        self.workersSpinBox.setMinimum(1)
+        self.workersSpinBox.setMaximum(64)
+        self.workersSpinBox.setObjectName(_fromUtf8("workersSpinBox"))
+        self.batchCheckBox = QtGui.QCheckBox(self.grpDom)
+        self.batchCheckBox.setGeometry(QtCore.QRect(30, 244, 241, 22))
+        self.batchCheckBox.setObjectName(_fromUtf8("batchCheckBox"))
         self.grpChooseGeo = QtGui.QGroupBox(self.frame_2)
         self.grpChooseGeo.setEnabled(True)
-        self.grpChooseGeo.setGeometry(QtCore.QRect(10, 270, 501, 41))
+        self.grpChooseGeo.setGeometry(QtCore.QRect(10, 300, 501, 41))
         self.grpChooseGeo.setTitle(_fromUtf8(""))
         self.grpChooseGeo.setObjectName(_fromUtf8("grpChooseGeo"))
         self.chooseGeoFileRadioButton = QtGui.QRadioButton(self.grpChooseGeo)
@@ -168,7 +182,7 @@ class Ui_MeshSurface(object):
         self.chooseGeoFilePushButton.setGeometry(QtCore.QRect(410, 0, 85, 27))
         self.chooseGeoFilePushButton.setObjectName(_fromUtf8("chooseGeoFilePushButton"))
         self.frame_5 = QtGui.QFrame(MeshSurface)
-        self.frame_5.setGeometry(QtCore.QRect(10, 540, 531, 201))
+        self.frame_5.setGeometry(QtCore.QRect(10, 570, 531, 201))
         self.frame_5.setFrameShape(QtGui.QFrame.StyledPanel)
         self.frame_5.setFrameShadow(QtGui.QFrame.Raised)
         self.frame_5.setObjectName(_fromUtf8("frame_5"))
@@ -224,6 +238,8 @@ class Ui_MeshSurface(object):
         self.singleNetCDFChooseFilesRadioButton.setText(_translate("MeshSurface", "Choose File", None))
         self.singleNetCDFRadioButton.setText(_translate("MeshSurface", "Use Single NetCDF File", None))
         self.addLayerToCanvasCheckBox.setText(_translate("MeshSurface", "Add to Canvas", None))
+        self.structuredFieldCheckBox.setToolTip(_translate("MeshSurface", "Writes the metric as a regular grid read by a gmsh Structured field, rather than as points gmsh has to triangulate", None))
+        self.structuredFieldCheckBox.setText(_translate("MeshSurface", "Structured Field", None))
         self.multipleNetCDFFilesRadioButton.setText(_translate("MeshSurface", "Calculate Minumum Value of Visible NetCDF Files", None))
         self.grpDom.setTitle(_translate("MeshSurface", "Domain", None))
         self.domainShapefileLayerRadioButton.setText(_translate("MeshSurface", "Domain Shapefile Layer", None))
@@ -236,6 +252,10 @@ class Ui_MeshSurface(object):
         self.label_5.setText(_translate("MeshSurface", "Line Type", None))
         self.compoundCheckBox.setToolTip(_translate("MeshSurface", "WARNING: Using Compound Lines increses the meshing time#", None))
         self.compoundCheckBox.setText(_translate("MeshSurface", "Use Compound Lines", None))
+        self.label_6.setToolTip(_translate("MeshSurface", "The number of processes assigning the boundary IDs", None))
+        self.label_6.setText(_translate("MeshSurface", "Workers", None))
+        self.batchCheckBox.setToolTip(_translate("MeshSurface", "Assigns the boundary IDs with arrays rather than a line at a time, which is faster for ID polygons of few edges", None))
+        self.batchCheckBox.setText(_translate("MeshSurface", "Batch ID Classification", None))
         self.chooseGeoFileRadioButton.setText(_translate("MeshSurface", "Choose Geo File", None))
         self.chooseGeoFilePushButton.setText(_translate("MeshSurface", "Browse", None))
         self.grpCSpace_2.setTitle(_translate("MeshSurface", "Generate Mesh", None))
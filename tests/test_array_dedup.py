@@ -0,0 +1,43 @@
+import os, sys, ntpath, filecmp
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+
+from modular_meshing import Modular_meshing
+from scripts import export_geo
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_array_dedup" # just the name, no forward or backslashes!
+
+###############################################################################
+
+make_directory(fname)
+
+# The geo file is written by the array dedup of the command line and again from the
+# same domain by the dictionary method, which must number everything the same.
+def write_both(name, command, compound):
+  curr_file = test + "/" + fname + "/" + name
+  domain = Modular_meshing(command + " -g " + curr_file + ".geo")
+  export_geo.write_geo_file(curr_file + "_dict.geo", domain.data, compound, domain.BSpline, use_array_dedup = False)
+  return curr_file + ".geo", curr_file + "_dict.geo"
+
+
+
+def test_dedup_lines():
+  array_file, dict_file = write_both("ids_LN", "-l LN --id "+support_file_path+"/a_idLayer.shp "+support_file_path+"/rtopo_shape_DN__2.shp", False)
+
+  assert filecmp.cmp(array_file, dict_file, shallow = False),"%s does not match the dictionary method" % ntpath.basename(array_file)
+
+def test_dedup_compound_lines():
+  array_file, dict_file = write_both("ID0_LY", "-l LY --id "+support_file_path+"/a_idLayer.shp "+support_file_path+"/ID0Layer.shp", True)
+
+  assert filecmp.cmp(array_file, dict_file, shallow = False),"%s does not match the dictionary method" % ntpath.basename(array_file)
+
+
+############################# ADD MORE TESTS HERE: ############################
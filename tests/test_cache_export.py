@@ -0,0 +1,83 @@
+import os, sys, filecmp, shutil
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+from modular_meshing import Modular_meshing
+
+from scripts import export_geo
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_cache_export" # just the name, no forward or backslashes!
+command =	"-g "+test+"/test_cache_export/%s.geo --id "+support_file_path+"/a_idLayer.shp "+support_file_path+"/ID0Layer.shp" # see modular_meshing.py for help
+
+###############################################################################
+
+make_directory(fname)
+
+curr_dir = test + "/" + fname
+
+def mesh(name, options):
+  return Modular_meshing(options + " " + command % name)
+
+
+
+# a domain read back from the cache, without its shapefile data, is written the same
+# as one read from the shapefiles in every mode of write_geo_file
+def test_cache_export(monkeypatch, capsys):
+  # the cache is kept in the output rather than in the user's cache directory
+  if os.path.exists(curr_dir + "/cache"):
+    shutil.rmtree(curr_dir + "/cache")
+  monkeypatch.setenv("XDG_CACHE_HOME", curr_dir + "/cache")
+  mesh("stored", "-l LN --cache")
+  assert "Read the domain from the cache." not in capsys.readouterr()[0]
+
+  for line_type in ("LN", "LY", "BN", "BY"):
+    for ranges in ("", " --ranges"):
+      name = line_type + ranges.replace(" --", "_")
+      read = mesh(name, "-l " + line_type + ranges)
+      cached = mesh(name + "_cached", "-l " + line_type + ranges + " --cache")
+
+      assert "Read the domain from the cache." in capsys.readouterr()[0]
+      assert not hasattr(cached, "domainData")
+      assert filecmp.cmp(curr_dir + "/" + name + ".geo", curr_dir + "/" + name + "_cached.geo", shallow = False)
+
+      if not ranges:
+        # the dictionary method, kept for regression testing
+        for data, suffix in ((read.data, "_dict"), (cached.data, "_cached_dict")):
+          export_geo.write_geo_file(curr_dir + "/" + name + suffix + ".geo", data, line_type[1] == "Y", line_type[0] == "B", use_array_dedup = False)
+        assert filecmp.cmp(curr_dir + "/" + name + "_dict.geo", curr_dir + "/" + name + "_cached_dict.geo", shallow = False)
+
+# a cache which can not be written, here under a file, gives a warning and the geo file
+# is still written
+def test_cache_unwritable(monkeypatch, capsys):
+  open(curr_dir + "/not_a_directory", "w").close()
+  monkeypatch.setenv("XDG_CACHE_HOME", curr_dir + "/not_a_directory")
+  mesh("unwritable", "-l LN --cache")
+
+  assert "Warning:  The domain could not be kept in the cache" in capsys.readouterr()[0]
+  assert filecmp.cmp(curr_dir + "/LN.geo", curr_dir + "/unwritable.geo", shallow = False)
+
+# a bounding box index which can not be saved, here as a directory is in its place,
+# gives a warning and the shapes of the region are still read
+def test_index_unwritable(monkeypatch, capsys):
+  if os.path.exists(curr_dir + "/region_cache"):
+    shutil.rmtree(curr_dir + "/region_cache")
+  monkeypatch.setenv("XDG_CACHE_HOME", curr_dir + "/region_cache")
+  for ext in (".shp", ".shx", ".dbf"):
+    shutil.copy(support_file_path + "/ID0Layer" + ext, curr_dir + "/ID0Layer" + ext)
+  if not os.path.isdir(curr_dir + "/ID0Layer.bbox.npz"):
+    os.makedirs(curr_dir + "/ID0Layer.bbox.npz")
+  Modular_meshing("-l LN --cache --region -200 -100 200 100 -g " + curr_dir + "/region.geo " + curr_dir + "/ID0Layer.shp")
+
+  assert "Warning:  The bounding box index of" in capsys.readouterr()[0]
+  assert os.path.isdir(curr_dir + "/ID0Layer.bbox.npz")
+  assert os.path.getsize(curr_dir + "/region.geo") > 0
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,46 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+import file_generation # puts plugins/mesh_surface on the path
+
+from scripts import export_geo
+from scripts.domain_geometry import BoundaryRuns
+
+
+# a line loop of four lines whose physical id goes 1, 1, 2, 1, the third line
+# being used against its direction
+line_loop = [1, 2, -3, 4]
+boundary_runs = BoundaryRuns([0, 3], [0, 2, 3], [2, 1, 1], [1, 2, 1])
+
+
+
+def test_line_loop_runs():
+  assert export_geo.__line_loop_runs(line_loop, boundary_runs, 0) == [(1, [1, 2]), (2, [-3]), (1, [4])]
+
+# the line loop leaves out the last line of its part
+def test_line_loop_runs_closed():
+  assert export_geo.__line_loop_runs(line_loop[:3], boundary_runs, 0) == [(1, [1, 2]), (2, [-3])]
+
+def test_split_recurring_id():
+  compound_list = export_geo.__split_compound_lines_for_multiple_regions([export_geo.__line_loop_runs(line_loop, boundary_runs, 0)])
+  compound_dict, line_num = export_geo.__number_compound_lines(compound_list, 10)
+
+  assert compound_dict == {(10, 1) : [1, 2], (11, 2) : [-3], (12, 1) : [4]}
+  assert line_num == 13
+
+# an outer line loop sharing its second line with one island and its fourth and fifth
+# with another, and a line loop sharing nothing
+def test_split_regions():
+  line_loops = [[(1, [1, 2, 3, 4, 5, 6])], [(1, [-2, 7])], [(1, [-5, -4, 8])], [(1, [9, 10])]]
+
+  assert export_geo.__split_compound_lines_for_multiple_regions(line_loops) == \
+    [(1, [1]), (1, [2]), (1, [3]), (1, [4, 5]), (1, [6]), (1, [7]), (1, [8]), (1, [9, 10])]
+
+# the pieces are cut at the physical ids as well as at the shared lines
+def test_split_regions_and_ids():
+  line_loops = [[(1, [1, 2]), (2, [3, 4])], [(3, [-3, 5])]]
+
+  assert export_geo.__split_compound_lines_for_multiple_regions(line_loops) == [(1, [1, 2]), (2, [3]), (2, [4]), (3, [5])]
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,77 @@
+import os, sys
+import numpy
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+import file_generation # puts plugins/mesh_surface on the path
+
+from scripts.domain_geometry import DomainGeometry
+from scripts.simplify_boundaries import decimate_geometry, sample_grid
+
+
+# a closed square of side 100 with a point every 1, the bottom side having the id 2 and
+# the others the id 1
+def square():
+  side = numpy.arange(100.0)
+  points = numpy.concatenate((numpy.column_stack((side, 0*side)), numpy.column_stack((100 + 0*side, side)),
+    numpy.column_stack((100 - side, 100 + 0*side)), numpy.column_stack((0*side, 100 - side)), [[0.0, 0.0]]))
+  return DomainGeometry(points, [0, points.shape[0]], [0, 1], [1], numpy.where(numpy.arange(points.shape[0] - 1) < 100, 2, 1))
+
+def lengths(geometry):
+  starts = geometry.segments()
+  return numpy.hypot(*(geometry.coords[starts + 1] - geometry.coords[starts]).T)
+
+
+
+def test_decimate_to_target():
+  geometry = square()
+  decimated, removed = decimate_geometry(geometry, numpy.full(geometry.coords.shape[0], 10.0), 0.5)
+
+  assert removed > 0
+  assert decimated.coords.shape[0] == geometry.coords.shape[0] - removed
+  # no line is longer than the allowed length, fraction times the target
+  assert lengths(decimated).max() <= 5.0
+  assert lengths(decimated).max() > 1.0
+
+def test_decimate_keeps_ids():
+  geometry = square()
+  decimated, removed = decimate_geometry(geometry, numpy.full(geometry.coords.shape[0], 10.0), 0.5)
+  starts = decimated.segments()
+  bottom = (decimated.coords[starts, 1] == 0) & (decimated.coords[starts + 1, 1] == 0)
+
+  # the points where the id changes are kept, so the bottom lines keep the id 2
+  assert [0.0, 0.0] in decimated.coords.tolist()
+  assert [100.0, 0.0] in decimated.coords.tolist()
+  assert numpy.all(decimated.boundary_runs.line_ids()[bottom] == 2)
+  assert numpy.all(decimated.boundary_runs.line_ids()[~bottom] == 1)
+
+# a target finer than the points removes nothing
+def test_decimate_fine_target():
+  geometry = square()
+  decimated, removed = decimate_geometry(geometry, numpy.full(geometry.coords.shape[0], 1.0), 0.5)
+
+  assert removed == 0
+  assert numpy.all(decimated.coords == geometry.coords)
+
+# the target is taken at each point, so the coarse half of the square loses more points
+def test_decimate_varying_target():
+  geometry = square()
+  target = numpy.where(geometry.coords[:,0] < 50, 4.0, 40.0)
+  decimated, removed = decimate_geometry(geometry, target, 0.5)
+  left = numpy.count_nonzero(decimated.coords[:,0] < 50)
+  right = numpy.count_nonzero(decimated.coords[:,0] > 50)
+
+  assert right < left
+
+def test_sample_grid():
+  x = numpy.linspace(0.0, 10.0, 6)
+  y = numpy.linspace(0.0, 4.0, 3)
+  x0 = numpy.outer(numpy.ones_like(y), x)
+  x1 = numpy.outer(y, numpy.ones_like(x))
+  phi = 1.0 + 2.0 * x0 + 3.0 * x1
+  values = sample_grid(x0, x1, phi, numpy.array([[0.0, 0.0], [5.0, 1.0], [3.3, 2.7], [20.0, -5.0]]))
+
+  # a bilinear field is sampled exactly, and points outside take the value at the edge
+  assert numpy.allclose(values, [1.0, 14.0, 1.0 + 6.6 + 8.1, 21.0])
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,66 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../plugins/boundary_identification/'))
+from export_plane import export
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_export_plane" # just the name, no forward or backslashes!
+
+###############################################################################
+
+make_directory(fname)
+
+class _Shape:
+  def __init__( self, points ):
+    self.points = points
+
+# stands in for a shapefile.Reader of a boundary in two parts with the ids 3 and 5,
+# each part repeating its first point at the end
+class _Reader:
+  def shapes( self ):
+    return [_Shape([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]), _Shape([[0.0, 1.0], [0.0, 0.5], [0.0, 1.0]])]
+  def records( self ):
+    return [[3, 1], [5, 1]]
+
+export(_Reader(), test + "/" + fname + "/" + fname)
+geo = open(test + "/" + fname + "/" + fname + ".geo").read().splitlines()
+
+
+
+def test_physical_lines():
+  assert "Physical Line(3) = {1, 2, 3};" in geo
+  assert "Physical Line(5) = {4, 5};" in geo
+
+# the lines of every physical group are listed, separated, for the attractor
+def test_attractor_edges():
+  assert "Field[1].EdgesList = {1, 2, 3, 4, 5};" in geo
+
+
+# two shapes, the first with a point repeated straight after itself and the second
+# with a point within the tolerance of a point of the first
+class _RepeatReader:
+  def shapes( self ):
+    return [_Shape([[0.0, 0.0], [1.0, 0.0], [1.0, 0.0000001], [1.0, 1.0], [0.0, 0.0]]), _Shape([[1.0000008, 0.0], [2.0, 0.0], [2.0, 1.0], [1.0000008, 0.0]])]
+  def records( self ):
+    return [[3, 1], [5, 2]]
+
+export(_RepeatReader(), test + "/" + fname + "/" + fname + "_repeat")
+repeat_geo = open(test + "/" + fname + "/" + fname + "_repeat.geo").read().splitlines()
+
+# only the points repeating the point before them in their shape are removed
+def test_repeated_points():
+  assert [l for l in repeat_geo if l.startswith("Point")] == ["Point(1) = {0.000000, 0.000000, zCoord};",
+    "Point(2) = {1.000000, 0.000000, zCoord};", "Point(3) = {1.000000, 1.000000, zCoord};",
+    "Point(4) = {1.000001, 0.000000, zCoord};", "Point(5) = {2.000000, 0.000000, zCoord};",
+    "Point(6) = {2.000000, 1.000000, zCoord};"]
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,56 @@
+import os, sys, json
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import generate_files, make_directory
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_geo_stats" # just the name, no forward or backslashes!
+command =	"-l LY --stats -g "+test+"/test_geo_stats/test_geo_stats.geo --id "+support_file_path+"/a_idLayer.shp "+support_file_path+"/ID0Layer.shp" # see modular_meshing.py for help
+
+###############################################################################
+
+generate_files(fname, command)
+
+curr_file = test + "/" + fname + "/" + fname
+
+
+
+def test_stats_phases():
+  stats = json.load(open(curr_file + ".stats.json"))
+
+  assert [phase["name"] for phase in stats["phases"]] == ["dedup", "loops", "compounds", "surfaces", "physical"]
+  assert sum(phase["bytes"] for phase in stats["phases"]) == stats["bytes"]
+  assert stats["bytes"] == os.path.getsize(curr_file + ".geo")
+  assert stats["time"] >= sum(phase["time"] for phase in stats["phases"])
+
+# the counts agree with the entities in the geo file
+def test_stats_counts():
+  stats = json.load(open(curr_file + ".stats.json"))
+  counts = dict((phase["name"], phase["counts"]) for phase in stats["phases"])
+  geo = open(curr_file + ".geo").read()
+
+  assert counts["dedup"]["points"] == geo.count("Point(")
+  assert counts["dedup"]["lines"] == geo.count("\nLine(")
+  assert counts["compounds"]["compound_lines"] == geo.count("Compound Line(")
+  assert counts["surfaces"]["surfaces"] == geo.count("Plane Surface(")
+
+# each phase has the peak memory of the process at its end and how much it rose
+def test_stats_peak_memory():
+  stats = json.load(open(curr_file + ".stats.json"))
+  peaks = [phase["peak_memory_kb"] for phase in stats["phases"]]
+
+  assert stats["process_peak_memory_kb"] > 0
+  assert all("peak_memory_kb" in phase and "peak_memory_rise_kb" in phase for phase in stats["phases"])
+  assert all(peak > 0 for peak in peaks)
+  assert peaks == sorted(peaks) and peaks[-1] <= stats["process_peak_memory_kb"]
+  assert [phase["peak_memory_rise_kb"] for phase in stats["phases"][1:]] == [b - a for a, b in zip(peaks, peaks[1:])]
+  assert all(phase["peak_memory_rise_kb"] >= 0 for phase in stats["phases"])
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,104 @@
+import os, sys, filecmp
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+
+from scripts.geo_writer import GeoWriter, geo_chunks
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_geo_writer" # just the name, no forward or backslashes!
+
+###############################################################################
+
+make_directory(fname)
+
+# a square of four points and lines in a line loop, surface and physical groups
+records = [
+  ("comment", "square"),
+  ("points", [1, 2, 3, 4], [(0.0, 0.0), (1.5, 0.0), (1.5, 1.5), (0.0, 1.5)]),
+  ("lines", [1, 2, 3, 4], [(1, 2), (2, 3), (3, 4), (4, 1)]),
+  ("line_loop", 1, [1, 2, 3, 4]),
+  ("plane_surface", 1, [1]),
+  ("physical", "Line", 3, [1, 2, 3, 4]),
+  ("physical", "Surface", 1, [1]),
+  ("field", 1, "MathEval", [("F", '"1.0E5"')])
+  ]
+
+square = """// square
+Point(1) = {0.0, 0.0,0};
+Point(2) = {1.5, 0.0,0};
+Point(3) = {1.5, 1.5,0};
+Point(4) = {0.0, 1.5,0};
+Line(1) = {1, 2};
+Line(2) = {2, 3};
+Line(3) = {3, 4};
+Line(4) = {4, 1};
+Line Loop(1) = {1, 2, 3, 4};
+Plane Surface(1) = {1};
+Physical Line(3) = {1, 2, 3, 4};
+Physical Surface(1) = {1};
+Field[1] = MathEval;
+Field[1].F = "1.0E5";
+"""
+
+def write_records(writer):
+  for record in records:
+    getattr(writer, record[0])(*record[1:])
+
+
+
+def test_file():
+  curr_file = test + "/" + fname + "/square.geo"
+  writer = GeoWriter(open(curr_file, "w"), flush_size = 64, batch_size = 3)
+  write_records(writer)
+  writer.close()
+
+  assert open(curr_file).read() == square
+  assert writer.written == len(square)
+
+def test_chunks():
+  writer = GeoWriter(None, flush_size = 64, batch_size = 3)
+  write_records(writer)
+  chunks = list(writer.chunks())
+
+  assert "".join(chunks) == square
+  assert len(chunks) > 1
+  assert list(writer.chunks()) == []
+
+def test_geo_chunks():
+  chunks = list(geo_chunks(records, flush_size = 64))
+
+  assert "".join(chunks) == square
+  assert len(chunks) > 1
+
+def test_geo_chunks_ranges():
+  chunks = geo_chunks([("line_loop", 1, [1, 2, 3, 4, 6, 5]), ("compound_line", 7, [9, 8, 7])], use_ranges = True)
+
+  assert "".join(chunks) == "Line Loop(1) = {1:4, 6, 5};\nCompound Line(7) = {9:7};\n"
+
+# the ids are written as they are given, not through a float
+def test_large_point_ids():
+  writer = GeoWriter(None)
+  writer.points([2**53 + 1], [(0.25, 0.5)], "Point(%d) = {%r, %r,0};\n")
+
+  assert "".join(writer.chunks()) == "Point(9007199254740993) = {0.25, 0.5,0};\n"
+
+# points and lines mixed are written as points and lines write them
+def test_points_and_lines():
+  writer = GeoWriter(None, batch_size = 2)
+  writer.points_and_lines([False, False, True, False, True], [1, 2, 1, 3, 2], [(0.1, 0.0), (1.5, 0.25), (2.0, 1.0/3)], [(1, 2), (2, 3)], "BSpline")
+  separate = GeoWriter(None)
+  separate.points([1, 2], [(0.1, 0.0), (1.5, 0.25)])
+  separate.lines([1], [(1, 2)], "BSpline")
+  separate.points([3], [(2.0, 1.0/3)])
+  separate.lines([2], [(2, 3)], "BSpline")
+
+  assert "".join(writer.chunks()) == "".join(separate.chunks())
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,96 @@
+import os, sys, shutil, time
+import numpy
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+
+from scripts.domain_geometry import DomainGeometry
+from scripts.geometry_cache import GeometryCache, cache_key
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_geometry_cache" # just the name, no forward or backslashes!
+
+###############################################################################
+
+make_directory(fname)
+
+# a square and a triangle, each a closed part, with the ids of their lines
+def geometry():
+  coords = [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0], [2, 0], [3, 0], [2, 1], [2, 0]]
+  return DomainGeometry(coords, [0, 5, 9], [0, 1, 2], [1, 2], [3, 3, 4, 4, 5, 5, 5])
+
+def new_cache(name, max_bytes = 256 << 20):
+  directory = test + "/" + fname + "/" + name
+  if os.path.exists(directory):
+    shutil.rmtree(directory)
+  return GeometryCache(directory, max_bytes)
+
+
+
+def test_cache_hit():
+  cache = new_cache("hit")
+  cache.store("domain", geometry())
+  loaded = cache.load("domain")
+
+  assert numpy.all(loaded.coords == geometry().coords)
+  assert numpy.all(loaded.part_offsets == geometry().part_offsets)
+  assert numpy.all(loaded.shape_offsets == geometry().shape_offsets)
+  assert numpy.all(loaded.region_ids == geometry().region_ids)
+  assert numpy.all(loaded.boundary_runs.line_ids() == [3, 3, 4, 4, 5, 5, 5])
+
+def test_cache_miss():
+  cache = new_cache("miss")
+  cache.store("domain", geometry())
+
+  assert cache.load("other") is None
+
+# a changed shapefile or setting gives another key
+def test_cache_key():
+  domain = test + "/" + fname + "/annulus.shp"
+  for ext in (".shp", ".shx", ".dbf"):
+    shutil.copy(support_file_path + "/annulus" + ext, domain[:-4] + ext)
+  key = cache_key([domain], [True, 0.0])
+
+  assert cache_key([domain], [True, 0.0]) == key
+  assert cache_key([domain], [True, 1.0]) != key
+  dbf = open(domain[:-4] + ".dbf", "ab")
+  dbf.write(" ")
+  dbf.close()
+  assert cache_key([domain], [True, 0.0]) != key
+
+# a file which is not a whole geometry is removed
+def test_cache_invalid():
+  cache = new_cache("invalid")
+  cache.store("broken", geometry())
+  open(cache.path("broken"), "wb").write("not a cache file")
+  whole = geometry()
+  cache.store("runs", DomainGeometry(whole.coords, whole.part_offsets, whole.shape_offsets, whole.region_ids, [3, 3, 4, 4, 5, 5]))
+
+  assert cache.load("broken") is None
+  assert not os.path.exists(cache.path("broken"))
+  assert cache.load("runs") is None
+  assert not os.path.exists(cache.path("runs"))
+
+# the files used longest ago are removed once the cache is over its cap
+def test_cache_evict():
+  cache = new_cache("evict")
+  cache.store("first", geometry())
+  cache.max_bytes = 2 * os.path.getsize(cache.path("first"))
+  for key, used in [("first", 100), ("second", 200)]:
+    cache.store(key, geometry())
+    os.utime(cache.path(key), (used, used))
+  cache.load("first")
+  cache.store("third", geometry())
+
+  assert os.path.exists(cache.path("first"))
+  assert not os.path.exists(cache.path("second"))
+  assert os.path.exists(cache.path("third"))
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,56 @@
+import os, sys, ntpath, filecmp
+import numpy
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+
+from modular_meshing import Modular_meshing
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_ids_jobs" # just the name, no forward or backslashes!
+
+###############################################################################
+
+make_directory(fname)
+
+# The ids are assigned in one process and again in three, which must give the same
+# ids and the same geo file.
+def assign_both(name, options):
+  curr_file = test + "/" + fname + "/" + name
+  ids = []
+  for jobs in [1, 3]:
+    domain = Modular_meshing("-l LN " + options + " --jobs %d -g %s_%d.geo --id %s/a_idLayer.shp %s/rtopo_shape_DN__2.shp" \
+      % (jobs, curr_file, jobs, support_file_path, support_file_path))
+    ids.append(domain.data.boundary_runs.line_ids())
+  return ids, curr_file + "_1.geo", curr_file + "_3.geo"
+
+
+
+def test_jobs_lines():
+  ids, serial_file, jobs_file = assign_both("lines", "")
+
+  assert numpy.all(ids[0] == ids[1])
+  assert filecmp.cmp(serial_file, jobs_file, shallow = False),"%s does not match the serial ids" % ntpath.basename(jobs_file)
+
+def test_jobs_batch():
+  ids, serial_file, jobs_file = assign_both("batch", "--batch")
+
+  assert numpy.all(ids[0] == ids[1])
+  assert filecmp.cmp(serial_file, jobs_file, shallow = False),"%s does not match the serial ids" % ntpath.basename(jobs_file)
+
+# the grid is burnt before the workers are forked
+def test_jobs_raster():
+  ids, serial_file, jobs_file = assign_both("raster", "--idraster 0.05")
+
+  assert len(numpy.unique(ids[0])) > 1
+  assert numpy.all(ids[0] == ids[1])
+  assert filecmp.cmp(serial_file, jobs_file, shallow = False),"%s does not match the serial ids" % ntpath.basename(jobs_file)
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,89 @@
+import os, sys
+import numpy
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+
+from scripts.PosFileConverter import converter, _min_pool
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_metric_coarsen" # just the name, no forward or backslashes!
+
+###############################################################################
+
+make_directory(fname)
+
+# a grid in the layout NcReader reads it, of nx by ny points of the given spacing
+def grid_metric(nx, ny, spacing, values):
+  x = numpy.arange(nx) * spacing
+  y = 100.0 + numpy.arange(ny) * spacing
+  metric = converter()
+  metric.x0 = numpy.outer(numpy.ones_like(y), x)
+  metric.x1 = numpy.outer(y, numpy.ones_like(x))
+  metric.phi = values(metric.x0, metric.x1)
+  return metric
+
+
+
+# each point kept takes the minimum over the cells either side of it
+def test_min_pool_whole_cells():
+  axis = numpy.arange(9.0)
+  values = numpy.array([5.0, 4.0, 6.0, 7.0, 8.0, 9.0, 3.0, 9.0, 9.0])
+  coarse, pooled = _min_pool(axis, values, 4, 0)
+
+  assert coarse.tolist() == [0.0, 4.0, 8.0]
+  assert pooled.tolist() == [4.0, 3.0, 3.0]
+
+# the last cell is padded with the values at the edge and given a point a whole cell on
+def test_min_pool_partial_cell():
+  axis = numpy.arange(11.0)
+  values = numpy.array([5.0, 4.0, 6.0, 7.0, 8.0, 9.0, 7.0, 9.0, 9.0, 2.0, 9.0])
+  coarse, pooled = _min_pool(axis, values, 4, 0)
+
+  assert coarse.tolist() == [0.0, 4.0, 8.0, 12.0]
+  assert pooled.tolist() == [4.0, 4.0, 2.0, 2.0]
+
+# the coarse values are never above the values read in the cells around them
+def test_coarsen_minimum():
+  metric = grid_metric(23, 14, 10.0, lambda x, y: 50.0 + numpy.sin(x / 30.0) * 20.0 + y / 10.0)
+  x, y, values = metric._grid()
+  factor = metric.coarsen_grid(5)
+  coarse_x, coarse_y, coarse = metric._grid()
+
+  assert factor == 5
+  for i in range(coarse_x.size):
+    for j in range(coarse_y.size):
+      near = (abs(x - coarse_x[i]) <= 50.0)[:,None] & (abs(y - coarse_y[j]) <= 50.0)[None,:]
+      assert coarse[i, j] <= values[near].min()
+
+# a grid which does not divide into whole cells stays regular, so it is still written
+# as a Structured field rather than as PostView points
+def test_coarsen_structured():
+  metric = grid_metric(23, 14, 10.0, lambda x, y: 50.0 + x / 10.0 + y / 20.0)
+  metric.postype = "STRUCTURED"
+  metric.postviewFileName = test + "/" + fname + "/coarse.pos"
+  metric.coarsen_grid(5)
+  metric._writeFunc()
+  f = open(test + "/" + fname + "/coarse.dat", "rb")
+  header = numpy.fromfile(f, dtype = numpy.float64, count = 6)
+  size = numpy.fromfile(f, dtype = numpy.intc, count = 3)
+  f.close()
+
+  assert metric.postype == "STRUCTURED"
+  assert header.tolist() == [0.0, 100.0, -0.5, 50.0, 50.0, 1.0]
+  assert size.tolist() == [6, 4, 2]
+
+# the factor chosen keeps posPointsPerEdge points across the smallest mesh size, 180
+def test_coarsen_auto():
+  metric = grid_metric(41, 41, 10.0, lambda x, y: 80.0 + x + y)
+
+  assert metric.coarsen_grid('auto') == 9
+  assert metric.coarsen_grid(1) == 1
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,69 @@
+import os, sys, re
+import numpy
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+
+from scripts.PosFileConverter import converter
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_metric_points" # just the name, no forward or backslashes!
+
+###############################################################################
+
+make_directory(fname)
+
+# A grid given straight to the converter, in the layout NcReader reads it, with values
+# which need all the digits of posPrecision.
+x = numpy.linspace(0.0, 1000.0, 11)
+y = numpy.linspace(-800.0, 0.0, 5)
+
+def write_points(name, chunk_size):
+  metric = converter()
+  metric.x0 = numpy.outer(numpy.ones_like(y), x)
+  metric.x1 = numpy.outer(y, numpy.ones_like(x))
+  metric.phi = 50.0 + numpy.sqrt(metric.x0 + 1.0) / 3.0 - metric.x1 / 7.0
+  metric.posChunkSize = chunk_size
+  metric.postviewFileName = test + "/" + fname + "/" + name + ".pos"
+  metric._writeFunc()
+  return metric, open(metric.postviewFileName).read()
+
+record = re.compile(r"SP\(([^,]*),([^,]*),0\)\{([^}]*)\};\n")
+
+
+
+def test_points_values():
+  metric, text = write_points("points", 1 << 14)
+  rows = numpy.array(record.findall(text), dtype = float)
+
+  assert text.startswith('View "background_edgelength" {\n') and text.endswith('};')
+  assert rows.shape == (x.size * y.size, 3)
+  assert numpy.all(rows[:,0] == metric.x0.ravel())
+  assert numpy.all(rows[:,1] == metric.x1.ravel())
+  assert numpy.allclose(rows[:,2], metric.phi.ravel(), rtol = 1e-11, atol = 0)
+
+# the records are the same whatever the chunks they are formatted in
+def test_points_chunks():
+  metric, text = write_points("points", 1 << 14)
+  metric, chunked = write_points("points_chunked", 7)
+
+  assert chunked == text
+
+def test_points_precision():
+  metric = converter()
+  metric.posPrecision = 4
+  metric.x0 = numpy.array([[1.0/3]])
+  metric.x1 = numpy.array([[2.0]])
+  metric.phi = numpy.array([[123456.0]])
+  metric.postviewFileName = test + "/" + fname + "/precision.pos"
+  metric._writeFunc()
+
+  assert open(metric.postviewFileName).read() == 'View "background_edgelength" {\nSP(0.3333,2,0){1.235e+05};\n};'
+
+
+############################# ADD MORE TESTS HERE: ############################
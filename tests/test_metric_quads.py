@@ -0,0 +1,45 @@
+import os, sys, ntpath, filecmp
+import numpy
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+
+from scripts.PosFileConverter import converter
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+model_answers = os.path.dirname(os.path.realpath(__file__)) + "/model_answers"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_metric_quads" # just the name, no forward or backslashes!
+postype = "SCALARQUADS"
+outname = "quads.pos"
+
+###############################################################################
+
+make_directory(fname)
+
+# The metric is written from a grid given straight to the converter, in the layout
+# NcReader reads it, so no NetCDF is needed. The x and y spacings differ so the
+# axes cannot be swapped without the file changing.
+x = numpy.linspace(0.0, 1000.0, 11)
+y = numpy.linspace(0.0, 800.0, 5)
+metric = converter()
+metric.postype = postype
+metric.x0 = numpy.outer(numpy.ones_like(y), x)
+metric.x1 = numpy.outer(y, numpy.ones_like(x))
+metric.phi = 50.0 + (metric.x0 - 500.0)**2 / 1000.0 + metric.x1 / 10.0
+metric.postviewFileName = test + "/" + fname + "/" + os.path.splitext(outname)[0] + ".pos"
+metric._writeFunc()
+
+
+
+def test_metric_file():
+  curr_file = test + "/" + fname + "/" + outname
+
+  assert filecmp.cmp(curr_file, model_answers + "/" + fname + "/" + outname, shallow = False),"%s does not match the model answer" % outname
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,32 @@
+import os, sys, ntpath
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import generate_files, make_directory
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+
+from test_geo import geo_files_test
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_ranges" # just the name, no forward or backslashes!
+command =	"-l LY --ranges -g "+test+"/test_ranges/test_ranges.geo --id "+support_file_path+"/a_idLayer.shp "+support_file_path+"/ID0Layer.shp" # see modular_meshing.py for help
+
+###############################################################################
+
+generate_files(fname, command)
+
+
+
+def test_ranges_geo():
+  curr_file = os.path.dirname(os.path.realpath(__file__)) + "/output/" + fname + "/" + fname + ".geo"
+
+  assert geo_files_test(curr_file),"%s does not match the model answer" % (ntpath.basename(curr_file).rstrip())
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,38 @@
+import os, sys, ntpath
+import pytest
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import generate_files, make_directory
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+
+from test_geo import geo_files_test
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_region" # just the name, no forward or backslashes!
+command =	"-l LN --region -70 -72 -60 -64 -g "+test+"/test_region/test_region.geo --id "+support_file_path+"/a_idLayer.shp "+support_file_path+"/rtopo_shape_DN__2.shp" # see modular_meshing.py for help
+
+###############################################################################
+
+generate_files(fname, command)
+
+
+
+def test_region_geo():
+  curr_file = os.path.dirname(os.path.realpath(__file__)) + "/output/" + fname + "/" + fname + ".geo"
+
+  assert geo_files_test(curr_file),"%s does not match the model answer" % (ntpath.basename(curr_file).rstrip())
+
+
+############################# ADD MORE TESTS HERE: ############################
+
+# a region with none of the domain shapes in it is reported before the geo file is written
+def test_region_outside():
+  with pytest.raises(AssertionError):
+    generate_files(fname + "_outside", "-l LN --region 100 100 101 101 -g "+test+"/"+fname+"_outside/"+fname+"_outside.geo "+support_file_path+"/rtopo_shape_DN__2.shp")
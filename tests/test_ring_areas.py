@@ -0,0 +1,32 @@
+import os, sys
+import numpy
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+import file_generation # puts plugins/mesh_surface on the path
+
+from scripts.input_output_for_id import _ring_areas
+
+
+# a square of side 1 and a rectangle of sides 2 and 1 over the same latitudes, open
+square = [[0.0, 10.0], [1.0, 10.0], [1.0, 11.0], [0.0, 11.0]]
+rectangle = [[3.0, 10.0], [5.0, 10.0], [5.0, 11.0], [3.0, 11.0]]
+
+def areas(*rings):
+  offsets = numpy.cumsum([0] + map(len, rings))
+  return _ring_areas(numpy.array(sum(rings, []), dtype = float).reshape(-1, 2), offsets)
+
+
+
+def test_ring_areas():
+  square_area, rectangle_area = areas(square, rectangle)
+
+  assert square_area > 0
+  assert numpy.allclose(rectangle_area, 2 * square_area)
+
+# the last ring given closed, ending on the last point of coords
+def test_ring_areas_closed_last():
+  assert numpy.allclose(areas(square, rectangle + rectangle[:1]), areas(square, rectangle))
+  assert numpy.allclose(areas(square + square[:1], rectangle + rectangle[:1]), areas(square, rectangle))
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,60 @@
+import os, sys
+import numpy
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+import file_generation # puts plugins/mesh_surface on the path
+
+from scripts import shapefile
+
+
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+# shapes of a single part and of several parts, the annulus_multiReg files are left
+# out as they have stale bytes between their records, which shapes() reads as shapes
+shapefiles = ["annulus", "rtopo_shape_DN__2", "a_idLayer", "ID0Layer"]
+
+
+
+def test_shape_arrays():
+  for name in shapefiles:
+    with shapefile.Reader(support_file_path + "/" + name + ".shp") as reader:
+      shapes = reader.shapes()
+      for i in range(len(shapes)):
+        points, parts = reader.shape_arrays(i)
+
+        assert numpy.all(points == numpy.array(shapes[i].points)[:,:2]), name
+        assert parts.tolist() == list(shapes[i].parts), name
+
+def test_iter_shape_arrays():
+  for name in shapefiles:
+    with shapefile.Reader(support_file_path + "/" + name + ".shp") as reader:
+      shapes = reader.shapes()
+      arrays = list(reader.iter_shape_arrays())
+
+      assert len(arrays) == len(shapes), name
+      for (points, parts), shape in zip(arrays, shapes):
+        assert numpy.all(points == numpy.array(shape.points)[:,:2]), name
+        assert parts.tolist() == list(shape.parts), name
+
+def test_shapes_as_arrays():
+  for name in shapefiles:
+    with shapefile.Reader(support_file_path + "/" + name + ".shp") as reader:
+      shapes = reader.shapes()
+      coords, part_offsets, shape_offsets = reader.shapes_as_arrays()
+      coords = coords.copy()
+
+    assert numpy.all(coords == numpy.concatenate([numpy.array(shape.points)[:,:2] for shape in shapes])), name
+    assert shape_offsets.tolist() == numpy.cumsum([0] + [len(shape.parts) for shape in shapes]).tolist(), name
+    first = numpy.cumsum([0] + [len(shape.points) for shape in shapes])
+    assert part_offsets.tolist() == [p + first[i] for i in range(len(shapes)) for p in shapes[i].parts] + [first[-1]], name
+
+# the mapped file and the files opened are closed
+def test_close():
+  reader = shapefile.Reader(support_file_path + "/annulus.shp")
+  reader.shape_arrays(0)
+  reader.close()
+
+  assert reader.shp.closed and reader.shx.closed and reader.dbf.closed
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -0,0 +1,62 @@
+import os, sys, ntpath
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import generate_files, make_directory
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+
+from test_geo import geo_files_test
+
+import numpy
+from scripts.domain_geometry import DomainGeometry
+from scripts.vertex_snapping import snap_points, snap_geometry
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_snap" # just the name, no forward or backslashes!
+command =	"-l LN --snap 0.1 -g "+test+"/test_snap/test_snap.geo "+support_file_path+"/ID0Layer.shp" # see modular_meshing.py for help
+
+###############################################################################
+
+generate_files(fname, command)
+
+
+
+def test_snap_geo():
+  curr_file = os.path.dirname(os.path.realpath(__file__)) + "/output/" + fname + "/" + fname + ".geo"
+
+  assert geo_files_test(curr_file),"%s does not match the model answer" % (ntpath.basename(curr_file).rstrip())
+
+
+############################# ADD MORE TESTS HERE: ############################
+
+def test_snap_points_close():
+  coords = numpy.array([[0.0, 0.0], [0.05, 0.0], [1.0, 1.0], [1.0, 1.04], [0.0, 0.08]])
+  snapped, moved = snap_points(coords, 0.1)
+
+  assert moved == 3
+  assert snapped.tolist() == [[0.0, 0.0], [0.0, 0.0], [1.0, 1.0], [1.0, 1.0], [0.0, 0.0]]
+
+
+# points closer than a cell apart but further than the tolerance are left as they are
+def test_snap_points_dense():
+  coords = numpy.column_stack((numpy.arange(1000)*0.15, numpy.zeros(1000)))
+  snapped, moved = snap_points(coords, 0.1)
+
+  assert moved == 0
+  assert (snapped == coords).all()
+
+
+def test_snap_geometry_copies():
+  coords = numpy.array([[0.0, 0.0], [1.0, 0.0], [1.0, 0.01], [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]])
+  geometry = DomainGeometry(coords.copy(), [0, 6], [0, 1], [1])
+  snapped, merged = snap_geometry(geometry, 0.1)
+
+  assert merged == 1
+  assert (geometry.coords == coords).all()
+  assert snapped.coords.tolist() == [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]]
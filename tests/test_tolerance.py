@@ -0,0 +1,54 @@
+import os, sys, shutil
+import pytest
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/testing_modules/'))
+from file_generation import make_directory
+
+from scripts.define_id import domain_tolerance
+from scripts.vertex_snapping import DEGREES_PER_METRE
+
+
+test = os.path.dirname(os.path.realpath(__file__)) + "/output"
+support_file_path = os.path.dirname(os.path.realpath(__file__)) + "/support"
+
+
+########################### APPLY YOUR CHANGES HERE: ##########################
+
+fname = "test_tolerance" # just the name, no forward or backslashes!
+
+###############################################################################
+
+make_directory(fname)
+
+# annulus.shp, which lies outside longitude and latitude, with a .prj projected in metres
+projected = test + "/" + fname + "/annulus_utm.shp"
+for ext in (".shp", ".shx", ".dbf"):
+  shutil.copy(support_file_path + "/annulus" + ext, projected[:-4] + ext)
+prj = open(projected[:-4] + ".prj", "w")
+prj.write('PROJCS["WGS_1984_UTM_Zone_30N",GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",SPHEROID["WGS_1984",6378137,298.257223563]],PRIMEM["Greenwich",0],UNIT["Degree",0.017453292519943295]],PROJECTION["Transverse_Mercator"],UNIT["Meter",1]]')
+prj.close()
+
+
+
+def test_units_of_the_domain():
+  assert domain_tolerance("0.5", support_file_path + "/annulus.shp") == 0.5
+  assert domain_tolerance(0.5, support_file_path + "/annulus.shp") == 0.5
+  assert domain_tolerance(None, support_file_path + "/annulus.shp") is None
+
+# without a .prj the bounding box is within longitude and latitude
+def test_metres_without_prj():
+  assert domain_tolerance("50m", support_file_path + "/rtopo_shape_DN__2.shp") == 50*DEGREES_PER_METRE
+
+def test_metres_geographic_prj():
+  assert domain_tolerance("50m", support_file_path + "/annulus_multiReg0.shp") == 50*DEGREES_PER_METRE
+
+def test_metres_projected_prj():
+  assert domain_tolerance("50m", projected) == 50.0
+
+# metres cannot be converted when the units of the domain are not known
+def test_metres_unknown_units():
+  with pytest.raises(AssertionError):
+    domain_tolerance("50m", support_file_path + "/annulus.shp")
+
+
+############################# ADD MORE TESTS HERE: ############################
@@ -1,6 +1,6 @@
 import os, sys
 
-sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../../plugins/mesh_netcdf/'))
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../../plugins/mesh_surface/'))
 from modular_meshing import Modular_meshing
 
 